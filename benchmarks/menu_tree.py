@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""
+menu_tree.py [sizes...]
+
+Compares cms.utils.find_children with the indexed builder from
+cms.utils.navigation on synthetic page trees. Default sizes are 100, 1000
+and 10000 pages. Needs configured django settings, e.g.:
+
+    DJANGO_SETTINGS_MODULE=itcq.settings python benchmarks/menu_tree.py
+"""
+
+import sys, os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cms.utils import find_children
+from cms.utils.navigation import index_children, mark_children
+from cms.tests.navigation import FakePage
+
+def make_pages(count, width=10):
+    """Builds tree of count pages, every page has up to width children.
+    Ordered like the show_menu query (tree_id, parent, lft).
+    """
+    pages = []
+    for pk in range(1, count + 1):
+        if pk <= width:
+            pages.append(FakePage(pk, None, 0))
+        else:
+            parent = pages[(pk - width - 1) // width]
+            pages.append(FakePage(pk, parent.pk, parent.level + 1))
+    pages.sort(key=lambda p: (p.parent_id, p.pk))
+    return pages
+
+def run(builder, count):
+    pages = make_pages(count)
+    roots = [page for page in pages if page.level == 0]
+    for root in roots:
+        root.ancestors_ascending = []
+        root.childrens = []
+    start = time.time()
+    builder(roots, pages)
+    return time.time() - start
+
+def old_builder(roots, pages):
+    for root in roots:
+        find_children(root, pages, 100, 100, [], -1)
+
+def new_builder(roots, pages):
+    index = index_children(pages)
+    for root in roots:
+        mark_children(root, index, 100, 100, [], -1)
+
+def main(sizes):
+    print "%8s %14s %14s %8s" % ("pages", "find_children", "mark_children", "speedup")
+    for count in sizes:
+        old = run(old_builder, count)
+        new = run(new_builder, count)
+        print "%8d %13.4fs %13.4fs %7.1fx" % (count, old, new, old / max(new, 1e-9))
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
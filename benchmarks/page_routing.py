@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+"""
+page_routing.py [pages] [seconds]
+
+Measures how many requests per second cms.views.details can resolve, with
+and without the routing table (CMS_ROUTING_CACHE). Templates aren't rendered,
+only the current page is looked up. Creates test database, so it needs
+settings with a database which can be created from scratch (sqlite) and a
+cache backend which keeps values, e.g. locmem://:
+
+    DJANGO_SETTINGS_MODULE=mysettings python benchmarks/page_routing.py 200 5
+"""
+
+import sys, os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from django.db import connection
+from django.http import HttpRequest
+from django.contrib.auth.models import User, AnonymousUser
+from django.contrib.sites.models import Site
+from cms import settings as cms_settings
+from cms.models import Page, Title
+from cms.utils.permissions import _thread_locals
+from cms.views import details
+
+def make_pages(count, width=10):
+    """Creates count published pages, every page has up to width children.
+    Returns list of their paths.
+    """
+    site = Site.objects.get_current()
+    pages, paths = [], []
+    for i in range(count):
+        page = Page(site=site, template=cms_settings.CMS_TEMPLATES[0][0], published=True)
+        page.save()
+        if i >= width:
+            parent = pages[(i - width) // width]
+            page.move_to(parent, 'last-child')
+            page.save()
+        Title.objects.set_or_create(page, 'en', slug='page-%d' % i, title='Page %d' % i)
+        pages.append(page)
+        paths.append(Title.objects.get(page=page, language='en').path)
+    for page in pages:
+        # publish
+        page.save()
+    return paths
+
+def make_request():
+    request = HttpRequest()
+    request.path = '/'
+    request.user = AnonymousUser()
+    request.GET = request.POST = request.REQUEST = {}
+    request.LANGUAGE_CODE = 'en'
+    return request
+
+def run(paths, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for path in paths:
+            details(make_request(), slug=path, only_context=True)
+        count += len(paths)
+    return count / (time.time() - start)
+
+def main(count, seconds):
+    connection.creation.create_test_db(verbosity=0)
+    user = User(username='benchmark', is_staff=True, is_superuser=True)
+    user.save()
+    _thread_locals.user = user
+    paths = make_pages(count)
+    print "%d pages, %s seconds per run" % (count, seconds)
+    for routing in (False, True):
+        cms_settings.CMS_ROUTING_CACHE = routing
+        print "%-18s %10.1f req/s" % (routing and "routing table" or "queries", run(paths, seconds))
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [200, 5][len(args):]))
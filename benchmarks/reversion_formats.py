@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+"""
+reversion_formats.py [plugins] [revisions]
+
+Compares serialization formats of reversion: bytes stored in the version
+table and time needed to save a revision of a page with the given number of
+text plugins. "xml, row by row" saves versions one by one as it was done
+without REVERSION_BULK_INSERT, the other rows use the multi-row INSERT if
+the database supports it. Creates test database, so it needs settings
+with a database which can be created from scratch (sqlite):
+
+    DJANGO_SETTINGS_MODULE=mysettings python benchmarks/reversion_formats.py 50 20
+"""
+
+import sys, os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from django.conf import settings
+from django.db import connection
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+import reversion
+from reversion.models import Revision, Version
+from reversion.revisions import RevisionManager
+from cms import settings as cms_settings
+from cms.models import Page, Title, CMSPlugin
+from cms.plugins.text.models import Text
+from cms.utils.permissions import _thread_locals
+
+LOREM = ("<p>Lorem ipsum dolor sit amet, consectetur adipisicing elit, sed do "
+         "eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ad "
+         "minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip "
+         "ex ea commodo consequat.</p>\n")
+
+class RowByRowManager(RevisionManager):
+    """Saves versions with one INSERT per object."""
+    
+    def save_versions(self, revision, objects):
+        for obj in objects:
+            format, serialized_data = self.serialize(obj)
+            Version.objects.create(revision=revision,
+                                   object_id=unicode(obj.pk),
+                                   content_type=ContentType.objects.get_for_model(obj),
+                                   format=format,
+                                   serialized_data=serialized_data,
+                                   object_repr=unicode(obj))
+
+def make_plugins(count):
+    site = Site.objects.get_current()
+    page = Page(site=site, template=cms_settings.CMS_TEMPLATES[0][0], published=True)
+    page.save()
+    Title.objects.set_or_create(page, 'en', slug='page', title='Page')
+    plugins = []
+    for i in range(count):
+        plugin = CMSPlugin(page=page, placeholder='body', language='en', position=i, plugin_type='TextPlugin')
+        plugin.save()
+        text = Text(body=LOREM * (i % 5 + 1))
+        text.__dict__.update(plugin.__dict__)
+        text.cmsplugin_ptr_id = plugin.pk
+        text.save()
+        plugins.append(text)
+    return plugins
+
+def run(manager, format, objects, revisions):
+    for model in (CMSPlugin, Text):
+        manager.register(model, format=format)
+    Revision.objects.all().delete()
+    start = time.time()
+    for i in range(revisions):
+        manager.start()
+        try:
+            for obj in objects:
+                manager.add(obj)
+        finally:
+            manager.end()
+    elapsed = (time.time() - start) / revisions
+    size = sum([len(data) for data in Version.objects.values_list('serialized_data', flat=True)]) / revisions
+    return size, elapsed
+
+def main(count, revisions):
+    connection.creation.create_test_db(verbosity=0)
+    settings.REVERSION_BULK_INSERT = True
+    user = User(username='benchmark', is_staff=True, is_superuser=True)
+    user.save()
+    _thread_locals.user = user
+    objects = make_plugins(count)
+    print "%d text plugins, %d revisions" % (count, revisions)
+    print "%-18s %12s %12s" % ("format", "bytes", "ms/revision")
+    for name, manager, format in (("xml, row by row", RowByRowManager(), "xml"),
+                                  ("xml", RevisionManager(), "xml"),
+                                  ("json", RevisionManager(), "json"),
+                                  ("zjson", RevisionManager(), "zjson")):
+        size, elapsed = run(manager, format, objects, revisions)
+        print "%-18s %12d %12.1f" % (name, size, elapsed * 1000)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [50, 20][len(args):]))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+template_variables.py [pages] [seconds]
+
+Renders the CMS menu, breadcrumb and plugin templates with synthetic pages,
+resolving the template variables with django.template.Variable and with the
+previous implementation, which tried the dictionary lookup on every object.
+Checks that both render the same output. Creates test database (show_menu
+looks up the current site), so it needs settings with a database which can
+be created from scratch (sqlite):
+
+    DJANGO_SETTINGS_MODULE=mysettings python benchmarks/template_variables.py 300 5
+"""
+
+import sys, os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest
+from django.template import Context, Variable, VariableDoesNotExist
+from django.template.loader import get_template
+
+class MenuPage(object):
+    """Has just the attributes used by the menu templates.
+    """
+    def __init__(self, pk, level):
+        self.pk = self.id = pk
+        self.level = level
+        self.childrens = []
+        self.selected = pk == 1
+        self.ancestor = self.sibling = self.descendant = False
+
+    def get_absolute_url(self):
+        return '/page-%d/' % self.pk
+
+    def get_menu_title(self):
+        return 'Page %d' % self.pk
+
+class Person(object):
+    name = 'Jane Doe'
+    role = 'Researcher'
+    address = 'Room 1\nBuilding 2'
+    email = 'jane@example.com'
+    phone_no = '123'
+    bio = '<p>Bio</p>'
+    url = 'http://example.com/'
+    image = None
+
+def make_pages(count, width=10):
+    """Builds tree of count pages, every page has up to width children.
+    Returns the root pages.
+    """
+    pages = []
+    for pk in range(1, count + 1):
+        if pk <= width:
+            pages.append(MenuPage(pk, 0))
+        else:
+            parent = pages[(pk - width - 1) // width]
+            page = MenuPage(pk, parent.level + 1)
+            parent.childrens.append(page)
+            pages.append(page)
+    return pages[:width]
+
+def make_request():
+    request = HttpRequest()
+    request.path = '/'
+    request.GET = request.POST = request.REQUEST = {}
+    request.LANGUAGE_CODE = settings.LANGUAGE_CODE
+    request.current_page = None
+    return request
+
+def legacy_resolve_lookup(self, context):
+    """Variable._resolve_lookup before the lookup of the attributes of
+    objects which don't support indexing went directly to getattr.
+    """
+    current = context
+    for bit in self.lookups:
+        try: # dictionary lookup
+            current = current[bit]
+        except (TypeError, AttributeError, KeyError):
+            try: # attribute lookup
+                current = getattr(current, bit)
+                if callable(current):
+                    if getattr(current, 'alters_data', False):
+                        current = settings.TEMPLATE_STRING_IF_INVALID
+                    else:
+                        try: # method call (assuming no args required)
+                            current = current()
+                        except TypeError: # arguments *were* required
+                            current = settings.TEMPLATE_STRING_IF_INVALID # invalid method call
+                        except Exception, e:
+                            if getattr(e, 'silent_variable_failure', False):
+                                current = settings.TEMPLATE_STRING_IF_INVALID
+                            else:
+                                raise
+            except (TypeError, AttributeError):
+                try: # list-index lookup
+                    current = current[int(bit)]
+                except (IndexError, ValueError, KeyError, TypeError):
+                    raise VariableDoesNotExist("Failed lookup for key [%s] in %r", (bit, current)) # missing attribute
+            except Exception, e:
+                if getattr(e, 'silent_variable_failure', False):
+                    current = settings.TEMPLATE_STRING_IF_INVALID
+                else:
+                    raise
+    return current
+
+def make_renderers(count):
+    roots = make_pages(count)
+    ancestors = [roots[0], roots[0].childrens[0], roots[0].childrens[0].childrens[0]]
+    menu = get_template('cms/menu.html')
+    breadcrumb = get_template('cms/breadcrumb.html')
+    link = get_template('cms/plugins/link.html')
+    person = get_template('itcq/plugins/person.html')
+    def render_menu():
+        return menu.render(Context({'request': make_request(), 'children': roots,
+            'from_level': 0, 'to_level': 100, 'extra_inactive': 100,
+            'extra_active': 100, 'template': 'cms/menu.html'}))
+    def render_breadcrumb():
+        return breadcrumb.render(Context({'ancestors': ancestors}))
+    def render_plugins():
+        output = []
+        for i in range(20):
+            output.append(link.render(Context({'name': 'Link %d' % i, 'link': '/link-%d/' % i})))
+            output.append(person.render(Context({'person': Person()})))
+        return ''.join(output)
+    return [('menu', render_menu), ('breadcrumb', render_breadcrumb), ('20+20 plugins', render_plugins)]
+
+def run(render, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        render()
+        count += 1
+    return count / (time.time() - start)
+
+def main(count, seconds):
+    connection.creation.create_test_db(verbosity=0)
+    current = Variable._resolve_lookup
+    print "%d menu pages, %s seconds per run" % (count, seconds)
+    print "%-14s %12s %12s %8s" % ("template", "legacy", "current", "speedup")
+    for name, render in make_renderers(count):
+        Variable._resolve_lookup = legacy_resolve_lookup
+        legacy_output = render()
+        legacy = run(render, seconds)
+        Variable._resolve_lookup = current
+        if render() != legacy_output:
+            print "%s: output differs!" % name
+        new = run(render, seconds)
+        print "%-14s %10.1f/s %10.1f/s %7.2fx" % (name, legacy, new, new / legacy)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [300, 5][len(args):]))
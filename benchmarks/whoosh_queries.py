@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""
+whoosh_queries.py [documents] [seconds] [index directory]
+
+Measures how many Term, And, Or, Phrase, Prefix, Wildcard and Fuzzy queries
+per second whoosh can score and rank on a synthetic index, and how many
+random term lookups per second it can do. The documents are random sequences of
+words with a Zipf-like frequency distribution, so some terms are very common
+and most are rare. The index is built once and kept in the given directory
+(a temporary directory by default, removed at the end):
+
+    python benchmarks/whoosh_queries.py 100000 5 /tmp/whoosh_bench
+"""
+
+import sys, os
+import random
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from whoosh import index
+from whoosh.analysis import SimpleAnalyzer
+from whoosh.fields import Schema, ID, TEXT
+from whoosh.query import Term, And, Or, Phrase, Prefix, Wildcard, Fuzzy
+
+VOCABULARY = 5000
+WORDS_PER_DOCUMENT = 30
+
+def make_words(count, rand):
+    """Returns count words, the n-th word of the vocabulary is about n times
+    less frequent than the first one.
+    """
+    return [u"w%d" % int(VOCABULARY ** rand.random()) for i in xrange(count)]
+
+def make_index(dirname, count):
+    if os.path.exists(dirname) and index.exists_in(dirname):
+        ix = index.open_dir(dirname)
+        if ix.doc_count() == count:
+            return ix
+        shutil.rmtree(dirname)
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+    schema = Schema(id=ID(stored=True), content=TEXT(analyzer=SimpleAnalyzer()))
+    ix = index.create_in(dirname, schema)
+    rand = random.Random(0)
+    writer = ix.writer()
+    for i in xrange(count):
+        writer.add_document(id=unicode(i), content=u" ".join(make_words(WORDS_PER_DOCUMENT, rand)))
+    writer.commit()
+    ix.optimize()
+    return index.open_dir(dirname)
+
+QUERIES = (
+    ("Term", Term("content", u"w3")),
+    ("And", And([Term("content", u"w2"), Term("content", u"w5")])),
+    ("Or", Or([Term("content", u"w4"), Term("content", u"w7"), Term("content", u"w12")])),
+    ("Phrase", Phrase("content", [u"w1", u"w2"])),
+    ("And, rare", And([Term("content", u"w1"), Term("content", u"w2000")])),
+    ("Phrase, rare", Phrase("content", [u"w1", u"w900"])),
+    ("Prefix", Prefix("content", u"w49")),
+    ("Wildcard", Wildcard("content", u"w4*7")),
+    ("Wildcard, ?", Wildcard("content", u"w?23?")),
+    ("Fuzzy", Fuzzy("content", u"w1234", maxdist=1, prefixlength=0)),
+)
+
+def run(searcher, query, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        results = searcher.search(query, limit=10)
+        results[:10]
+        count += 1
+    return count / (time.time() - start), len(results)
+
+def run_lookups(searcher, seconds):
+    fieldnum = searcher.fieldname_to_num("content")
+    rand = random.Random(0)
+    words = [u"w%d" % rand.randint(0, VOCABULARY) for i in xrange(1000)]
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for word in words:
+            searcher.doc_frequency(fieldnum, word)
+        count += len(words)
+    return count / (time.time() - start)
+
+def main(count, seconds, dirname=None):
+    temporary = dirname is None
+    if temporary:
+        dirname = tempfile.mkdtemp()
+    try:
+        start = time.time()
+        ix = make_index(dirname, count)
+        print "%d documents, index ready in %.1f s, %s seconds per query" % (count, time.time() - start, seconds)
+        searcher = ix.searcher()
+        for name, query in QUERIES:
+            rate, hits = run(searcher, query, seconds)
+            print "%-12s %8d hits %10.2f queries/s" % (name, hits, rate)
+        print "%-12s %24.2f lookups/s" % ("Terms", run_lookups(searcher, seconds))
+        searcher.close()
+    finally:
+        if temporary:
+            shutil.rmtree(dirname)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(*([int(args[0]) if args else 100000, float(args[1]) if len(args) > 1 else 5] + args[2:3]))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""
+whoosh_storage.py [documents] [seconds] [index directory]
+
+Compares reading a whoosh index through plain files and through
+memory-mapped files (FileStorage(path, mapped=True)). For both it measures
+how many postings per second can be scanned (every term of the content
+field, as when merging segments or expanding a wide query) and how many
+random document length lookups per second can be done (as when scoring).
+The index is the one built by whoosh_queries.py:
+
+    python benchmarks/whoosh_storage.py 100000 5 /tmp/whoosh_bench
+"""
+
+import sys, os
+import random
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from whoosh import index, store
+
+from whoosh_queries import make_index
+
+def scan_postings(ix, seconds):
+    reader = ix.term_reader()
+    fieldnum = ix.schema.name_to_number("content")
+    terms = [text for fn, text, _, _ in reader if fn == fieldnum]
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for text in terms:
+            for _ in reader.postings(fieldnum, text):
+                count += 1
+    reader.close()
+    return count / (time.time() - start)
+
+def lookup_lengths(ix, seconds):
+    reader = ix.doc_reader()
+    fieldnum = ix.schema.name_to_number("content")
+    rand = random.Random(0)
+    docnums = [rand.randint(0, ix.doc_count_all() - 1) for i in xrange(1000)]
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        for docnum in docnums:
+            reader.doc_field_length(docnum, fieldnum)
+        count += len(docnums)
+    reader.close()
+    return count / (time.time() - start)
+
+def main(count, seconds, dirname=None):
+    temporary = dirname is None
+    if temporary:
+        dirname = tempfile.mkdtemp()
+    try:
+        make_index(dirname, count)
+        print "%d documents, %s seconds per run" % (count, seconds)
+        for mapped in (False, True):
+            ix = index.Index(store.FileStorage(dirname, mapped=mapped))
+            print "%-8s %12.0f postings/s %12.0f lengths/s" % (mapped and "mapped" or "files",
+                                                              scan_postings(ix, seconds),
+                                                              lookup_lengths(ix, seconds))
+            ix.close()
+    finally:
+        if temporary:
+            shutil.rmtree(dirname)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(*([int(args[0]) if args else 100000, float(args[1]) if len(args) > 1 else 5] + args[2:3]))
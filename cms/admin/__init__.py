@@ -45,6 +45,7 @@ from cms.utils.moderator import update_moderation_message,\
     requires_moderation, will_require_moderation
 from django.core.urlresolvers import reverse
 from cms.utils.admin import render_admin_menu_item
+from cms.utils.plugins import downcast_plugins
 from cms.exceptions import NoPermissionsException
 from cms.admin.dialog.views import get_copy_dialog
 
@@ -405,6 +406,7 @@ class PageAdmin(admin.ModelAdmin):
             pat(r'^([0-9]+)/approve/$', self.approve_page), # approve page 
             pat(r'^([0-9]+)/remove-delete-state/$', self.remove_delete_state),
             pat(r'^([0-9]+)/dialog/copy/$', get_copy_dialog), # copy dialog
+            pat(r'^([0-9]+)/subtree/$', self.get_subtree), # lazy loaded tree
         )
         
         url_patterns.extend(super(PageAdmin, self).get_urls())
@@ -599,7 +601,7 @@ class PageAdmin(admin.ModelAdmin):
                                     bases[int(plugin.cmsplugin_ptr_id)].set_base_attr(plugin)
                                     plugin_list.append(plugin)
                         else:
-                            plugin_list = CMSPlugin.objects.filter(page=obj, language=language, placeholder=placeholder.name, parent=None).order_by('position')
+                            plugin_list = downcast_plugins(CMSPlugin.objects.filter(page=obj, language=language, placeholder=placeholder.name, parent=None).order_by('position'))
                     widget = PluginEditor(attrs={'installed':installed_plugins, 'list':plugin_list})
                     form.base_fields[placeholder.name] = CharField(widget=widget, required=False)
         else: 
@@ -755,6 +757,14 @@ class PageAdmin(admin.ModelAdmin):
             pass
         return False
     
+    def get_changelist(self, request):
+        if hasattr(self, 'list_editable'):# django 1.1
+            return CMSChangeList(request, self.model, self.list_display, self.list_display_links, self.list_filter,
+                self.date_hierarchy, self.search_fields, self.list_select_related, self.list_per_page, self.list_editable, self)
+        else:# django 1.0.2
+            return CMSChangeList(request, self.model, self.list_display, self.list_display_links, self.list_filter,
+                self.date_hierarchy, self.search_fields, self.list_select_related, self.list_per_page, self)
+    
     def changelist_view(self, request, extra_context=None):
         "The 'change list' admin view for this model."
         from django.contrib.admin.views.main import ERROR_FLAG
@@ -763,12 +773,7 @@ class PageAdmin(admin.ModelAdmin):
         if not self.has_change_permission(request, None):
             raise PermissionDenied
         try:
-            if hasattr(self, 'list_editable'):# django 1.1
-                cl = CMSChangeList(request, self.model, self.list_display, self.list_display_links, self.list_filter,
-                    self.date_hierarchy, self.search_fields, self.list_select_related, self.list_per_page, self.list_editable, self)
-            else:# django 1.0.2
-                cl = CMSChangeList(request, self.model, self.list_display, self.list_display_links, self.list_filter,
-                    self.date_hierarchy, self.search_fields, self.list_select_related, self.list_per_page, self)
+            cl = self.get_changelist(request)
         except IncorrectLookupParameters:
             # Wacky lookup parameters were given, so redirect to the main
             # changelist page, without parameters, and pass an 'invalid=1'
@@ -805,6 +810,25 @@ class PageAdmin(admin.ModelAdmin):
         ], context, context_instance=RequestContext(request))
     
     
+    def get_subtree(self, request, page_id):
+        """Renders the tree items under the page, used for loading of the
+        tree over ajax if CMS_TREE_LAZY_LEVELS is set.
+        """
+        if not self.has_change_permission(request, None):
+            raise PermissionDenied
+        page = get_object_or_404(Page, id=page_id)
+        try:
+            cl = self.get_changelist(request)
+        except IncorrectLookupParameters:
+            raise Http404
+        cl.set_items(request, parent=page)
+        context = {
+            'cl': cl,
+            'has_add_permission': self.has_add_permission(request),
+        }
+        return render_to_response('admin/cms/page/change_list_subtree.html',
+            context, context_instance=RequestContext(request))
+    
     def recoverlist_view(self, request, extra_context=None):
         if not self.has_recover_permission(request):
             raise PermissionDenied
@@ -917,7 +941,7 @@ class PageAdmin(admin.ModelAdmin):
                 if can_change_list == PagePermissionsPermissionManager.GRANT_ALL:
                     can_change = True
                 else:
-                    can_change = permission.page_id in can_change_list
+                    can_change = permission.page in can_change_list
                 permission_set.append([(False, can_change), permission])
         
         context = {
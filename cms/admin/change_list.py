@@ -1,10 +1,12 @@
 from django.contrib.admin.views.main import ChangeList, ALL_VAR, IS_POPUP_VAR,\
     ORDER_TYPE_VAR, ORDER_VAR, SEARCH_VAR
-from cms.models import Title, PagePermission, Page
+from cms.models import PagePermission, Page
 from cms import settings
-from cms.utils import get_language_from_request, find_children
+from cms.utils import get_language_from_request
+from cms.utils.navigation import index_children, mark_children
 from django.contrib.sites.models import Site
 from cms.utils.permissions import get_user_sites_queryset
+from cms.utils.page import prefetch_titles
 
 SITE_VAR = "site__exact"
 COPY_VAR = "copy"
@@ -41,8 +43,8 @@ class CMSChangeList(ChangeList):
         if request:
             permissions = Page.permissions.get_change_list_id_list(request.user)
             if permissions != Page.permissions.GRANT_ALL:
-                qs = qs.filter(pk__in=permissions)
-                self.root_query_set = self.root_query_set.filter(pk__in=permissions)
+                qs = qs.filter(permissions.get_q())
+                self.root_query_set = self.root_query_set.filter(permissions.get_q())
             self.real_queryset = True
             if not SITE_VAR in self.params:
                 qs = qs.filter(site=request.session.get('cms_admin_site', None))
@@ -66,73 +68,108 @@ class CMSChangeList(ChangeList):
             else:
                 self.full_result_count = self.root_query_set.count()
     
-    def set_items(self, request):
+    def set_items(self, request, parent=None):
+        """Builds the tree of pages. Children of all pages are indexed in one
+        pass (see cms.utils.navigation.index_children), so building the tree
+        is linear in the number of pages.
+        
+        If CMS_TREE_LAZY_LEVELS is set, only that many levels of the tree get
+        loaded. Pages on the last level which have children are marked with
+        has_lazy_children, and the tree loads their children over ajax when
+        they get opened. If parent is given, builds only the tree under the
+        parent page.
+        """
         lang = get_language_from_request(request)
+        filtered = self.is_filtered()
         pages = self.get_query_set(request).order_by('tree_id', 'parent', 'lft').select_related()
         
+        GRANT_ALL = Page.permissions.GRANT_ALL
         perm_edit_ids = Page.permissions.get_change_id_list(request.user)
         perm_publish_ids = Page.permissions.get_publish_id_list(request.user)
         perm_softroot_ids = Page.permissions.get_softroot_id_list(request.user)
         perm_change_list_ids = Page.permissions.get_change_list_id_list(request.user)
         
-        if perm_edit_ids and perm_edit_ids != Page.permissions.GRANT_ALL:
+        if perm_edit_ids and perm_edit_ids != GRANT_ALL:
             #pages = pages.filter(pk__in=perm_edit_ids)
-            pages = pages.filter(pk__in=perm_change_list_ids)   
+            pages = pages.filter(perm_change_list_ids.get_q())
+        
+        if parent is not None:
+            pages = pages.filter(tree_id=parent.tree_id, lft__gt=parent.lft, rght__lt=parent.rght)
+        
+        levels = 1000
+        lazy = settings.CMS_TREE_LAZY_LEVELS and not filtered
+        if lazy:
+            levels = settings.CMS_TREE_LAZY_LEVELS
+            if perm_change_list_ids == GRANT_ALL:
+                # all roots are on the top level, so deeper pages aren't
+                # required at all
+                if parent is None:
+                    pages = pages.filter(level__lt=levels)
+                else:
+                    pages = pages.filter(level__lte=parent.level + levels)
         
         if settings.CMS_MODERATOR:
             # get oll ids of public models, so we can cahce them
             # TODO: add some filtering here, so the set is the same like page set...
-            published_public_page_id_set = Page.PublicModel.objects.filter(published=True).values_list('id', flat=True)
+            published_public_page_id_set = set(Page.PublicModel.objects.filter(published=True).values_list('id', flat=True))
         
-        ids = []
         root_pages = []
         pages = list(pages)
-        all_pages = pages[:]
+        index = index_children(pages)
         for page in pages:
-            children = []
-
             # note: We are using change_list permission here, because we must
             # display also pages which user must not edit, but he haves a 
             # permission for adding a child under this page. Otherwise he would
             # not be able to add anything under page which he can't change. 
-            if not page.parent_id or (perm_change_list_ids != Page.permissions.GRANT_ALL and not int(page.parent_id) in perm_change_list_ids):
+            if not page.parent_id or (perm_change_list_ids != GRANT_ALL and not perm_change_list_ids.contains_parent(page)):
                 page.root_node = True
             else:
                 page.root_node = False
-            ids.append(page.pk)
             
             if settings.CMS_PERMISSION:
                 # caching the permissions
-                page.permission_edit_cache = perm_edit_ids == Page.permissions.GRANT_ALL or page.pk in perm_edit_ids
-                page.permission_publish_cache = perm_publish_ids == Page.permissions.GRANT_ALL or page.pk in perm_publish_ids
-                page.permission_softroot_cache = perm_publish_ids == Page.permissions.GRANT_ALL or page.pk in perm_softroot_ids
+                page.permission_edit_cache = perm_edit_ids == GRANT_ALL or page in perm_edit_ids
+                page.permission_publish_cache = perm_publish_ids == GRANT_ALL or page in perm_publish_ids
+                page.permission_softroot_cache = perm_publish_ids == GRANT_ALL or page in perm_softroot_ids
                 page.permission_user_cache = request.user
             
             if settings.CMS_MODERATOR:
                 # set public instance existence state
                 page.public_published_cache = page.public_id in published_public_page_id_set
-                
-                
-            if page.root_node or self.is_filtered():
+            
+            if filtered:
                 page.last = True
-                if len(children):
-                    children[-1].last = False
                 page.menu_level = 0
+                page.ancestors_ascending = []
+                page.childrens = []
                 root_pages.append(page)
+            elif page.root_node and parent is None:
+                page.last = True
+                page.menu_level = 0
                 page.ancestors_ascending = []
-                if not self.is_filtered():
-                    find_children(page, pages, 1000, 1000, [], -1, soft_roots=False, request=request, no_extended=True, to_levels=1000)
+                mark_children(page, index, levels - 1, 1000, soft_roots=False, request=request, no_extended=True, to_levels=1000)
+                root_pages.append(page)
+        
+        if parent is not None and not filtered:
+            parent.ancestors_ascending = []
+            mark_children(parent, index, levels, 1000, soft_roots=False, request=request, no_extended=True, to_levels=1000)
+            root_pages = parent.childrens
+        
+        if lazy:
+            for page in pages:
+                if getattr(page, 'childrens', None):
+                    page.has_lazy_children = False
+                elif perm_change_list_ids == GRANT_ALL:
+                    # children under the last level weren't loaded at all
+                    page.has_lazy_children = page.rght - page.lft > 1
                 else:
-                    page.childrens = []
-        titles = Title.objects.filter(page__in=ids)
-        for page in all_pages:# add the title and slugs and some meta data
-            page.languages_cache = []
-            for title in titles:
-                if title.page_id == page.pk:
-                    if title.language == lang:
-                        page.title_cache = title
-                    if not title.language in page.languages_cache:
-                        page.languages_cache.append(title.language)
+                    # all pages from change list are loaded, but children
+                    # under the last level weren't attached; pages without
+                    # visible children must not get the toggle
+                    page.has_lazy_children = page.pk in index
+        
+        # add the title and slugs and some meta data
+        prefetch_titles(pages, lang)
         
         self.root_pages = root_pages
         
@@ -3,9 +3,10 @@ from cms.settings import CMS_FLAT_URLS
 from django.core.urlresolvers import RegexURLResolver, Resolver404, reverse
 from cms.utils.moderator import get_page_model
 
-def applications_page_check(request, current_page=None, path=None):
+def applications_page_check(request, current_page=None, path=None, routing=None):
     """Tries to find if given path was resolved over application. 
-    Applications have higher priority than other cms pages. 
+    Applications have higher priority than other cms pages. Page is taken
+    from routing table, if there is some.
     """
     if current_page:
         return current_page
@@ -15,8 +16,10 @@ def applications_page_check(request, current_page=None, path=None):
     try:
         page_id = dynamic_app_regex_url_resolver.resolve_page_id(path+"/")
         # yes, it is application page
-        PageModel = get_page_model(request)
-        page = PageModel.objects.get(id=page_id)
+        page = routing and routing.get_page(page_id) or None
+        if page is None:
+            PageModel = get_page_model(request)
+            page = PageModel.objects.get(id=page_id)
         # If current page was matched, then we have some override for content
         # from cms, but keep current page. Otherwise return page to which was application assigned.
         return page 
@@ -0,0 +1,176 @@
+import time
+from django.core.cache import cache
+from cms import settings
+from cms.utils.page import get_page_ancestors
+
+# Skeleton is a compact, model independent snapshot of all pages on the site
+# and their titles in one language. It is shared by all navigation template
+# tags, so they don't need to hit the database on every request. Every tag
+# call gets fresh page instances built from the skeleton, which can be safely
+# marked (selected, ancestor, sibling, ...) for the current request.
+
+# fields stored for every page / title, as used in values_list
+PAGE_FIELDS = ('id', 'parent', 'tree_id', 'lft', 'rght', 'level', 'soft_root',
+    'in_navigation', 'navigation_extenders', 'reverse_id', 'published',
+    'login_required', 'template')
+TITLE_FIELDS = ('page', 'language', 'title', 'menu_title', 'slug', 'path',
+    'has_url_overwrite', 'redirect', 'application_urls')
+
+VERSION_KEY = "CMS::Navigation::version"
+
+get_cache_key = lambda model, site_id, language: "CMS::Navigation::%s::%s::%s::%s" % (
+    get_navigation_version(), model._meta.db_table, site_id, language)
+
+def get_navigation_version():
+    """Returns current version of navigation cache. Version is a part of every
+    skeleton key, so skeletons of older versions are never read again.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # version must not start from the same number after it gets lost,
+        # otherwise some outdated skeleton might be still there
+        cache.add(VERSION_KEY, int(time.time()))
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+def clear_navigation_cache():
+    """Invalidates skeletons of all sites and languages in all processes.
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time()))
+
+def build_skeleton(PageModel, TitleModel, site, language):
+    """Loads skeleton from database - takes 3 queries.
+    """
+    pages = PageModel.objects.filter(site=site).order_by('tree_id', 'lft')
+    published = PageModel.objects.published().filter(site=site)
+    titles = TitleModel.objects.filter(page__site=site, language=language)
+    return {
+        'pages': list(pages.values_list(*PAGE_FIELDS)),
+        'published': set(published.values_list('id', flat=True)),
+        'titles': dict([(row[0], row) for row in titles.values_list(*TITLE_FIELDS)]),
+    }
+
+def get_skeleton(request, PageModel, TitleModel, site, language):
+    """Returns skeleton from request, cache or database. Skeleton is cached for
+    CMS_CONTENT_CACHE_DURATION, so time based publishing still works.
+    """
+    key = get_cache_key(PageModel, site.pk, language)
+    skeletons = getattr(request, '_navigation_skeleton_cache', None)
+    if skeletons is None:
+        skeletons = request._navigation_skeleton_cache = {}
+    if key in skeletons:
+        return skeletons[key]
+    skeleton = cache.get(key)
+    if skeleton is None:
+        skeleton = build_skeleton(PageModel, TitleModel, site, language)
+        cache.set(key, skeleton, settings.CMS_CONTENT_CACHE_DURATION)
+    skeletons[key] = skeleton
+    return skeleton
+
+
+class NavigationPages(object):
+    """Fresh page instances created on demand from the skeleton. Instances
+    created by one NavigationPages are shared, so don't use one object for
+    two independent trees.
+    """
+    def __init__(self, PageModel, TitleModel, site, skeleton):
+        self.PageModel = PageModel
+        self.TitleModel = TitleModel
+        self.site = site
+        self.rows = skeleton['pages']
+        self.published = skeleton['published']
+        self.titles = skeleton['titles']
+        self.rows_by_id = dict([(row[0], row) for row in self.rows])
+        self.instances = {}
+        self.page_attnames = [PageModel._meta.get_field(name).attname for name in PAGE_FIELDS]
+        self.title_attnames = [TitleModel._meta.get_field(name).attname for name in TITLE_FIELDS]
+
+    def page(self, pk):
+        """Returns page instance, or None if page isn't on this site.
+        """
+        if pk in self.instances:
+            return self.instances[pk]
+        row = self.rows_by_id.get(pk)
+        if row is None:
+            return None
+        page = self.PageModel(**dict(zip(self.page_attnames, row)))
+        page.site_id = self.site.pk
+        title = self.title(pk)
+        if title:
+            page.title_cache = title
+        self.instances[pk] = page
+        return page
+
+    def title(self, pk):
+        """Returns new title instance for page with given pk, or None if page
+        isn't translated.
+        """
+        row = self.titles.get(pk)
+        if row is None:
+            return None
+        return self.TitleModel(**dict(zip(self.title_attnames, row)))
+
+    def ancestors(self, page):
+        """Returns ancestors of given page, root first - like get_ancestors.
+        """
+        ancestors = []
+        parent_id = page.parent_id
+        while parent_id:
+            row = self.rows_by_id.get(parent_id)
+            if row is None:
+                # parent is on another site
+                return list(get_page_ancestors(page))
+            ancestors.append(self.page(parent_id))
+            parent_id = row[1]
+        ancestors.reverse()
+        return ancestors
+
+    def in_navigation(self, root=None, max_level=None, translated=False, extenders=False):
+        """Returns published pages which are in navigation, ordered by tree_id
+        and lft.
+
+        Args:
+            - root: take only descendants of root
+            - max_level: take only pages with level lower or equal
+            - translated: take only pages with title in current language
+            - extenders: take only pages with navigation extenders
+        """
+        pages = []
+        for row in self.rows:
+            pk, parent_id, tree_id, lft, rght, level, soft_root, in_navigation, navigation_extenders = row[:9]
+            if not in_navigation or not pk in self.published:
+                continue
+            if root is not None and (tree_id != root.tree_id or lft <= root.lft or rght >= root.rght):
+                continue
+            if max_level is not None and level > max_level:
+                continue
+            if translated and not pk in self.titles:
+                continue
+            if extenders and not navigation_extenders:
+                continue
+            pages.append(self.page(pk))
+        return pages
+
+    def get_by_reverse_id(self, reverse_id):
+        for row in self.rows:
+            if row[9] == reverse_id:
+                return self.page(row[0])
+        return None
+
+    def home(self):
+        """Returns first published page, same like PageManager.get_home.
+        """
+        for row in self.rows:
+            if row[0] in self.published:
+                return self.page(row[0])
+        return None
+
+
+def get_navigation_pages(request, PageModel, TitleModel, site, language):
+    """Returns NavigationPages for given site and language.
+    """
+    skeleton = get_skeleton(request, PageModel, TitleModel, site, language)
+    return NavigationPages(PageModel, TitleModel, site, skeleton)
@@ -1,40 +1,90 @@
+import time
+from array import array
 from django.core.cache import cache
+from cms.utils.intervals import PageIntervalSet
 
-# Time to live for cache entry 10 minutes, so it gets cleaned if we don't catch 
+# Time to live for cache entry 10 minutes, so it gets cleaned if we don't catch
 # something - don't make higher; groups may be problematic because of no signals
 # when adding / removing from group
-TTL = 600  
+TTL = 600
 
-permission_cache_keys = [] 
-all_keys = []
+# Permissions are invalidated by incrementing the global version, or the
+# version of the user. Both are a part of every permission key, so entries of
+# older versions are never read again in any process and just expire.
+VERSION_KEY = "Admin::Permission::version"
 
-get_cache_key = lambda user, key: "Admin::Permission::%s::%s" % (user.username, key)
+get_user_version_key = lambda user: "Admin::Permission::version::%s" % user.username
+
+get_cache_key = lambda versions, user, key: "Admin::Permission::%s::%s::%s::%s" % (
+    versions[0], versions[1], user.username, key)
+
+def _new_version(version_key):
+    # version must not start from the same number after it gets lost,
+    # otherwise some outdated entry might be still there
+    cache.add(version_key, int(time.time()))
+    return cache.get(version_key, 0)
+
+def get_versions(user):
+    """Returns global version and version of user, in one cache round trip.
+    """
+    user_version_key = get_user_version_key(user)
+    versions = cache.get_many([VERSION_KEY, user_version_key])
+    version = versions.get(VERSION_KEY)
+    if version is None:
+        version = _new_version(VERSION_KEY)
+    user_version = versions.get(user_version_key)
+    if user_version is None:
+        user_version = _new_version(user_version_key)
+    return version, user_version
+
+def _increment_version(version_key):
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, int(time.time()))
+
+def encode_page_set(page_set):
+    """Packs intervals of PageIntervalSet into string of 32bit integers, five
+    per interval, max_level None is stored as -1.
+    """
+    values = array('i')
+    for tree_id, lft, rght, min_level, max_level in page_set.intervals:
+        if max_level is None:
+            max_level = -1
+        values.extend((tree_id, lft, rght, min_level, max_level))
+    return values.tostring()
+
+def decode_page_set(data):
+    values = array('i')
+    values.fromstring(data)
+    intervals = []
+    for i in xrange(0, len(values), 5):
+        tree_id, lft, rght, min_level, max_level = values[i:i + 5]
+        if max_level == -1:
+            max_level = None
+        intervals.append((tree_id, lft, rght, min_level, max_level))
+    return PageIntervalSet(intervals)
 
 def get_permission_cache(user, key):
-    """Helper for reading values from cache
+    """Helper for reading PageIntervalSet of user from cache
     """
-    return cache.get(get_cache_key(user, key))
+    data = cache.get(get_cache_key(get_versions(user), user, key))
+    if data is None:
+        return None
+    return decode_page_set(data)
 
 def set_permission_cache(user, key, value):
-    """Helper method for storing values in cache. Stores used keys so 
-    all of them can be cleaned when clean_permission_cache gets called.
+    """Helper method for storing PageIntervalSet of user in cache.
     """
-    # store this key, so we can clean it when required
-    cache_key = get_cache_key(user, key)
-    
-    if not cache_key in all_keys:
-        all_keys.append(cache_key)        
-    if not key in permission_cache_keys:
-        permission_cache_keys.append(key)
-    cache.set(cache_key, value, TTL)
-    
+    cache.set(get_cache_key(get_versions(user), user, key), encode_page_set(value), TTL)
+
 
 def clear_user_permission_cache(user):
-    """Cleans permission cache for given user.
+    """Cleans permission cache for given user in all processes.
     """
-    for key in permission_cache_keys:
-        cache.delete(get_cache_key(user, key)) 
+    _increment_version(get_user_version_key(user))
 
 def clear_permission_cache():
-    for key in all_keys:
-        cache.delete(key)
\ No newline at end of file
+    """Cleans permission cache of all users in all processes.
+    """
+    _increment_version(VERSION_KEY)
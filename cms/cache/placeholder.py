@@ -0,0 +1,69 @@
+import time
+from django.core.cache import cache
+from cms import settings
+
+# Rendered placeholders are stored under keys containing two versions - one
+# for the whole page and one for the placeholder in given language. Changing
+# a plugin bumps placeholder version, publishing bumps page version, so old
+# entries are never read again and expire by themselves.
+
+get_page_version_key = lambda page_id, public: "CMS::Placeholder::version::%s::%s" % (public and "public" or "draft", page_id)
+
+get_placeholder_version_key = lambda page_id, name, language, public: "CMS::Placeholder::version::%s::%s::%s::%s" % (
+    public and "public" or "draft", page_id, name.lower(), language)
+
+def is_public(obj):
+    """Says if instance is from public (published) model.
+    """
+    return hasattr(obj, '_is_public_model')
+
+def placeholder_cache_enabled(name):
+    """Rendering cache must be enabled by CMS_PLACEHOLDER_CACHE and can be
+    turned off for placeholders with request dependent plugins by "cache":
+    False in CMS_PLACEHOLDER_CONF.
+    """
+    if not settings.CMS_PLACEHOLDER_CACHE:
+        return False
+    if settings.CMS_PLACEHOLDER_CONF and name in settings.CMS_PLACEHOLDER_CONF:
+        return settings.CMS_PLACEHOLDER_CONF[name].get("cache", True)
+    return True
+
+def _get_versions(*keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if versions.get(key) is None:
+            # start from time, so versions are unique even if cache was flushed
+            cache.add(key, int(time.time()))
+            versions[key] = cache.get(key, 0)
+    return [versions[key] for key in keys]
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()))
+
+def get_cache_key(page, name, language):
+    public = is_public(page)
+    versions = _get_versions(get_page_version_key(page.pk, public),
+        get_placeholder_version_key(page.pk, name, language, public))
+    return "CMS::Placeholder::%s::%s::%s::%s::%s::%s" % (
+        public and "public" or "draft", page.pk, name.lower(), language, versions[0], versions[1])
+
+def get_placeholder_cache(page, name, language):
+    """Returns rendered placeholder content or None.
+    """
+    return cache.get(get_cache_key(page, name, language))
+
+def set_placeholder_cache(page, name, language, content):
+    cache.set(get_cache_key(page, name, language), content, settings.CMS_CONTENT_CACHE_DURATION)
+
+def clear_placeholder_cache(plugin):
+    """Invalidates rendered placeholder containing given plugin.
+    """
+    _bump_version(get_placeholder_version_key(plugin.page_id, plugin.placeholder, plugin.language, is_public(plugin)))
+
+def clear_page_placeholder_cache(page_id, public):
+    """Invalidates all placeholders of given page.
+    """
+    _bump_version(get_page_version_key(page_id, public))
@@ -0,0 +1,138 @@
+import time
+from django.core.cache import cache
+from cms import settings
+
+# Routing table maps paths of published pages to page rows, so details view
+# can find current page without database. Tables are built lazily and held in
+# memory of every process, the version counter stored in cache tells them
+# when they are outdated. Tables older than CMS_CONTENT_CACHE_DURATION are
+# rebuilt too, so time based publishing still works.
+
+VERSION_KEY = "CMS::Routing::version"
+
+# process local tables, keyed by page model table and site id
+_tables = {}
+
+def get_routing_version():
+    """Returns current version of routing tables, or None if cache doesn't
+    keep values (dummy backend) - routing tables can't be used then.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, int(time.time()))
+        version = cache.get(VERSION_KEY)
+    return version
+
+def clear_routing_cache():
+    """Invalidates routing tables in all processes.
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, int(time.time()))
+
+
+class RoutingTable(object):
+    """Published pages of one site and their titles in all languages.
+    """
+    def __init__(self, PageModel, TitleModel, site, version):
+        self.PageModel = PageModel
+        self.TitleModel = TitleModel
+        self.version = version
+        self.created = time.time()
+        self.page_fields = [f.name for f in PageModel._meta.fields]
+        self.page_attnames = [f.attname for f in PageModel._meta.fields]
+        self.title_fields = [f.name for f in TitleModel._meta.fields]
+        self.title_attnames = [f.attname for f in TitleModel._meta.fields]
+
+        pages = PageModel.objects.published().filter(site=site).order_by('tree_id', 'lft')
+        self.rows = {}
+        self.roots = []
+        order = {}
+        for row in pages.values_list(*self.page_fields):
+            page = dict(zip(self.page_attnames, row))
+            self.rows[page['id']] = row
+            order[page['id']] = len(order)
+            if page['parent_id'] is None:
+                self.roots.append(page['id'])
+
+        self.titles = {}
+        self.languages = {}
+        self.paths = {}
+        self.slugs = {}
+        titles = TitleModel.objects.filter(page__site=site).order_by('id')
+        for row in titles.values_list(*self.title_fields):
+            title = dict(zip(self.title_attnames, row))
+            page_id = title['page_id']
+            if not page_id in self.rows:
+                continue
+            self.titles.setdefault(page_id, {})[title['language']] = row
+            self.languages.setdefault(page_id, []).append(title['language'])
+            self.paths.setdefault(title['path'], []).append(page_id)
+            self.slugs.setdefault((title['slug'], title['language']), []).append(page_id)
+        # first page in tree order wins, same like the query in details did
+        for ids in self.paths.values() + self.slugs.values():
+            ids.sort(key=order.get)
+
+    def expired(self):
+        return time.time() - self.created > settings.CMS_CONTENT_CACHE_DURATION
+
+    def get_page(self, pk, language=None):
+        """Returns new page instance, or None if page isn't published on this
+        site. Title in given language is preloaded.
+        """
+        try:
+            row = self.rows.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+        page = self.PageModel(**dict(zip(self.page_attnames, row)))
+        titles = self.titles.get(page.pk, {})
+        page.languages_cache = list(self.languages.get(page.pk, []))
+        if language in titles:
+            page.title_cache = self.TitleModel(**dict(zip(self.title_attnames, titles[language])))
+        return page
+
+    def get_root_page(self, language=None):
+        if not self.roots:
+            return None
+        return self.get_page(self.roots[0], language)
+
+    def get_current_page(self, path, lang):
+        """Same like cms.views._get_current_page, returns (Page, None) or
+        (None, path_to_alternative language).
+        """
+        if settings.CMS_FLAT_URLS:
+            ids = self.slugs.get((path, lang))
+            if ids:
+                return self.get_page(ids[0], lang), None
+            return None, None
+        ids = self.paths.get(path)
+        if not ids:
+            return None, None
+        page = self.get_page(ids[0], lang)
+        langs = page.languages_cache
+        if lang in langs:
+            return page, None
+        path = None
+        for alt_lang in settings.LANGUAGES:
+            if alt_lang[0] in langs:
+                path = '/%s%s' % (alt_lang[0][:2], page.get_absolute_url(language=lang, fallback=True))
+        return None, path
+
+
+def get_routing_table(PageModel, TitleModel, site):
+    """Returns up to date routing table for given site, or None if routing
+    tables are disabled.
+    """
+    if not settings.CMS_ROUTING_CACHE:
+        return None
+    version = get_routing_version()
+    if version is None:
+        return None
+    key = (PageModel._meta.db_table, site.pk)
+    table = _tables.get(key)
+    if table is None or table.version != version or table.expired():
+        table = _tables[key] = RoutingTable(PageModel, TitleModel, site, version)
+    return table
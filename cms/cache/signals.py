@@ -1,9 +1,12 @@
 from django.db.models import signals
 from django.contrib.auth.models import User, Group
 from cms import settings
-from cms.models import PagePermission, GlobalPagePermission, Page
+from cms.models import PagePermission, GlobalPagePermission, Page, Title, CMSPlugin
 from cms.cache.permissions import clear_user_permission_cache,\
     clear_permission_cache
+from cms.cache.navigation import clear_navigation_cache
+from cms.cache.routing import clear_routing_cache
+from cms.cache.placeholder import clear_placeholder_cache, clear_page_placeholder_cache
 from cms.models import signals as cms_signals
 
 def pre_save_user(instance, raw, **kwargs):
@@ -40,6 +43,12 @@ def pre_delete_globalpagepermission(instance, **kwargs):
 def pre_save_delete_page(instance, **kwargs):
     clear_permission_cache()
 
+def post_save_delete_page(instance, **kwargs):
+    # permissions are kept as intervals of the page tree, so they must be
+    # cleared also after mptt has shifted lft / rght of the other pages,
+    # otherwise intervals read in the meantime would stay in cache
+    clear_permission_cache()
+
 
 if settings.CMS_PERMISSION:
     # TODO: will this work also with PageUser and PageGroup??
@@ -56,4 +65,55 @@ if settings.CMS_PERMISSION:
     signals.pre_delete.connect(pre_delete_globalpagepermission, sender=GlobalPagePermission)
     
     signals.pre_save.connect(pre_save_delete_page, sender=Page)
-    signals.pre_delete.connect(pre_save_delete_page, sender=Page)
\ No newline at end of file
+    signals.pre_delete.connect(pre_save_delete_page, sender=Page)
+    signals.post_save.connect(post_save_delete_page, sender=Page)
+    signals.post_delete.connect(post_save_delete_page, sender=Page)
+    cms_signals.page_moved.connect(post_save_delete_page, sender=Page)
+
+
+def post_save_delete_navigation(sender, **kwargs):
+    # public models are created by publisher later, so they can't be used as
+    # signal senders here
+    if sender in (Page, Title, Page.PublicModel, Title.PublicModel):
+        clear_navigation_cache()
+
+def post_publish_navigation(instance, **kwargs):
+    clear_navigation_cache()
+
+
+signals.post_save.connect(post_save_delete_navigation)
+signals.post_delete.connect(post_save_delete_navigation)
+cms_signals.post_publish.connect(post_publish_navigation, sender=Page)
+cms_signals.page_moved.connect(post_publish_navigation, sender=Page)
+
+
+def post_save_delete_routing(sender, **kwargs):
+    if sender in (Page, Title, Page.PublicModel, Title.PublicModel):
+        clear_routing_cache()
+
+def post_publish_routing(instance, **kwargs):
+    clear_routing_cache()
+
+
+if settings.CMS_ROUTING_CACHE:
+    signals.post_save.connect(post_save_delete_routing)
+    signals.post_delete.connect(post_save_delete_routing)
+    cms_signals.post_publish.connect(post_publish_routing, sender=Page)
+    cms_signals.page_moved.connect(post_publish_routing, sender=Page)
+
+
+def post_save_delete_plugin(sender, instance, **kwargs):
+    # catches also all plugin subclasses and public models
+    if isinstance(instance, CMSPlugin) or isinstance(instance, CMSPlugin.PublicModel):
+        clear_placeholder_cache(instance)
+
+def post_publish_placeholder(instance, **kwargs):
+    clear_page_placeholder_cache(instance.pk, False)
+    if instance.public_id:
+        clear_page_placeholder_cache(instance.public_id, True)
+
+
+if settings.CMS_PLACEHOLDER_CACHE:
+    signals.post_save.connect(post_save_delete_plugin)
+    signals.post_delete.connect(post_save_delete_plugin)
+    cms_signals.post_publish.connect(post_publish_placeholder, sender=Page)
@@ -86,6 +86,19 @@ function initTree(){
 			onchange: function(node, tree){
 				var url = $(node).find('a.title').attr("href")
 				self.location = url;
+			},
+			onopen: function(node, tree){
+				// children of pages on the last level loaded with the tree
+				// (CMS_TREE_LAZY_LEVELS) get loaded when page is opened
+				var list = $(node).children('ul.lazy');
+				if (!list.length) return;
+				list.removeClass('lazy');
+				var pageId = node.id.split("page_")[1];
+				$.get("/admin/cms/page/" + pageId + "/subtree/", function(response){
+					list.html(response);
+					list.find("li:last-child").addClass("last").end().find("li:has(ul)").not(".open").addClass("closed");
+					list.find("li").not(".open").not(".closed").addClass("leaf");
+				});
 			}
 		}
 	};
@@ -14,6 +14,7 @@ from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from publisher import Publisher, Mptt
+from publisher.base import publish_counter
 from publisher.errors import MpttCantPublish
 from cms.utils.urlutils import urljoin
 from django.template.context import Context
@@ -303,10 +304,9 @@ class Page(Publisher, Mptt):
         """
         get the list of all existing languages for this page
         """
-        titles = Title.objects.filter(page=self)
         if not hasattr(self, "languages_cache"):
             languages = []
-            for t in titles:
+            for t in Title.objects.filter(page=self):
                 if t.language not in languages:
                     languages.append(t.language)
             self.languages_cache = languages
@@ -438,8 +438,23 @@ class Page(Publisher, Mptt):
                         if obj.__class__ == Title:
                             if obj.page_id == self.pk:
                                 self.title_cache = obj
+            elif hasattr(self, "all_titles_cache") and not force_reload:
+                # prefetched by cms.utils.page.prefetch_titles
+                self.title_cache = self._get_prefetched_title(language, fallback)
             else:
                 self.title_cache = Title.objects.get_title(self, language, language_fallback=fallback)
+    
+    def _get_prefetched_title(self, language, fallback):
+        """Same like TitleManager.get_title, but works with all_titles_cache.
+        """
+        title = self.all_titles_cache.get(language)
+        if title is None:
+            if not fallback:
+                raise Title.DoesNotExist
+            titles = self.all_titles_cache.values()
+            if titles:
+                title = max(titles, key=lambda t: t.creation_date)
+        return title
                 
     def get_template(self):
         """
@@ -527,7 +542,7 @@ class Page(Publisher, Mptt):
             
             from cms.utils.permissions import has_generic_permission
             self.permission_user_cache = request.user
-            setattr(self, att_name, has_generic_permission(self.id, request.user, type))
+            setattr(self, att_name, has_generic_permission(self, request.user, type))
             if getattr(self, att_name):
                 self.permission_edit_cache = True
         return getattr(self, att_name)
@@ -599,6 +614,14 @@ class Page(Publisher, Mptt):
         
         Returns: True if page was successfully published.
         """
+        # children published here belong to the same top level publish
+        publish_counter.start()
+        try:
+            return self._publish_page(fields, exclude)
+        finally:
+            publish_counter.stop()
+    
+    def _publish_page(self, fields, exclude):
         # clean moderation log
         self.pagemoderatorstate_set.all().delete()
         
@@ -622,25 +645,7 @@ class Page(Publisher, Mptt):
                 if self.lft != public.lft or self.rght != public.rght or self.level != public.level:#moved in tree
                     dirty = True
                 if dirty or len(tree_ids) == 2:
-                    pages = list(Page.objects.filter(tree_id__in=tree_ids).order_by("tree_id", "level", "lft"))
-                    fields = []
-                    names = ["lft","rght","tree_id", "level", "parent", "created_by", "changed_by", "site"]
-                    for field in self._meta.fields:
-                        if field.name in names:
-                            fields.append(field)
-                    ids = []
-                    for page in pages:
-                        if page.pk != self.pk:
-                            page.publish(fields=fields)
-                            ids.append(page.pk)
-                    titles = Title.objects.filter(page__in=ids)
-                    title_fields = []
-                    names = ["path"]
-                    for field in Title._meta.fields:
-                        if field.name in names:
-                            title_fields.append(field)
-                    for title in titles:
-                        title.publish(fields=title_fields)
+                    self.publish_tree_structure(tree_ids)
             else:
                 pass
                 #print "no public found"            
@@ -663,6 +668,56 @@ class Page(Publisher, Mptt):
         # fire signal after publishing is done
         return published
     
+    def publish_tree_structure(self, tree_ids):
+        """Copies tree structure (and title paths) of all other pages in given
+        trees to their public versions, with two UPDATE queries. Used when
+        page moves, so public tree stays consistent. Only pages which were
+        already published are updated, their content isn't published.
+        """
+        from django.db import connection, transaction
+        qn = connection.ops.quote_name
+        
+        column = lambda model, name: qn(model._meta.get_field(name).column)
+        draft, public = Page, Page.PublicModel
+        params = {
+            'draft': qn(draft._meta.db_table),
+            'public': qn(public._meta.db_table),
+            'pk': qn(public._meta.pk.column),
+            'public_id': column(draft, 'public'),
+            'parent_id': column(draft, 'parent'),
+            'tree_id': column(draft, 'tree_id'),
+            'trees': ", ".join(["%s"] * len(tree_ids)),
+        }
+        copy = ", ".join(["%(col)s = (SELECT d.%(col)s FROM %(draft)s d WHERE d.%(public_id)s = %(public)s.%(pk)s)" % \
+            dict(params, col=column(draft, name)) for name in ("lft", "rght", "tree_id", "level", "created_by", "changed_by", "site")])
+        cursor = connection.cursor()
+        cursor.execute("""
+            UPDATE %(public)s SET %(copy)s,
+                %(parent_id)s = (SELECT p.%(public_id)s FROM %(draft)s d
+                    LEFT JOIN %(draft)s p ON p.%(pk)s = d.%(parent_id)s
+                    WHERE d.%(public_id)s = %(public)s.%(pk)s)
+            WHERE %(pk)s IN (SELECT %(public_id)s FROM %(draft)s
+                WHERE %(tree_id)s IN (%(trees)s) AND %(pk)s != %%s AND %(public_id)s IS NOT NULL)
+        """ % dict(params, copy=copy), list(tree_ids) + [self.pk])
+        
+        draft, public = Title, Title.PublicModel
+        params.update({
+            'draft_title': qn(draft._meta.db_table),
+            'public_title': qn(public._meta.db_table),
+            'title_pk': qn(public._meta.pk.column),
+            'title_public_id': column(draft, 'public'),
+            'page_id': column(draft, 'page'),
+            'path': column(draft, 'path'),
+        })
+        cursor.execute("""
+            UPDATE %(public_title)s SET %(path)s = (SELECT t.%(path)s FROM %(draft_title)s t
+                WHERE t.%(title_public_id)s = %(public_title)s.%(title_pk)s)
+            WHERE %(title_pk)s IN (SELECT t.%(title_public_id)s FROM %(draft_title)s t
+                INNER JOIN %(draft)s p ON p.%(pk)s = t.%(page_id)s
+                WHERE p.%(tree_id)s IN (%(trees)s) AND p.%(pk)s != %%s AND t.%(title_public_id)s IS NOT NULL)
+        """ % params, list(tree_ids) + [self.pk])
+        transaction.commit_unless_managed()
+    
     def is_public_published(self):
         """Returns true if public model is published.
         """
@@ -799,7 +854,10 @@ class CMSPlugin(Publisher, Mptt):
         from cms.plugin_pool import plugin_pool
         plugin_class = plugin_pool.get_plugin(self.plugin_type)
         plugin = plugin_class(plugin_class.model, admin)# needed so we have the same signature as the original ModelAdmin
-        if plugin.model != self.__class__: # and self.__class__ == CMSPlugin:
+        if hasattr(self, '_plugin_instance_cache'):
+            # loaded by cms.utils.plugins.downcast_plugins
+            instance = self._plugin_instance_cache
+        elif plugin.model != self.__class__: # and self.__class__ == CMSPlugin:
             # (if self is actually a subclass, getattr below would break)
             try:
                 if hasattr(self, '_is_public_model'):
@@ -5,8 +5,8 @@ from django.db.models import Q
 from cms import settings
 from cms.utils.urlutils import levelize_path
 from cms.exceptions import NoPermissionsException
-from sets import Set
 from cms.cache.permissions import get_permission_cache, set_permission_cache
+from cms.utils.intervals import PageIntervalSet
 
 class PageManager(models.Manager):
     def on_site(self):
@@ -257,12 +257,12 @@ class PagePermissionManager(BasicPagePermissionManager):
             return self.get_empty_query_set()
         
         # get all permissions
-        page_id_allow_list = Page.permissions.get_change_permissions_id_list(user)
+        page_allow_set = Page.permissions.get_change_permissions_id_list(user)
         
         # get permission set, but without objects targeting user, or any group 
         # in which he can be
         qs = self.filter(
-            page__id__in=page_id_allow_list, 
+            page_allow_set.get_q('page__'), 
             page__level__gte=user_level,
         )
         qs = qs.exclude(user=user).exclude(group__user=user)
@@ -293,6 +293,10 @@ class PagePermissionsPermissionManager(models.Manager):
     this will be better approach. Accessible under permissions.
     
     Maybe this even shouldn't be a manager - it mixes different models together.
+    
+    The get_*_id_list methods return PageIntervalSet, which can be tested
+    with `page in page_set` or used for filtering with page_set.get_q(), or
+    GRANT_ALL.
     """
     
     # we will return this in case we have a superuser, or permissions are not
@@ -352,37 +356,30 @@ class PagePermissionsPermissionManager(models.Manager):
         installed, nobody can moderate. 
         """        
         if not settings.CMS_MODERATOR:
-            return []
+            return PageIntervalSet()
         return self.__get_id_list(user, "can_moderate")
     
     
     def get_change_list_id_list(self, user):
-        """This is used just in admin now. Gives all ids where user haves can_edit
-        and can_add merged together.
-        
-        There is for sure a better way how to do this over sql, need to be 
-        optimized...
+        """This is used just in admin now. Gives all pages where user haves
+        can_edit and can_add merged together.
         """
         can_change = self.get_change_id_list(user)
         can_add = self.get_add_id_list(user)
-        if can_change is can_add:
-            # GRANT_ALL case
-            page_id_list = can_change
-        else:
-            permission_set = filter(lambda i: not i is PagePermissionsPermissionManager.GRANT_ALL, [can_change, can_add])   
-            if len(permission_set) is 1:
-                page_id_list = permission_set[0]
-            else:
-                page_id_list = list(Set(can_change).union(Set(can_add)))
-        return page_id_list
+        if can_change is PagePermissionsPermissionManager.GRANT_ALL:
+            return can_change
+        if can_add is PagePermissionsPermissionManager.GRANT_ALL:
+            return can_add
+        return can_change | can_add
         
     
     def __get_id_list(self, user, attr):
-        # TODO: result of this method should be cached per user, and cache should
-        # be cleaned after some change in permissions / globalpermission
-        
+        """Returns PageIntervalSet of pages on which user haves permission
+        attr, or GRANT_ALL. Each page permission is one interval of the page
+        tree, so pages don't have to be listed one by one.
+        """
         if not user.is_authenticated() or not user.is_staff:
-            return []
+            return PageIntervalSet()
         
         if user.is_superuser or not settings.CMS_PERMISSION:
             # got superuser, or permissions aren't enabled? just return grant 
@@ -405,24 +402,31 @@ class PagePermissionsPermissionManager(models.Manager):
         
         # for standard users without global permissions, get all pages for him or
         # his group/s
-        qs = PagePermission.objects.with_user(user)
-        qs.order_by('page__tree_id', 'page__level', 'page__lft')
+        qs = PagePermission.objects.with_user(user).filter(**{attr: True}).select_related('page')
         
         # default is denny...
-        page_id_allow_list = []
+        intervals = []
         for permission in qs:
-            is_allowed = getattr(permission, attr)
-            if is_allowed:
-                # can add is special - we are actually adding page under current page
-                if permission.grant_on & MASK_PAGE or attr is "can_add":
-                    page_id_allow_list.append(permission.page.id)
-                if permission.grant_on & MASK_CHILDREN:
-                    page_id_allow_list.extend(permission.page.get_children().values_list('id', flat=True))
-                elif permission.grant_on & MASK_DESCENDANTS:
-                    page_id_allow_list.extend(permission.page.get_descendants().values_list('id', flat=True))
+            page = permission.page
+            # can add is special - we are actually adding page under current page
+            with_page = permission.grant_on & MASK_PAGE or attr == "can_add"
+            if permission.grant_on & MASK_CHILDREN:
+                max_level = page.level + 1
+            elif permission.grant_on & MASK_DESCENDANTS:
+                max_level = None
+            elif with_page:
+                max_level = page.level
+            else:
+                continue
+            if with_page:
+                min_level = page.level
+            else:
+                min_level = page.level + 1
+            intervals.append((page.tree_id, page.lft, page.rght, min_level, max_level))
+        page_set = PageIntervalSet(intervals)
         # store value in cache
-        set_permission_cache(user, attr, page_id_allow_list)
-        return page_id_allow_list
+        set_permission_cache(user, attr, page_set)
+        return page_set
 
 
 class PageModeratorStateManager(models.Manager):
@@ -19,6 +19,7 @@ if CMS_TEMPLATES is None:
 #    'placeholder1': {
 #        "plugins": ('plugin1', 'plugin2'),
 #        "extra_context": {},
+#        "cache": False, # don't cache rendered placeholder, see CMS_PLACEHOLDER_CACHE
 #    },
 #    'placeholder2': {
 #        "plugins": ('plugin1', 'plugin3'),
@@ -77,6 +78,11 @@ CMS_FLAT_URLS = getattr(settings, 'CMS_FLAT_URLS', False)
 # Wheter the cms has a softroot functionionality
 CMS_SOFTROOT = getattr(settings, 'CMS_SOFTROOT', False)
 
+# Number of levels of the admin page tree loaded with the change list. Deeper
+# pages get loaded over ajax when their parent gets opened. None loads the
+# whole tree at once.
+CMS_TREE_LAZY_LEVELS = getattr(settings, 'CMS_TREE_LAZY_LEVELS', None)
+
 #Hide untranslated Pages
 CMS_HIDE_UNTRANSLATED = getattr(settings, 'CMS_HIDE_UNTRANSLATED', True)
 
@@ -93,6 +99,17 @@ CMS_DEFAULT_LANGUAGE = getattr(settings, 'CMS_DEFAULT_LANGUAGE', settings.LANGUA
 # Defines how long page content should be cached, including navigation and admin menu.
 CMS_CONTENT_CACHE_DURATION = getattr(settings, 'CMS_CONTENT_CACHE_DURATION', 60)
 
+# Cache rendered placeholders. Cache gets cleaned when some plugin in the
+# placeholder changes, but not when plugin depends on request or on other
+# models - use "cache": False in CMS_PLACEHOLDER_CONF for such placeholders.
+CMS_PLACEHOLDER_CACHE = getattr(settings, 'CMS_PLACEHOLDER_CACHE', False)
+
+# Keep in memory table of published pages, so pages can be found by path
+# without database queries. Tables are invalidated over the cache, so enable
+# it only with a cache backend shared by all processes (e.g. memcached) -
+# with locmem other processes would serve outdated pages.
+CMS_ROUTING_CACHE = getattr(settings, 'CMS_ROUTING_CACHE', False)
+
 # The id of default Site instance to be used for multisite purposes.
 SITE_ID = getattr(settings, 'SITE_ID', 1)
 DEBUG = getattr(settings, 'DEBUG', False)
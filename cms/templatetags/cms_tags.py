@@ -2,7 +2,12 @@ from django import template
 from django.core.cache import cache
 from cms import settings
 from cms.utils import get_language_from_request,\
-    get_extended_navigation_nodes, find_children, cut_levels, find_selected
+    get_extended_navigation_nodes, cut_levels, find_selected
+from cms.utils.navigation import index_children, mark_children
+from cms.utils.plugins import downcast_plugins
+from cms.cache.navigation import get_navigation_pages
+from cms.cache.placeholder import placeholder_cache_enabled, get_placeholder_cache,\
+    set_placeholder_cache
 from django.core.mail import send_mail
 from django.contrib.sites.models import Site
 from django.utils.safestring import mark_safe
@@ -26,29 +31,25 @@ def show_menu(context, from_level=0, to_level=100, extra_inactive=0, extra_activ
     lang = get_language_from_request(request)
     current_page = request.current_page
     
-    if not next_page: #new menu... get all the data so we can save a lot of queries
-        ids = []
+    if not next_page: #new menu... get all the data from the navigation skeleton, so we can save a lot of queries
+        nav = get_navigation_pages(request, PageModel, TitleModel, site, lang)
         children = []
         ancestors = []
         if current_page:
-            alist = current_page.get_ancestors().values_list('id', 'soft_root')
+            alist = [(anc.pk, anc.soft_root) for anc in nav.ancestors(current_page)]
         else:# maybe the active node is in an extender?
             alist = []
-            extenders = PageModel.objects.published().filter(in_navigation=True, 
-                                                        site=site, 
-                                                        level__lte=to_level)
-            extenders = extenders.exclude(navigation_extenders__isnull=True).exclude( navigation_extenders__exact="")
+            extenders = nav.in_navigation(max_level=to_level, extenders=True)
             for ext in extenders:
                 ext.childrens = []
                 ext.ancestors_ascending = []
                 get_extended_navigation_nodes(request, 100, [ext], ext.level, 100, 100, False, ext.navigation_extenders)
                 if hasattr(ext, "ancestor"):
-                    alist = list(ext.get_ancestors().values_list('id', 'soft_root'))
+                    alist = [(anc.pk, anc.soft_root) for anc in nav.ancestors(ext)]
                     alist = [(ext.pk, ext.soft_root)] + alist
                     break
-        filters = {'in_navigation' : True, 
-                   'site' : site,
-                   'level__lte' : to_level}
+            # extenders were marked, don't use them in the menu
+            nav = get_navigation_pages(request, PageModel, TitleModel, site, lang)
         #check the ancestors for softroots
         soft_root_pk = None
         for p in alist:
@@ -58,41 +59,28 @@ def show_menu(context, from_level=0, to_level=100, extra_inactive=0, extra_activ
         #modify filters if we don't start from the root
         root_page = None
         if root_id:
-            root_page = PageModel.objects.get(reverse_id=root_id)
+            root_page = nav.get_by_reverse_id(root_id) or PageModel.objects.get(reverse_id=root_id)
         else:
             if current_page and current_page.soft_root:
                 root_page = current_page
                 soft_root_pk = current_page.pk
             elif soft_root_pk:
-                root_page = PageModel.objects.get(pk=soft_root_pk)
+                root_page = nav.page(soft_root_pk) or PageModel.objects.get(pk=soft_root_pk)
         if root_page:
-            if isinstance(root_page, int):
-                root_page = PageModel.objects.get(pk=root_page)
-            if isinstance(root_page, PageModel):
-                root_page = PageModel.objects.get(pk=root_page.id)
-            elif isinstance(root_page, unicode):
-                root_page = PageModel.objects.get(reverse_id=root_page)
-            filters['tree_id'] = root_page.tree_id
-            filters['lft__gt'] = root_page.lft
-            filters['rght__lt'] = root_page.rght
-            filters['level__lte'] = root_page.level + to_level
+            # don't mark the current page instance
+            root_page = nav.page(root_page.pk) or PageModel.objects.get(pk=root_page.pk)
+            pages = nav.in_navigation(root=root_page, max_level=root_page.level + to_level, translated=settings.CMS_HIDE_UNTRANSLATED)
             db_from_level = root_page.level + from_level
         else:
+            pages = nav.in_navigation(max_level=to_level, translated=settings.CMS_HIDE_UNTRANSLATED)
             db_from_level = from_level
-        if settings.CMS_HIDE_UNTRANSLATED:
-            filters['title_set__language'] = lang
-        pages = PageModel.objects.published().filter(**filters).order_by('tree_id', 
-                                                                    'parent', 
-                                                                    'lft')
         
-        pages = list(pages)
         if root_page:
             pages = [root_page] + pages
         all_pages = pages[:]
         root_level = getattr(root_page, 'level', None)
+        children_index = index_children(pages)
         for page in pages:# build the tree
-            if page.level >= db_from_level:
-                ids.append(page.pk)
             if page.level == 0 or page.level == root_level:
                 page.ancestors_ascending = []
                 page.menu_level = 0 - from_level
@@ -104,17 +92,12 @@ def show_menu(context, from_level=0, to_level=100, extra_inactive=0, extra_activ
                     pk = current_page.pk
                 else:
                     pk = -1
-                find_children(page, pages, extra_inactive, extra_active, ancestors, pk, request=request, to_levels=to_level)
+                mark_children(page, children_index, extra_inactive, extra_active, ancestors, pk, request=request, to_levels=to_level)
                 if page.pk == soft_root_pk:
                     page.soft_root = True
         if db_from_level > 0:
             children = cut_levels(children, db_from_level)
-        titles = list(TitleModel.objects.filter(page__in=ids, language=lang))
-        for page in all_pages:# add the title and slugs and some meta data
-            for title in titles:
-                if title.page_id == page.pk:
-                    page.title_cache = title
-                    #titles.remove(title)
+        for page in all_pages:# add some meta data, titles are already there
             if page.pk in ancestors:
                 page.ancestor = True
             if current_page and page.parent_id == current_page.parent_id and not page.pk == current_page.pk:
@@ -145,48 +128,30 @@ def show_sub_menu(context, levels=100, template="cms/sub_menu.html"):
     
     lang = get_language_from_request(request)
     site = Site.objects.get_current()
+    nav = get_navigation_pages(request, PageModel, TitleModel, site, lang)
     children = []
     page = request.current_page
     if page:
-        root = page.get_root()
-        filters = {'in_navigation':True, 
-                  'lft__gt':page.lft, 
-                  'rght__lt':page.rght, 
-                  'tree_id':page.tree_id, 
-                  'level__lte':page.level+levels, 
-                  'site':site}
-        if settings.CMS_HIDE_UNTRANSLATED:
-            filters['title_set__language'] = lang
-        pages = PageModel.objects.published().filter(**filters)
-        ids = []
-        pages = list(pages)
-        all_pages = pages[:]
+        pages = nav.in_navigation(root=page, max_level=page.level+levels, translated=settings.CMS_HIDE_UNTRANSLATED)
         page.ancestors_ascending = []
         page.childrens = []
         for p in pages:
             p.descendant  = True
-            ids.append(p.pk)
         page.selected = True
         page.menu_level = -1
         was_soft_root = False
         if page.soft_root:
             was_soft_root = True
             page.soft_root = False
-        find_children(page, pages, levels, levels, [], page.pk, request=request)
+        mark_children(page, index_children(pages), levels, levels, [], page.pk, request=request)
         if was_soft_root:
             page.soft_root = True
         children = page.childrens
-        titles = TitleModel.objects.filter(page__in=ids, language=lang)
-        for p in all_pages:# add the title and slugs and some meta data
-            for title in titles:
-                if title.page_id == p.pk:
-                    p.title_cache = title
         from_level = page.level
         to_level = page.level+levels
         extra_active = extra_inactive = levels
     else:
-        extenders = PageModel.objects.published().filter(in_navigation=True, site=site)
-        extenders = extenders.exclude(navigation_extenders__isnull=True).exclude(navigation_extenders__exact="")
+        extenders = nav.in_navigation(extenders=True)
         children = []
         from_level = 0
         to_level = 0
@@ -220,31 +185,19 @@ def show_breadcrumb(context, start_level=0, template="cms/breadcrumb.html"):
     TitleModel = get_title_model(request)
     page = request.current_page
     lang = get_language_from_request(request)
+    site = Site.objects.get_current()
+    nav = get_navigation_pages(request, PageModel, TitleModel, site, lang)
     if page:
-        p = page
-        ancestors = [page]
-        while ancestors[-1].parent:
-            ancestors.append(ancestors[-1].parent)
-        ancestors.reverse()
-        home = PageModel.objects.get_home()
+        ancestors = nav.ancestors(page) + [page]
+        home = nav.home() or PageModel.objects.get_home()
         if ancestors and ancestors[0].pk != home.pk: 
             ancestors = [home] + ancestors
-        ids = [page.pk]
-        for anc in ancestors:
-            ids.append(anc.pk)
-        titles = TitleModel.objects.filter(page__in=ids, language=lang)
-        for anc in ancestors:
-            for title in titles:
-                if title.page_id == anc.pk:
-                    anc.title_cache = title
-        for title in titles:
-            if title.page_id == page.pk:
-                page.title_cache = title
+        title = nav.title(page.pk)
+        if title:
+            page.title_cache = title
     else:
-        site = Site.objects.get_current()
         ancestors = []
-        extenders = PageModel.objects.published().filter(in_navigation=True, site=site)
-        extenders = extenders.exclude(navigation_extenders__isnull=True).exclude(navigation_extenders__exact="")
+        extenders = nav.in_navigation(extenders=True)
         for ext in extenders:
             ext.childrens = []
             ext.ancestors_ascending = []
@@ -252,21 +205,14 @@ def show_breadcrumb(context, start_level=0, template="cms/breadcrumb.html"):
             if hasattr(ext, "ancestor"):
                 selected = find_selected(nodes)
                 if selected:
-                    ancestors = list(ext.get_ancestors()) + [ext]
-                    home = PageModel.objects.get_home()
+                    ancestors = nav.ancestors(ext) + [ext]
+                    home = nav.home() or PageModel.objects.get_home()
                     if ancestors and ancestors[0].pk != home.pk: 
                         ancestors = [home] + ancestors
-                    ids = []
-                    for anc in ancestors:
-                        ids.append(anc.pk)
-                    titles = Title.objects.filter(page__in=ids, language=lang)
                     ancs = []
                     for anc in ancestors:
                         anc.ancestors_ascending = ancs[:]
                         ancs += [anc]
-                        for title in titles:
-                            if title.page_id == anc.pk:
-                                anc.title_cache = title
                     ancestors = ancestors + selected.ancestors_ascending[1:] + [selected]
     ancestors = ancestors[start_level:]
     context.update(locals())
@@ -409,13 +355,20 @@ class PlaceholderNode(template.Node):
         request = context['request']
         CMSPluginModel = get_cmsplugin_model(request)
         page = request.current_page
-        plugins = CMSPluginModel.objects.filter(page=page, language=l, placeholder__iexact=self.name, parent__isnull=True).order_by('position').select_related()
         if settings.CMS_PLACEHOLDER_CONF and self.name in settings.CMS_PLACEHOLDER_CONF:
             if "extra_context" in settings.CMS_PLACEHOLDER_CONF[self.name]:
                 context.update(settings.CMS_PLACEHOLDER_CONF[self.name]["extra_context"])
+        use_cache = page and placeholder_cache_enabled(self.name)
+        if use_cache:
+            c = get_placeholder_cache(page, self.name, l)
+            if c is not None:
+                return c
+        plugins = downcast_plugins(CMSPluginModel.objects.filter(page=page, language=l, placeholder__iexact=self.name, parent__isnull=True).order_by('position'))
         c = ""
         for plugin in plugins:
             c += plugin.render_plugin(context, self.name)
+        if use_cache:
+            set_placeholder_cache(page, self.name, l, c)
         return c
         
     def __repr__(self):
@@ -512,7 +465,7 @@ def show_placeholder_by_id(context, placeholder_name, reverse_id, lang=None):
                           settings.MANAGERS,
                           fail_silently=True)
 
-        plugins = CMSPluginModel.objects.filter(page=page, language=lang, placeholder__iexact=placeholder_name, parent__isnull=True).order_by('position').select_related()
+        plugins = downcast_plugins(CMSPluginModel.objects.filter(page=page, language=lang, placeholder__iexact=placeholder_name, parent__isnull=True).order_by('position'))
         content = ""
         for plugin in plugins:
             content += plugin.render_plugin(context, placeholder_name)
@@ -6,6 +6,15 @@ import doctest
 from cms.utils import urlutils
 from cms.tests.page import PagesTestCase
 from cms.tests.permmod import PermissionModeratorTestCase
+from cms.tests.navigation import NavigationTestCase
+from cms.tests.cache import NavigationCacheTestCase, PlaceholderCacheTestCase
+from cms.tests.plugins import PluginsTestCase
+from cms.tests.routing import RoutingTestCase
+from cms.tests.titles import TitlesTestCase
+from cms.tests.publish import PublishTestCase
+from cms.tests.changelist import ChangeListTestCase
+from cms.tests.permissions import PermissionIntervalsTestCase
+from cms.tests.loader import TemplateLoaderTestCase
 from cms import settings as cms_settings
 
 def suite():
@@ -13,6 +22,16 @@ def suite():
     s = unittest.TestSuite()
     s.addTest(doctest.DocTestSuite(urlutils))
     s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PagesTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(NavigationTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(NavigationCacheTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PlaceholderCacheTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PluginsTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(RoutingTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TitlesTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PublishTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(ChangeListTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PermissionIntervalsTestCase))
+    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TemplateLoaderTestCase))
     
     #if cms_settings.CMS_PERMISSION and cms_settings.CMS_MODERATOR:
     #    s.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(PermissionModeratorTestCase))
@@ -21,3 +21,51 @@ class PageBaseTestCase(TestCase):
         
         self.counter = self.counter + 1
         return page_data
+
+
+class SuperuserTestCase(TestCase):
+    """Creates superuser `test`, who is also set as the current user, so pages
+    can be created directly over models.
+    """
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.contrib.sites.models import Site
+        from cms.utils.permissions import _thread_locals
+        
+        self.user = User(username="test", is_staff=True, is_active=True, is_superuser=True)
+        self.user.set_password("test")
+        self.user.save()
+        _thread_locals.user = self.user
+        self.site = Site.objects.get_current()
+    
+    def add_page(self, slug=None, parent=None, languages=('en',), published=True):
+        """Creates page under parent (or in root) with titles in given
+        languages.
+        """
+        from cms.models import Page, Title
+        
+        page = Page(site=self.site, template='index.html', published=published)
+        page.save()
+        if parent:
+            # tree fields of parent might be changed by later pages
+            page.move_to(Page.objects.get(pk=parent.pk), 'last-child')
+            page.save()
+        if slug is not None and languages:
+            for language in languages:
+                Title.objects.set_or_create(page, language, slug=slug, title=slug)
+            page.save()
+        return page
+    
+    def add_plugin(self, page, model, position, placeholder='body', **fields):
+        """Creates plugin the same way as admin does - base row first.
+        """
+        from cms.models import CMSPlugin
+        
+        base = CMSPlugin(page=page, language='en', placeholder=placeholder,
+            position=position, plugin_type=model.__name__ + 'Plugin')
+        base.save()
+        instance = model(**fields)
+        instance.__dict__.update(base.__dict__)
+        instance.cmsplugin_ptr_id = base.pk
+        instance.save()
+        return instance
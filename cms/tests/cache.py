@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from django.db.models import signals
+from django.http import HttpRequest
+from django.template import Template, Context
+from cms import settings as cms_settings
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, Title, CMSPlugin, signals as cms_signals
+from cms.plugins.text.models import Text
+from cms.cache.placeholder import clear_page_placeholder_cache
+from cms.cache.navigation import get_navigation_pages
+from cms.cache.signals import post_save_delete_plugin, post_publish_placeholder
+
+
+class PlaceholderCacheTestCase(SuperuserTestCase):
+    """Rendered placeholder must be served from cache until some of its
+    plugins changes or the page gets published.
+    """
+    def setUp(self):
+        super(PlaceholderCacheTestCase, self).setUp()
+        self.old_placeholder_cache = cms_settings.CMS_PLACEHOLDER_CACHE
+        cms_settings.CMS_PLACEHOLDER_CACHE = True
+        if not self.old_placeholder_cache:
+            # handlers are connected only if cache was enabled on startup
+            signals.post_save.connect(post_save_delete_plugin)
+            signals.post_delete.connect(post_save_delete_plugin)
+            cms_signals.post_publish.connect(post_publish_placeholder, sender=Page)
+
+        self.page = self.add_page('cached')
+        self.plugin = self.add_plugin(self.page, Text, 0, body='first')
+        self.publish()
+        # ids are reused by tests, so forget what previous test rendered
+        clear_page_placeholder_cache(self.page.pk, False)
+        clear_page_placeholder_cache(self.page.public_id, True)
+
+    def tearDown(self):
+        cms_settings.CMS_PLACEHOLDER_CACHE = self.old_placeholder_cache
+        if not self.old_placeholder_cache:
+            signals.post_save.disconnect(post_save_delete_plugin)
+            signals.post_delete.disconnect(post_save_delete_plugin)
+            cms_signals.post_publish.disconnect(post_publish_placeholder, sender=Page)
+
+    def publish(self):
+        self.page = Page.objects.get(pk=self.page.pk)
+        self.page.save()
+
+    def render(self, draft=False):
+        """Renders body placeholder of the draft page in preview, or of the
+        public page.
+        """
+        request = HttpRequest()
+        request.user = self.user
+        request.LANGUAGE_CODE = 'en'
+        request.REQUEST = request.GET
+        if draft:
+            request.GET['preview'] = request.GET['draft'] = '1'
+            request.current_page = self.page
+        else:
+            request.current_page = Page.PublicModel.objects.get(pk=self.page.public_id)
+        template = Template("{% load cms_tags %}{% placeholder body %}")
+        return template.render(Context({'request': request})).strip()
+
+    def change_silently(self, body):
+        # queryset update doesn't send any signal, so cache stays
+        Text.objects.filter(pk=self.plugin.pk).update(body=body)
+
+    def test_01_plugin_save(self):
+        self.assertEqual(self.render(draft=True), 'first')
+        self.change_silently('second')
+        self.assertEqual(self.render(draft=True), 'first')
+        self.plugin = Text.objects.get(pk=self.plugin.pk)
+        self.plugin.save()
+        self.assertEqual(self.render(draft=True), 'second')
+
+    def test_02_plugin_delete(self):
+        self.assertEqual(self.render(), 'first')
+        self.assertEqual(self.render(draft=True), 'first')
+        # same as remove_plugin in admin does
+        CMSPlugin.objects.get(pk=self.plugin.pk).delete_with_public()
+        self.assertEqual(self.render(), '')
+        self.assertEqual(self.render(draft=True), '')
+
+    def test_03_page_publish(self):
+        self.assertEqual(self.render(), 'first')
+        self.assertEqual(self.render(draft=True), 'first')
+        self.change_silently('second')
+        self.publish()
+        self.assertEqual(self.render(), 'second')
+        self.assertEqual(self.render(draft=True), 'second')
+
+
+class NavigationCacheTestCase(SuperuserTestCase):
+    """Navigation skeleton of public pages must be served from cache until
+    some page or title changes.
+    """
+    def setUp(self):
+        super(NavigationCacheTestCase, self).setUp()
+        self.pages = {}
+        for slug, parent in (('a', None), ('a1', 'a'), ('b', None)):
+            self.pages[slug] = self.add_page(slug, self.pages.get(parent))
+
+    def get(self, slug):
+        return Page.objects.get(pk=self.pages[slug].pk)
+
+    def navigation(self):
+        """Returns titles and parent titles of pages in navigation, as every
+        request would see them.
+        """
+        nav = get_navigation_pages(HttpRequest(), Page.PublicModel, Title.PublicModel, self.site, 'en')
+        result = []
+        # public page deleted with draft is just marked for deletion, but its
+        # titles are gone
+        for page in nav.in_navigation(translated=True):
+            ancestors = [ancestor.title_cache.title for ancestor in nav.ancestors(page)]
+            result.append((page.title_cache.title, ancestors))
+        return result
+
+    def test_01_title_publish(self):
+        self.assertEqual(self.navigation(), [('a', []), ('a1', ['a']), ('b', [])])
+        # queryset update doesn't send any signal, so cache stays
+        Title.PublicModel.objects.filter(page=self.get('a1').public_id).update(title='silent')
+        self.assertEqual(self.navigation(), [('a', []), ('a1', ['a']), ('b', [])])
+        title = Title.objects.get(page=self.pages['a1'], language='en')
+        title.title = 'renamed'
+        title.save()
+        self.get('a1').save()
+        self.assertEqual(self.navigation(), [('a', []), ('renamed', ['a']), ('b', [])])
+
+    def test_02_page_delete(self):
+        self.assertEqual(self.navigation(), [('a', []), ('a1', ['a']), ('b', [])])
+        self.get('a1').delete_with_public()
+        self.assertEqual(self.navigation(), [('a', []), ('b', [])])
+
+    def test_03_page_move(self):
+        self.assertEqual(self.navigation(), [('a', []), ('a1', ['a']), ('b', [])])
+        self.get('a1').move_page(self.get('b'), 'last-child')
+        self.assertEqual(self.navigation(), [('a', []), ('b', []), ('a1', ['b'])])
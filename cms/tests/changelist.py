@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import re
+from django.contrib.auth.models import User, Permission
+from cms import settings as cms_settings
+from cms.cache.permissions import clear_permission_cache
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, PagePermission, ACCESS_PAGE, ACCESS_CHILDREN,\
+    ACCESS_DESCENDANTS, ACCESS_PAGE_AND_DESCENDANTS
+
+FLAGS = ('can_change', 'can_add', 'can_delete', 'can_publish', 'can_change_softroot',
+    'can_change_permissions', 'can_move_page', 'can_moderate')
+
+URL_SUBTREE = '/admin/cms/page/%d/subtree/'
+
+
+class ChangeListTestCase(SuperuserTestCase):
+    """Page tree in admin, loaded lazily by a user with page permissions.
+    """
+    def setUp(self):
+        super(ChangeListTestCase, self).setUp()
+        self.old_permission = cms_settings.CMS_PERMISSION
+        self.old_lazy_levels = cms_settings.CMS_TREE_LAZY_LEVELS
+        cms_settings.CMS_PERMISSION = True
+        cms_settings.CMS_TREE_LAZY_LEVELS = 1
+        clear_permission_cache()
+
+        self.pages = {}
+        for slug, parent in (('a', None), ('a1', 'a'), ('a11', 'a1'), ('a12', 'a1'),
+                             ('a2', 'a'), ('a21', 'a2'), ('b', None), ('b1', 'b'),
+                             ('b11', 'b1'), ('c', None), ('c1', 'c')):
+            self.pages[slug] = self.add_page(slug, self.pages.get(parent))
+
+        self.staff = User(username="staff", is_staff=True, is_active=True)
+        self.staff.set_password("staff")
+        self.staff.save()
+        for permission in Permission.objects.filter(content_type__app_label='cms'):
+            self.staff.user_permissions.add(permission)
+
+        # a2 is visible just because of the children of a, so a21 isn't
+        self.grant('a', ACCESS_CHILDREN, can_add=True)
+        self.grant('a1', ACCESS_PAGE_AND_DESCENDANTS, can_change=True)
+        self.grant('b', ACCESS_DESCENDANTS, can_change=True)
+        self.grant('c', ACCESS_PAGE, can_change=True)
+        self.assertTrue(self.client.login(username='staff', password='staff'))
+
+    def tearDown(self):
+        cms_settings.CMS_PERMISSION = self.old_permission
+        cms_settings.CMS_TREE_LAZY_LEVELS = self.old_lazy_levels
+        clear_permission_cache()
+
+    def grant(self, slug, grant_on, **flags):
+        """Grants just the given flags, most of them are on by default.
+        """
+        permission = PagePermission(user=self.staff, page=Page.objects.get(pk=self.pages[slug].pk),
+            grant_on=grant_on)
+        for flag in FLAGS:
+            setattr(permission, flag, flags.get(flag, False))
+        permission.save()
+
+    def ids(self, *slugs):
+        return [str(self.pages[slug].pk) for slug in slugs]
+
+    def parse(self, response):
+        """Returns ids of rendered pages, and ids of pages with lazy toggle.
+        """
+        pages = re.findall(r'<li id="page_(\d+)"', response.content)
+        lazy = re.findall(r'<li id="page_(\d+)"(?:(?!<li ).)*?<ul class="lazy', response.content, re.S)
+        return pages, lazy
+
+    def test_01_lazy_roots(self):
+        pages, lazy = self.parse(self.client.get('/admin/cms/page/'))
+        # b isn't in change list, so b1 is a root; c1 isn't visible, so c
+        # can't be opened
+        self.assertEqual(pages, self.ids('a', 'b1', 'c'))
+        self.assertEqual(lazy, self.ids('a', 'b1'))
+
+    def test_02_subtree(self):
+        pages, lazy = self.parse(self.client.get(URL_SUBTREE % self.pages['a'].pk))
+        self.assertEqual(sorted(pages), sorted(self.ids('a1', 'a2')))
+        self.assertEqual(lazy, self.ids('a1'))
+
+    def test_03_subtree_denied(self):
+        self.staff.user_permissions.clear()
+        # existing and missing pages must not be told apart
+        missing = Page.objects.order_by('-pk')[0].pk + 1
+        self.assertEqual(self.client.get(URL_SUBTREE % self.pages['a'].pk).status_code, 403)
+        self.assertEqual(self.client.get(URL_SUBTREE % missing).status_code, 403)
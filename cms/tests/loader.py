@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from django.conf import settings
+from django.template import Template, Context, loader
+from django.template.loaders import cached, filesystem
+
+TEMPLATES = {
+    'cycle.html': '<{% cycle "1" "2" %}>',
+    'ifchanged.html': '{% ifchanged item %}<{{ item }}>{% endifchanged %}',
+}
+
+LOOP = '{% for item in items %}{% include "NAME" %}{% endfor %}'
+
+
+class TemplateLoaderTestCase(unittest.TestCase):
+    """Compiled templates are shared by the cached loader, so the state of
+    the nodes must be kept per rendering - and included templates must share
+    it with the including one.
+    """
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name, source in TEMPLATES.items():
+            f = open(os.path.join(self.dir, name), 'w')
+            f.write(source)
+            f.close()
+        self.old_dirs = settings.TEMPLATE_DIRS
+        self.old_debug = settings.DEBUG
+        self.old_loaders = loader.template_source_loaders
+        self.old_cached_loaders = cached.cached_loaders
+        settings.TEMPLATE_DIRS = (self.dir,)
+        cached.cached_loaders = (filesystem.load_template_source,)
+        cached.reset()
+
+    def tearDown(self):
+        settings.TEMPLATE_DIRS = self.old_dirs
+        settings.DEBUG = self.old_debug
+        loader.template_source_loaders = self.old_loaders
+        cached.cached_loaders = self.old_cached_loaders
+        cached.reset()
+        shutil.rmtree(self.dir)
+
+    def render(self, name, items):
+        template = Template(LOOP.replace('NAME', name))
+        return template.render(Context({'items': items}))
+
+    def check(self):
+        for debug in (False, True):
+            settings.DEBUG = debug
+            for i in range(2):
+                self.assertEqual(self.render('cycle.html', range(5)), '<1><2><1><2><1>')
+                self.assertEqual(self.render('ifchanged.html', [1, 1, 2, 2, 1]), '<1><2><1>')
+
+    def test_01_filesystem_loader(self):
+        loader.template_source_loaders = (filesystem.load_template_source,)
+        self.check()
+
+    def test_02_cached_loader(self):
+        loader.template_source_loaders = (cached.load_template_source,)
+        self.check()
+        # compiled included template is shared by the renderings
+        self.assertTrue(loader.get_template('cycle.html') is loader.get_template('cycle.html'))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import unittest
+from cms.utils import find_children
+from cms.utils.navigation import index_children, mark_children
+
+MARKERS = ('selected', 'ancestor', 'descendant', 'last', 'sibling')
+
+class FakePage(object):
+    """Has just the attributes used by the tree builders.
+    """
+    navigation_extenders = None
+
+    def __init__(self, pk, parent_id, level, soft_root=False):
+        self.pk = self.id = pk
+        self.parent_id = parent_id
+        self.level = level
+        self.soft_root = soft_root
+
+
+def build_pages(depth, width, soft_root_pk=None):
+    """Returns list of pages ordered like the show_menu query does, so by
+    tree_id, parent and lft.
+    """
+    pages = []
+    counter = [0]
+    def add(parent, level):
+        counter[0] += 1
+        page = FakePage(counter[0], parent and parent.pk or None, level, counter[0] == soft_root_pk)
+        pages.append(page)
+        if level < depth:
+            for i in range(width):
+                add(page, level + 1)
+    for i in range(width):
+        add(None, 0)
+    pages.sort(key=lambda p: (p.parent_id, p.pk))
+    return pages
+
+
+def dump(page):
+    """Serializes marked tree to comparable structure.
+    """
+    return (page.pk,
+            [getattr(page, marker, None) for marker in MARKERS],
+            [a.pk for a in page.ancestors_ascending],
+            [dump(child) for child in page.childrens])
+
+
+class NavigationTestCase(unittest.TestCase):
+
+    def build(self, builder, levels, active_levels, selected_pk, ancestors, soft_root_pk=None):
+        pages = build_pages(4, 3, soft_root_pk)
+        roots = [p for p in pages if p.level == 0]
+        for root in roots:
+            root.ancestors_ascending = []
+            root.childrens = []
+            builder(root, pages, levels, active_levels, ancestors, selected_pk)
+        return [dump(root) for root in roots]
+
+    def compare(self, *args):
+        def indexed(target, pages, *rest):
+            mark_children(target, index_children(pages), *rest)
+        self.assertEqual(self.build(find_children, *args), self.build(indexed, *args))
+
+    def test_01_full_tree(self):
+        self.compare(100, 100, -1, [])
+
+    def test_02_selected_with_limits(self):
+        pages = build_pages(4, 3)
+        selected = pages[-1]
+        self.compare(1, 2, selected.pk, [1, selected.parent_id])
+
+    def test_03_soft_root(self):
+        self.compare(100, 100, -1, [], 2)
+        self.compare(100, 100, 3, [1, 2], 2)
+
+    def test_04_menu_level(self):
+        pages = build_pages(2, 2)
+        root = pages[0]
+        root.ancestors_ascending = []
+        root.menu_level = 0
+        mark_children(root, index_children(pages))
+        for child in root.childrens:
+            self.assertEqual(child.menu_level, 1)
+            for grandchild in child.childrens:
+                self.assertEqual(grandchild.menu_level, 2)
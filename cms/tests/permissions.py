@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from django.contrib.auth.models import User
+from cms import settings as cms_settings
+from cms.cache.permissions import clear_permission_cache
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, PagePermission, MASK_PAGE, MASK_CHILDREN, MASK_DESCENDANTS,\
+    ACCESS_PAGE, ACCESS_CHILDREN, ACCESS_PAGE_AND_CHILDREN, ACCESS_DESCENDANTS,\
+    ACCESS_PAGE_AND_DESCENDANTS
+
+ATTRS = ('can_change', 'can_add', 'can_delete', 'can_publish', 'can_change_permissions')
+
+
+class PermissionIntervalsTestCase(SuperuserTestCase):
+    """Page permissions resolved as PageIntervalSet must select the same pages
+    as the explicit id lists of granted pages did.
+    """
+    def setUp(self):
+        super(PermissionIntervalsTestCase, self).setUp()
+        self.old_permission = cms_settings.CMS_PERMISSION
+        cms_settings.CMS_PERMISSION = True
+        clear_permission_cache()
+
+        self.pages = {}
+        for slug, parent in (('a', None), ('a1', 'a'), ('a11', 'a1'), ('a111', 'a11'),
+                             ('a12', 'a1'), ('a2', 'a'), ('a21', 'a2'), ('b', None),
+                             ('b1', 'b'), ('b11', 'b1'), ('c', None)):
+            self.pages[slug] = self.add_page(slug, self.pages.get(parent))
+
+        self.staff = User(username="staff", is_staff=True, is_active=True)
+        self.staff.save()
+        self.other = User(username="other", is_staff=True, is_active=True)
+        self.other.save()
+
+        self.grant(self.staff, 'a1', ACCESS_PAGE_AND_DESCENDANTS, can_change=True,
+            can_change_permissions=True)
+        self.grant(self.staff, 'a11', ACCESS_PAGE, can_delete=True, can_publish=True)
+        self.grant(self.staff, 'a', ACCESS_CHILDREN, can_add=True, can_publish=True)
+        self.grant(self.staff, 'b', ACCESS_DESCENDANTS, can_change=True, can_delete=True)
+        self.grant(self.staff, 'b1', ACCESS_PAGE_AND_CHILDREN, can_add=True,
+            can_change_permissions=True)
+        self.grant(self.staff, 'c', ACCESS_PAGE, can_change=True)
+
+        self.grant(self.other, 'a11', ACCESS_PAGE, can_change=True)
+        self.grant(self.other, 'a2', ACCESS_PAGE, can_change=True)
+        self.grant(self.other, 'b11', ACCESS_PAGE, can_change=True)
+
+    def tearDown(self):
+        cms_settings.CMS_PERMISSION = self.old_permission
+        clear_permission_cache()
+
+    def grant(self, user, slug, grant_on, **attrs):
+        PagePermission(user=user, page=self.get(slug), grant_on=grant_on, **attrs).save()
+
+    def get(self, slug):
+        return Page.objects.get(pk=self.pages[slug].pk)
+
+    def expected_ids(self, attr):
+        """Ids of granted pages, listed page by page.
+        """
+        ids = set()
+        for permission in PagePermission.objects.filter(user=self.staff, **{attr: True}):
+            if permission.grant_on & MASK_PAGE or attr == "can_add":
+                ids.add(permission.page_id)
+            if permission.grant_on & MASK_CHILDREN:
+                ids.update(permission.page.get_children().values_list('id', flat=True))
+            elif permission.grant_on & MASK_DESCENDANTS:
+                ids.update(permission.page.get_descendants().values_list('id', flat=True))
+        return ids
+
+    def get_page_set(self, attr):
+        return getattr(Page.permissions, "get_%s_id_list" % attr[4:])(self.staff)
+
+    def assertSameAsIds(self, page_set, ids):
+        pages = list(Page.objects.all())
+        self.assertEqual(set([page.pk for page in pages if page in page_set]), ids)
+        self.assertEqual(set([page.pk for page in pages if page.parent_id and
+            page_set.contains_parent(page)]),
+            set([page.pk for page in pages if page.parent_id in ids]))
+        self.assertEqual(set(Page.objects.filter(page_set.get_q()).values_list('id', flat=True)), ids)
+
+    def test_01_membership(self):
+        for attr in ATTRS:
+            self.assertSameAsIds(self.get_page_set(attr), self.expected_ids(attr))
+
+    def test_02_union(self):
+        page_set = Page.permissions.get_change_list_id_list(self.staff)
+        self.assertEqual(page_set, self.get_page_set('can_change') | self.get_page_set('can_add'))
+        self.assertSameAsIds(page_set, self.expected_ids('can_change') | self.expected_ids('can_add'))
+
+    def test_03_empty(self):
+        nobody = User(username="nobody", is_staff=True, is_active=True)
+        nobody.save()
+        page_set = Page.permissions.get_change_id_list(nobody)
+        self.assertEqual(len(page_set), 0)
+        self.assertSameAsIds(page_set, set())
+
+    def test_04_subordinate_to_user(self):
+        ids = self.expected_ids('can_change_permissions')
+        level = min([self.get(slug).level for slug in ('a1', 'b1')])
+        expected = set(PagePermission.objects.filter(user=self.other, page__id__in=ids,
+            page__level__gte=level).values_list('id', flat=True))
+        self.assertEqual(set(PagePermission.objects.subordinate_to_user(self.staff).values_list('id', flat=True)),
+            expected)
+        self.assertEqual(len(expected), 2)
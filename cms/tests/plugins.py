@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, CMSPlugin
+from cms.plugins.text.models import Text
+from cms.plugins.link.models import Link
+from cms.utils.plugins import downcast_plugins
+
+class PluginsTestCase(SuperuserTestCase):
+
+    def setUp(self):
+        super(PluginsTestCase, self).setUp()
+        self.page = self.add_page()
+
+    def test_01_downcast(self):
+        self.add_plugin(self.page, Text, 0, body='first')
+        self.add_plugin(self.page, Link, 1, name='link', url='http://example.com/')
+        self.add_plugin(self.page, Text, 2, body='second')
+        plugins = downcast_plugins(CMSPlugin.objects.filter(page=self.page).order_by('position'))
+        self.assertEqual([p.position for p in plugins], [0, 1, 2])
+        for plugin in plugins:
+            instance = plugin.get_plugin_instance()[0]
+            self.assertEqual(instance.pk, plugin.pk)
+            del plugin._plugin_instance_cache
+            self.assertEqual(instance.__class__, plugin.get_plugin_instance()[0].__class__)
+        self.assertEqual(plugins[0].get_plugin_instance()[0].body, 'first')
+        self.assertEqual(plugins[1].get_plugin_instance()[0].name, 'link')
+
+    def test_02_missing_instance(self):
+        base = CMSPlugin(page=self.page, language='en', placeholder='body',
+            position=0, plugin_type='TextPlugin')
+        base.save()
+        plugin = downcast_plugins([base])[0]
+        self.assertEqual(plugin.get_plugin_instance()[0], None)
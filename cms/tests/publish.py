@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from django.contrib.sites.models import Site
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, Title
+from publisher.base import publish_counter
+
+PAGE_FIELDS = ('lft', 'rght', 'tree_id', 'level', 'parent', 'site', 'created_by', 'changed_by')
+
+def publish_rows(page, tree_ids):
+    """Row by row variant of Page.publish_tree_structure, as it was done
+    before.
+    """
+    fields = [field for field in Page._meta.fields if field.name in PAGE_FIELDS]
+    ids = []
+    for p in Page.objects.filter(tree_id__in=tree_ids).order_by("tree_id", "level", "lft"):
+        if p.pk != page.pk:
+            p.publish(fields=fields)
+            ids.append(p.pk)
+    title_fields = [field for field in Title._meta.fields if field.name == "path"]
+    for title in Title.objects.filter(page__in=ids):
+        title.publish(fields=title_fields)
+
+
+class PublishTestCase(SuperuserTestCase):
+
+    def setUp(self):
+        super(PublishTestCase, self).setUp()
+        self.pages = {}
+        for slug, parent in (('a', None), ('a1', 'a'), ('a11', 'a1'), ('a12', 'a1'),
+                             ('a2', 'a'), ('b', None), ('b1', 'b'), ('b2', 'b')):
+            self.pages[slug] = self.add_page(slug, self.pages.get(parent))
+
+    def get(self, slug):
+        return Page.objects.get(pk=self.pages[slug].pk)
+
+    def snapshot(self):
+        """Returns structure of all public pages and their title paths.
+        """
+        state = {}
+        for page in Page.PublicModel.objects.all():
+            values = Page.PublicModel.objects.filter(pk=page.pk).values(*PAGE_FIELDS)[0]
+            paths = list(Title.PublicModel.objects.filter(page=page).values_list('id', 'path'))
+            state[page.pk] = (values, paths)
+        return state
+
+    def restore(self, state):
+        for pk, (values, paths) in state.items():
+            values = dict(values)
+            values['parent'] = values['parent'] and Page.PublicModel.objects.get(pk=values['parent'])
+            values['site'] = Site.objects.get(pk=values['site'])
+            Page.PublicModel.objects.filter(pk=pk).update(**values)
+            for title_id, path in paths:
+                Title.PublicModel.objects.filter(pk=title_id).update(path=path)
+
+    def check_move(self, slug, target, position):
+        before = self.snapshot()
+        page = self.get(slug)
+        tree_ids = [page.tree_id, self.get(target).tree_id]
+        page.move_page(self.get(target), position)
+        bulk = self.snapshot()
+        self.assertNotEqual(before, bulk)
+
+        # moved page itself is published by Page.publish in both cases
+        del before[page.public_id]
+        self.restore(before)
+        publish_rows(self.get(slug), tree_ids)
+        self.assertEqual(self.snapshot(), bulk)
+
+    def test_01_move_over_trees(self):
+        self.check_move('a1', 'b1', 'last-child')
+
+    def test_02_move_in_tree(self):
+        self.check_move('a12', 'a2', 'first-child')
+
+    def test_03_write_changed_only(self):
+        page = self.get('a1')
+        page.publish()
+        self.assertEqual(publish_counter.written, 0)
+        Title.objects.filter(page=page).update(title='changed')
+        page.publish()
+        self.assertEqual(publish_counter.written, 1)
+        self.assertEqual(Title.PublicModel.objects.get(page=page.public).title, 'changed')
+
+    def test_04_count_children_waiting_for_parent(self):
+        page = self.get('b')
+        page.publish()
+        Page.objects.filter(pk=self.pages['b1'].pk).update(
+            moderator_state=Page.MODERATOR_APPROVED_WAITING_FOR_PARENTS)
+        Title.objects.filter(page__in=[page, self.pages['b1']]).update(title='changed')
+        page.publish()
+        # b1 gets published by page.publish too, both titles are counted
+        self.assertEqual(publish_counter.written, 2)
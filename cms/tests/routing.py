@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, Title
+from cms.cache.routing import RoutingTable
+from cms.views import _get_current_page
+
+class RoutingTestCase(SuperuserTestCase):
+
+    def setUp(self):
+        super(RoutingTestCase, self).setUp()
+        home = self.add_page('home')
+        a = self.add_page('a', home, ('en', 'de'))
+        self.add_page('b', home, ('de',))
+        self.add_page('a1', a)
+        self.add_page('hidden', a, published=False)
+
+    def dump(self, result):
+        page, alternative = result
+        return page and (page.pk, page.get_languages()), alternative
+
+    def test_01_same_as_query(self):
+        table = RoutingTable(Page, Title, self.site, 1)
+        pages = Page.objects.published()
+        for path in ('home', 'home/a', 'home/a/a1', 'home/b', 'home/a/hidden', 'missing'):
+            for language in ('en', 'de'):
+                self.assertEqual(self.dump(table.get_current_page(path, language)),
+                    self.dump(_get_current_page(path, language, pages)))
+        self.assertEqual(table.get_root_page().pk, pages.filter(parent__isnull=True)[0].pk)
+
+    def test_02_preloaded_title(self):
+        table = RoutingTable(Page, Title, self.site, 1)
+        page, alternative = table.get_current_page('home/a', 'de')
+        self.assertEqual(page.title_cache.language, 'de')
+        self.assertEqual(page.get_slug(language='de'), 'a')
+        self.assertEqual(page.languages_cache, ['en', 'de'])
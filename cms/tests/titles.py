@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from cms.tests.base import SuperuserTestCase
+from cms.models import Page, Title
+from cms.utils.page import prefetch_titles
+
+class TitlesTestCase(SuperuserTestCase):
+
+    def setUp(self):
+        super(TitlesTestCase, self).setUp()
+        for slug, languages in (('first', ('en', 'de')), ('second', ('de',)), ('third', ())):
+            page = self.add_page()
+            for language in languages:
+                Title.objects.set_or_create(page, language, slug=slug + language, title=slug)
+
+    def test_01_prefetch(self):
+        pages = prefetch_titles(Page.objects.all(), 'en')
+        # titles must not be loaded again
+        Title.objects.update(title='changed', slug='changed')
+        first, second, third = pages
+        self.assertEqual(first.get_languages(), ['en', 'de'])
+        self.assertEqual(first.get_title(), 'first')
+        self.assertEqual(first.get_slug(language='de'), 'firstde')
+        self.assertEqual(first.get_menu_title(language='en'), 'first')
+        self.assertEqual(second.get_languages(), ['de'])
+        # fallback to the only existing language
+        self.assertEqual(second.get_slug(language='en'), 'secondde')
+        self.assertRaises(Title.DoesNotExist, second.get_menu_title, language='en')
+        self.assertEqual(third.get_languages(), [])
+        self.assertEqual(third.get_title(language='en'), '')
+        # force_reload goes to database
+        self.assertEqual(first.get_title(language='en', force_reload=True), 'changed')
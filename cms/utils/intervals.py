@@ -0,0 +1,136 @@
+"""Sets of pages given by intervals of the mptt tree. Page permissions are
+granted on a page, its children or its descendants, so each permission is
+a single interval and no ids of the granted pages have to be listed.
+"""
+import operator
+from bisect import bisect_right
+from django.db.models import Q
+
+
+class PageIntervalSet(object):
+    """Set of pages described by intervals (tree_id, lft, rght, min_level,
+    max_level). Page is in the set if some interval from its tree contains
+    the page lft and the page level is between min_level and max_level.
+    max_level None means any level below min_level.
+
+    Intervals are subtrees, so any two of them are either disjoint or one is
+    nested in the other. Membership is checked by bisection of the interval
+    starts and by walking up the enclosing intervals, so it takes
+    O(log n + nesting depth) instead of scanning a list of ids.
+    """
+    def __init__(self, intervals=()):
+        merged = {}
+        for tree_id, lft, rght, min_level, max_level in intervals:
+            key = (tree_id, lft, rght)
+            if key in merged:
+                # level ranges granted on the same page always touch, so
+                # they can be joined
+                old_min, old_max = merged[key]
+                min_level = min(min_level, old_min)
+                if old_max is None or max_level is not None and max_level < old_max:
+                    max_level = old_max
+            merged[key] = (min_level, max_level)
+
+        self.intervals = []
+        self._starts = []
+        # index of the nearest enclosing interval, or -1
+        self._parents = []
+        stack = []
+        # enclosing intervals go first
+        for tree_id, lft, rght in sorted(merged.keys(), key=lambda k: (k[0], k[1], -k[2])):
+            min_level, max_level = merged[(tree_id, lft, rght)]
+            while stack and not self._encloses(stack[-1], tree_id, rght):
+                stack.pop()
+            if stack and self._covered(stack[-1], min_level, max_level):
+                # already granted by enclosing interval
+                continue
+            self.intervals.append((tree_id, lft, rght, min_level, max_level))
+            self._starts.append((tree_id, lft))
+            if stack:
+                self._parents.append(stack[-1])
+            else:
+                self._parents.append(-1)
+            stack.append(len(self.intervals) - 1)
+
+    def _encloses(self, index, tree_id, rght):
+        interval = self.intervals[index]
+        return interval[0] == tree_id and rght <= interval[2]
+
+    def _covered(self, index, min_level, max_level):
+        """Checks whether levels from min_level to max_level are granted by
+        the interval on index or any interval enclosing it.
+        """
+        while index >= 0:
+            interval = self.intervals[index]
+            if interval[3] <= min_level and (interval[4] is None or
+                    max_level is not None and max_level <= interval[4]):
+                return True
+            index = self._parents[index]
+        return False
+
+    def contains(self, tree_id, lft, level):
+        index = bisect_right(self._starts, (tree_id, lft)) - 1
+        while index >= 0:
+            interval = self.intervals[index]
+            if interval[0] != tree_id:
+                break
+            if lft <= interval[2] and interval[3] <= level and \
+                    (interval[4] is None or level <= interval[4]):
+                return True
+            index = self._parents[index]
+        return False
+
+    def contains_parent(self, page):
+        """Checks whether the parent of page is in the set. The parent is
+        found in the same intervals as the page, just on the level above, so
+        it doesn't have to be loaded.
+        """
+        return self.contains(page.tree_id, page.lft, page.level - 1)
+
+    def __contains__(self, page):
+        return self.contains(page.tree_id, page.lft, page.level)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __or__(self, other):
+        return PageIntervalSet(self.intervals + other.intervals)
+    union = __or__
+
+    def __eq__(self, other):
+        return isinstance(other, PageIntervalSet) and self.intervals == other.intervals
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<PageIntervalSet: %r>" % self.intervals
+
+    def __getstate__(self):
+        # empty list would be false, and __setstate__ wouldn't be called
+        return {'intervals': self.intervals}
+
+    def __setstate__(self, state):
+        self.__init__(state['intervals'])
+
+    def get_q(self, prefix=''):
+        """Returns Q object which selects pages from the set, prefix is the
+        lookup path of the page, e.g. "page__" for PagePermission queryset.
+        """
+        if not self.intervals:
+            return Q(**{prefix + 'pk__in': []})
+        qs = []
+        for tree_id, lft, rght, min_level, max_level in self.intervals:
+            lookup = {
+                prefix + 'tree_id': tree_id,
+                prefix + 'lft__gte': lft,
+                prefix + 'lft__lte': rght,
+            }
+            if max_level == min_level:
+                lookup[prefix + 'level'] = min_level
+            else:
+                lookup[prefix + 'level__gte'] = min_level
+                if max_level is not None:
+                    lookup[prefix + 'level__lte'] = max_level
+            qs.append(Q(**lookup))
+        return reduce(operator.or_, qs)
@@ -0,0 +1,68 @@
+from cms.utils import get_extended_navigation_nodes
+
+def index_children(pages):
+    """Builds dictionary of parent_id -> list of child pages in one pass over
+    pages. Children keep the order in which they are in the pages list, so the
+    tree looks the same as when it is built by cms.utils.find_children.
+    """
+    index = {}
+    for page in pages:
+        if page.parent_id:
+            index.setdefault(page.parent_id, []).append(page)
+    return index
+
+def mark_children(target, index, levels=100, active_levels=0, ancestors=None, selected_pk=0, soft_roots=True, request=None, no_extended=False, to_levels=100):
+    """Same like cms.utils.find_children, but takes index of children built by
+    index_children instead of the list of pages, so each page is visited just
+    once and building of the whole tree is linear.
+
+    Sets the same attributes on pages (childrens, ancestors_ascending,
+    selected, ancestor, descendant, last) and handles soft roots and
+    navigation extenders the same way. Also sets menu_level on children if
+    target haves one.
+    """
+    if ancestors is None:
+        ancestors = frozenset()
+    elif not isinstance(ancestors, (set, frozenset)):
+        ancestors = frozenset(ancestors)
+    _mark_children(target, index, levels, active_levels, ancestors, selected_pk, soft_roots, request, no_extended, to_levels)
+
+def _mark_children(target, index, levels, active_levels, ancestors, selected_pk, soft_roots, request, no_extended, to_levels):
+    if not hasattr(target, "childrens"):
+        target.childrens = []
+    is_ancestor = target.pk in ancestors
+    if is_ancestor:
+        target.ancestor = True
+    if target.pk == selected_pk:
+        target.selected = True
+        levels = active_levels
+    if (levels <= 0 or (target.soft_root and soft_roots)) and not is_ancestor:
+        return
+    mark_sibling = False
+    children = index.get(target.pk, ())
+    if children:
+        is_descendant = hasattr(target, "selected") or hasattr(target, "descendant")
+        ancestors_ascending = list(target.ancestors_ascending) + [target]
+        menu_level = getattr(target, "menu_level", None)
+        for page in children:
+            if is_descendant:
+                page.descendant = True
+            if target.childrens:
+                target.childrens[-1].last = False
+            page.ancestors_ascending = ancestors_ascending[:]
+            page.last = True
+            if menu_level is not None:
+                page.menu_level = menu_level + 1
+            target.childrens.append(page)
+            _mark_children(page, index, levels-1, active_levels, ancestors, selected_pk, soft_roots, request, no_extended, to_levels)
+            if hasattr(page, "selected"):
+                mark_sibling = True
+    if target.navigation_extenders and (levels > 0 or is_ancestor) and not no_extended and target.level < to_levels:
+        target.childrens += get_extended_navigation_nodes(request,
+                                                          levels,
+                                                          list(target.ancestors_ascending) + [target],
+                                                          target.level,
+                                                          to_levels,
+                                                          active_levels,
+                                                          mark_sibling,
+                                                          target.navigation_extenders)
@@ -34,4 +34,44 @@ def get_available_slug(title, new_slug=None):
     slug = new_slug or title.slug
     if is_valid_page_slug(title.page, title.page.parent, title.language, slug, title.page.site_id):
         return title.slug
-    return get_available_slug(title, title.slug + APPEND_TO_SLUG)
\ No newline at end of file
+    return get_available_slug(title, title.slug + APPEND_TO_SLUG)
+
+def prefetch_titles(pages, language=None):
+    """Loads titles of all given pages in one query, so titles, slugs, paths
+    and languages of these pages can be accessed without further queries.
+    Language fallback is resolved from loaded titles. If language is given,
+    title in this language gets selected.
+    
+    Returns: list of pages
+    """
+    from cms.models import Title
+    pages = list(pages)
+    if not pages:
+        return pages
+    TitleModel = Title
+    if hasattr(pages[0], '_is_public_model'):
+        TitleModel = Title.PublicModel
+    titles = {}
+    for title in TitleModel.objects.filter(page__in=[page.pk for page in pages]).order_by('id'):
+        titles.setdefault(title.page_id, []).append(title)
+    for page in pages:
+        page.all_titles_cache = {}
+        page.languages_cache = []
+        for title in titles.get(page.pk, []):
+            title._page_cache = page
+            page.all_titles_cache[title.language] = title
+            if not title.language in page.languages_cache:
+                page.languages_cache.append(title.language)
+        if language in page.all_titles_cache:
+            page.title_cache = page.all_titles_cache[language]
+    return pages
+
+
+def get_page_ancestors(page, language=None):
+    """Returns ancestors of page, root first, with prefetched titles. Takes two
+    queries (mptt tree fields are used, not parents). Result is kept on page,
+    so for request.current_page it's computed once per request.
+    """
+    if not hasattr(page, 'ancestors_cache'):
+        page.ancestors_cache = prefetch_titles(page.get_ancestors(), language)
+    return page.ancestors_cache
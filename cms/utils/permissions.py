@@ -125,13 +125,13 @@ def get_subordinate_users(user):
             GlobalPagePermission.objects.with_can_change_permissions(user):
         return User.objects.all() 
     
-    page_id_allow_list = Page.permissions.get_change_permissions_id_list(user)
+    page_allow_set = Page.permissions.get_change_permissions_id_list(user)
     
     user_level = get_user_permission_level(user)
     
     qs = User.objects.distinct().filter(
         Q(is_staff=True) &
-        (Q(pagepermission__page__id__in=page_id_allow_list) & Q(pagepermission__page__level__gte=user_level)) 
+        (page_allow_set.get_q('pagepermission__page__') & Q(pagepermission__page__level__gte=user_level)) 
         | (Q(pageuser__created_by=user) & Q(pagepermission__page=None))
     )
     qs = qs.exclude(pk=user.id).exclude(groups__user__pk=user.id)
@@ -145,11 +145,11 @@ def get_subordinate_groups(user):
             GlobalPagePermission.objects.with_can_change_permissions(user):
         return Group.objects.all()
     
-    page_id_allow_list = Page.permissions.get_change_permissions_id_list(user)
+    page_allow_set = Page.permissions.get_change_permissions_id_list(user)
     user_level = get_user_permission_level(user)
     
     qs = Group.objects.distinct().filter(
-         (Q(pagepermission__page__id__in=page_id_allow_list) & Q(pagepermission__page__level__gte=user_level)) 
+         (page_allow_set.get_q('pagepermission__page__') & Q(pagepermission__page__level__gte=user_level)) 
         | (Q(pageusergroup__created_by=user) & Q(pagepermission__page=None))
     )
     return qs
@@ -168,11 +168,11 @@ def has_add_page_on_same_level_permission(request, page):
     if not cms_settings.CMS_PERMISSION or request.user.is_superuser \
         or GlobalPagePermission.objects.with_user(request.user).filter(can_add=True).count():
         return True
-    try:
-        return has_generic_permission(page.parent_id, request.user, "add")
-    except AttributeError:
-        # if page doesnt have parent...
-        pass
+    if page.parent_id:
+        # parent is found by the page position in the tree, so it doesn't
+        # have to be loaded
+        permission = Page.permissions.get_add_id_list(request.user)
+        return permission == Page.permissions.GRANT_ALL or permission.contains_parent(page)
         """
         if page.level == 0:
             # we are in the root, check if user haves add PAGE paermisson for
@@ -203,12 +203,12 @@ def mail_page_user_change(user, created=False, password=""):
     send_mail(subject, 'admin/cms/mail/page_user_change.txt', [user.email], context, 'admin/cms/mail/page_user_change.html')
 
 
-def has_generic_permission(page_id, user, attr):
-    """Permission getter for single page with given id.
+def has_generic_permission(page, user, attr):
+    """Permission getter for single page.
     """    
     func = getattr(Page.permissions, "get_%s_id_list" % attr)
     permission = func(user)
-    return permission == Page.permissions.GRANT_ALL or page_id in permission
+    return permission == Page.permissions.GRANT_ALL or page in permission
 
 
 def get_user_sites_queryset(user):
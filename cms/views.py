@@ -6,7 +6,8 @@ from cms.utils import auto_render, get_template_from_request, get_language_from_
 from django.db.models.query_utils import Q
 from cms.appresolver import applications_page_check
 from django.contrib.sites.models import Site
-from cms.utils.moderator import get_page_model
+from cms.utils.moderator import get_page_model, get_title_model
+from cms.cache.routing import get_routing_table
 
 def _get_current_page(path, lang, queryset):
     """Helper for getting current page from path depending on language
@@ -38,30 +39,46 @@ def details(request, page_id=None, slug=None, template_name=settings.CMS_TEMPLAT
     
     lang = get_language_from_request(request)
     site = Site.objects.get_current()
+    routing = None
     if 'preview' in request.GET.keys():
         pages = PageModel.objects.all()
     else:
         pages = PageModel.objects.published()
+        routing = get_routing_table(PageModel, get_title_model(request), site)
     
-    root_pages = pages.filter(parent__isnull=True).order_by("tree_id")
+    if routing:
+        root_page = routing.get_root_page(lang)
+    else:
+        root_page = None
+        root_pages = pages.filter(parent__isnull=True).order_by("tree_id")
+        if root_pages:
+            root_page = root_pages[0]
     
     current_page, response = None, None
-    if root_pages:
+    if root_page:
         if page_id:
-            current_page = get_object_or_404(pages, pk=page_id)
+            if routing:
+                current_page = routing.get_page(page_id, lang)
+                if not current_page:
+                    raise Http404
+            else:
+                current_page = get_object_or_404(pages, pk=page_id)
         elif slug != None:
             if slug == "":
-                current_page = root_pages[0]
+                current_page = root_page
             else:
                 if slug.startswith(reverse('pages-root')):
                     path = slug.replace(reverse('pages-root'), '', 1)
                 else:
                     path = slug
-                current_page, alternative = _get_current_page(path, lang, pages)
+                if routing:
+                    current_page, alternative = routing.get_current_page(path, lang)
+                else:
+                    current_page, alternative = _get_current_page(path, lang, pages)
                 if settings.CMS_APPLICATIONS_URLS:
                     # check if it should'nt point to some application, if yes,
                     # change current page if required
-                    current_page = applications_page_check(request, current_page, path)
+                    current_page = applications_page_check(request, current_page, path, routing)
                 if not current_page:
                     if alternative and settings.CMS_LANGUAGE_FALLBACK:
                         return HttpResponseRedirect(alternative)
@@ -70,7 +87,7 @@ def details(request, page_id=None, slug=None, template_name=settings.CMS_TEMPLAT
                     else:
                         raise Http404('CMS: Page not found for "%s"' % slug)
         else:
-            current_page = applications_page_check(request)
+            current_page = applications_page_check(request, routing=routing)
             #current_page = None
         template_name = get_template_from_request(request, current_page)
     elif not no404:
@@ -175,6 +175,15 @@ class Template(object):
 
     def render(self, context):
         "Display stage -- can be called many times"
+        render_context = context.render_context
+        context.render_context = {}
+        try:
+            return self._render(context)
+        finally:
+            context.render_context = render_context
+
+    def _render(self, context):
+        "Renders the nodes with render_context of the caller, used by includes"
         return self.nodelist.render(context)
 
 def compile_string(template_string, origin):
@@ -709,42 +718,60 @@ class Variable(object):
         """
         current = context
         for bit in self.lookups:
+            # Objects which don't support indexing at all, like most model
+            # instances, would raise and catch an exception in the dictionary
+            # lookup for every attribute, so remember their types and skip it.
+            if type(current) in _unsubscriptable_types:
+                current = _resolve_attribute(current, bit)
+                continue
             try: # dictionary lookup
                 current = current[bit]
             except (TypeError, AttributeError, KeyError):
-                try: # attribute lookup
-                    current = getattr(current, bit)
-                    if callable(current):
-                        if getattr(current, 'alters_data', False):
-                            current = settings.TEMPLATE_STRING_IF_INVALID
-                        else:
-                            try: # method call (assuming no args required)
-                                current = current()
-                            except TypeError: # arguments *were* required
-                                # GOTCHA: This will also catch any TypeError
-                                # raised in the function itself.
-                                current = settings.TEMPLATE_STRING_IF_INVALID # invalid method call
-                            except Exception, e:
-                                if getattr(e, 'silent_variable_failure', False):
-                                    current = settings.TEMPLATE_STRING_IF_INVALID
-                                else:
-                                    raise
-                except (TypeError, AttributeError):
-                    try: # list-index lookup
-                        current = current[int(bit)]
-                    except (IndexError, # list index out of range
-                            ValueError, # invalid literal for int()
-                            KeyError,   # current is a dict without `int(bit)` key
-                            TypeError,  # unsubscriptable object
-                            ):
-                        raise VariableDoesNotExist("Failed lookup for key [%s] in %r", (bit, current)) # missing attribute
+                if not hasattr(type(current), '__getitem__'):
+                    _unsubscriptable_types.add(type(current))
+                current = _resolve_attribute(current, bit)
+
+        return current
+
+# Types whose instances don't support indexing. Instances of old-style classes
+# look up __getitem__ on the instance, but their common type has it, so they
+# are never added.
+_unsubscriptable_types = set()
+
+def _resolve_attribute(current, bit):
+    "Looks up the attribute ``bit`` of ``current``, or the list index."
+    try: # attribute lookup
+        current = getattr(current, bit)
+        if callable(current):
+            if getattr(current, 'alters_data', False):
+                current = settings.TEMPLATE_STRING_IF_INVALID
+            else:
+                try: # method call (assuming no args required)
+                    current = current()
+                except TypeError: # arguments *were* required
+                    # GOTCHA: This will also catch any TypeError
+                    # raised in the function itself.
+                    current = settings.TEMPLATE_STRING_IF_INVALID # invalid method call
                 except Exception, e:
                     if getattr(e, 'silent_variable_failure', False):
                         current = settings.TEMPLATE_STRING_IF_INVALID
                     else:
                         raise
-
-        return current
+    except (TypeError, AttributeError):
+        try: # list-index lookup
+            current = current[int(bit)]
+        except (IndexError, # list index out of range
+                ValueError, # invalid literal for int()
+                KeyError,   # current is a dict without `int(bit)` key
+                TypeError,  # unsubscriptable object
+                ):
+            raise VariableDoesNotExist("Failed lookup for key [%s] in %r", (bit, current)) # missing attribute
+    except Exception, e:
+        if getattr(e, 'silent_variable_failure', False):
+            current = settings.TEMPLATE_STRING_IF_INVALID
+        else:
+            raise
+    return current
 
 class Node(object):
     # Set this to True for nodes that must be first in the template (although
@@ -13,6 +13,9 @@ class Context(object):
         dict_ = dict_ or {}
         self.dicts = [dict_]
         self.autoescape = autoescape
+        # State of the nodes for the template being rendered, which can't be
+        # kept on the nodes as compiled templates may be cached and reused.
+        self.render_context = {}
 
     def __repr__(self):
         return repr(self.dicts)
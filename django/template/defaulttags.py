@@ -39,11 +39,13 @@ class CommentNode(Node):
 
 class CycleNode(Node):
     def __init__(self, cyclevars, variable_name=None):
-        self.cycle_iter = itertools_cycle(cyclevars)
+        self.cyclevars = cyclevars
         self.variable_name = variable_name
 
     def render(self, context):
-        value = self.cycle_iter.next().resolve(context)
+        if self not in context.render_context:
+            context.render_context[self] = itertools_cycle(self.cyclevars)
+        value = context.render_context[self].next().resolve(context)
         if self.variable_name:
             context[self.variable_name] = value
         return value
@@ -166,13 +168,12 @@ class ForNode(Node):
 class IfChangedNode(Node):
     def __init__(self, nodelist_true, nodelist_false, *varlist):
         self.nodelist_true, self.nodelist_false = nodelist_true, nodelist_false
-        self._last_seen = None
         self._varlist = varlist
         self._id = str(id(self))
 
     def render(self, context):
         if 'forloop' in context and self._id not in context['forloop']:
-            self._last_seen = None
+            context.render_context[self] = None
             context['forloop'][self._id] = 1
         try:
             if self._varlist:
@@ -184,9 +185,8 @@ class IfChangedNode(Node):
         except VariableDoesNotExist:
             compare_to = None
 
-        if compare_to != self._last_seen:
-            firstloop = (self._last_seen == None)
-            self._last_seen = compare_to
+        if compare_to != context.render_context.get(self):
+            context.render_context[self] = compare_to
             content = self.nodelist_true.render(context)
             return content
         elif self.nodelist_false:
@@ -41,7 +41,25 @@ def make_origin(display_name, loader, name, dirs):
     else:
         return None
 
-def find_template_source(name, dirs=None):
+def find_template_loader(path):
+    "Imports the template source loader with the given dotted path."
+    i = path.rfind('.')
+    module, attr = path[:i], path[i+1:]
+    try:
+        mod = import_module(module)
+    except ImportError, e:
+        raise ImproperlyConfigured, 'Error importing template source loader %s: "%s"' % (module, e)
+    try:
+        func = getattr(mod, attr)
+    except AttributeError:
+        raise ImproperlyConfigured, 'Module "%s" does not define a "%s" callable template source loader' % (module, attr)
+    if not func.is_usable:
+        import warnings
+        warnings.warn("Your TEMPLATE_LOADERS setting includes %r, but your Python installation doesn't support that type of template loading. Consider removing that line from TEMPLATE_LOADERS." % path)
+        return None
+    return func
+
+def get_template_source_loaders():
     # Calculate template_source_loaders the first time the function is executed
     # because putting this logic in the module-level namespace may cause
     # circular import errors. See Django ticket #1292.
@@ -49,23 +67,14 @@ def find_template_source(name, dirs=None):
     if template_source_loaders is None:
         loaders = []
         for path in settings.TEMPLATE_LOADERS:
-            i = path.rfind('.')
-            module, attr = path[:i], path[i+1:]
-            try:
-                mod = import_module(module)
-            except ImportError, e:
-                raise ImproperlyConfigured, 'Error importing template source loader %s: "%s"' % (module, e)
-            try:
-                func = getattr(mod, attr)
-            except AttributeError:
-                raise ImproperlyConfigured, 'Module "%s" does not define a "%s" callable template source loader' % (module, attr)
-            if not func.is_usable:
-                import warnings
-                warnings.warn("Your TEMPLATE_LOADERS setting includes %r, but your Python installation doesn't support that type of template loading. Consider removing that line from TEMPLATE_LOADERS." % path)
-            else:
+            func = find_template_loader(path)
+            if func is not None:
                 loaders.append(func)
         template_source_loaders = tuple(loaders)
-    for loader in template_source_loaders:
+    return template_source_loaders
+
+def find_template_source(name, dirs=None):
+    for loader in get_template_source_loaders():
         try:
             source, display_name = loader(name, dirs)
             return (source, make_origin(display_name, loader, name, dirs))
@@ -73,14 +82,34 @@ def find_template_source(name, dirs=None):
             pass
     raise TemplateDoesNotExist, name
 
+def find_template(name, dirs=None):
+    """
+    Returns a compiled Template object for the given template name.
+
+    Loaders which keep compiled templates have a "load_template" attribute,
+    which returns the template, or None if the loader doesn't have it. It is
+    used instead of compiling the source returned by the loader.
+    """
+    for loader in get_template_source_loaders():
+        load_template = getattr(loader, 'load_template', None)
+        if load_template is not None:
+            template = load_template(name, dirs)
+            if template is not None:
+                return template
+            continue
+        try:
+            source, display_name = loader(name, dirs)
+        except TemplateDoesNotExist:
+            continue
+        return get_template_from_string(source, make_origin(display_name, loader, name, dirs), name)
+    raise TemplateDoesNotExist, name
+
 def get_template(template_name):
     """
     Returns a compiled Template object for the given template name,
     handling template inheritance recursively.
     """
-    source, origin = find_template_source(template_name)
-    template = get_template_from_string(source, origin, template_name)
-    return template
+    return find_template(template_name)
 
 def get_template_from_string(source, origin=None, name=None):
     """
@@ -50,9 +50,12 @@ class ExtendsNode(Node):
         return '<ExtendsNode: extends "%s">' % self.parent_name
 
     def get_parent(self, context):
+        # Don't store the resolved name on the node, which may be shared by
+        # concurrent renderings of a cached template.
         if self.parent_name_expr:
-            self.parent_name = self.parent_name_expr.resolve(context)
-        parent = self.parent_name
+            parent = self.parent_name_expr.resolve(context)
+        else:
+            parent = self.parent_name
         if not parent:
             error_msg = "Invalid template name in 'extends' tag: %r." % parent
             if self.parent_name_expr:
@@ -98,17 +101,30 @@ class ExtendsNode(Node):
 
 class ConstantIncludeNode(Node):
     def __init__(self, template_path):
+        self.template_path = template_path
+        self.template = self.get_template()
+
+    def get_template(self):
         try:
-            t = get_template(template_path)
-            self.template = t
+            return get_template(self.template_path)
         except:
             if settings.TEMPLATE_DEBUG:
                 raise
-            self.template = None
+            return None
 
     def render(self, context):
-        if self.template:
-            return self.template.render(context)
+        if settings.DEBUG:
+            # The including template may be cached, so look the template up
+            # again in every rendering to notice the changes to it.
+            if self not in context.render_context:
+                context.render_context[self] = self.get_template()
+            template = context.render_context[self]
+        else:
+            template = self.template
+        if template:
+            # Included template shares the render_context of the including
+            # one, e.g. with {% cycle %} in a loop around the include.
+            return template._render(context)
         else:
             return ''
 
@@ -120,7 +136,7 @@ class IncludeNode(Node):
         try:
             template_name = self.template_name.resolve(context)
             t = get_template(template_name)
-            return t.render(context)
+            return t._render(context)
         except TemplateSyntaxError, e:
             if settings.TEMPLATE_DEBUG:
                 raise
@@ -0,0 +1,96 @@
+"""
+Wrapper for loading templates through the loaders listed in the
+CACHED_TEMPLATE_LOADERS setting, which keeps the compiled templates in memory
+for the life of the process.
+
+When DEBUG is on, a template is compiled again if its file was modified since
+it was cached.
+"""
+
+import os
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+
+# Both map (template_name, template_dirs) to the cached value and the
+# modification time of the template file.
+template_cache = {}
+source_cache = {}
+
+cached_loaders = None
+
+def get_cached_loaders():
+    global cached_loaders
+    if cached_loaders is None:
+        from django.template.loader import find_template_loader
+        loaders = []
+        for path in settings.CACHED_TEMPLATE_LOADERS:
+            func = find_template_loader(path)
+            if func is not None:
+                loaders.append(func)
+        cached_loaders = tuple(loaders)
+    return cached_loaders
+
+def reset():
+    "Forgets all the cached templates."
+    template_cache.clear()
+    source_cache.clear()
+
+def get_mtime(display_name):
+    try:
+        return os.path.getmtime(display_name)
+    except OSError:
+        # Not loaded from a file, e.g. from an egg.
+        return None
+
+def get_cached(cache, key):
+    try:
+        value, display_name, mtime = cache[key]
+    except KeyError:
+        return None
+    if settings.DEBUG and get_mtime(display_name) != mtime:
+        return None
+    return value
+
+def find_template_source(template_name, template_dirs=None):
+    """
+    Returns the source and display name of the template, as well as the
+    wrapped loader which found it.
+    """
+    key = (template_name, tuple(template_dirs or ()))
+    cached = get_cached(source_cache, key)
+    if cached is not None:
+        return cached
+    for loader in get_cached_loaders():
+        try:
+            source, display_name = loader(template_name, template_dirs)
+        except TemplateDoesNotExist:
+            continue
+        result = (source, display_name, loader)
+        source_cache[key] = (result, display_name, get_mtime(display_name))
+        return result
+    raise TemplateDoesNotExist, template_name
+
+def load_template_source(template_name, template_dirs=None):
+    source, display_name, loader = find_template_source(template_name, template_dirs)
+    return (source, display_name)
+load_template_source.is_usable = True
+
+def load_template(template_name, template_dirs=None):
+    """
+    Returns the compiled template, compiling it only the first time it is
+    asked for, or None if none of the wrapped loaders has it.
+    """
+    from django.template.loader import get_template_from_string, make_origin
+    key = (template_name, tuple(template_dirs or ()))
+    template = get_cached(template_cache, key)
+    if template is None:
+        try:
+            source, display_name, loader = find_template_source(template_name, template_dirs)
+        except TemplateDoesNotExist:
+            return None
+        origin = make_origin(display_name, loader, template_name, template_dirs)
+        template = get_template_from_string(source, origin, template_name)
+        template_cache[key] = (template, display_name, get_mtime(display_name))
+    return template
+load_template_source.load_template = load_template
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import re
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models.base import ModelBase
-from django.utils.encoding import force_unicode
+from django.utils.encoding import force_unicode, smart_str
+from django.utils.hashcompat import md5_constructor
 from haystack.constants import VALID_FILTERS, FILTER_SEPARATOR
 from haystack.exceptions import SearchBackendError
 try:
@@ -64,6 +67,22 @@ class BaseSearchBackend(object):
         """
         raise NotImplementedError
 
+    def update_batch(self, updates, removes):
+        """
+        Applies a batch of queued changes. ``updates`` is a list of
+        ``(SearchIndex, objects)`` pairs to update and ``removes`` a list of
+        identifiers to remove.
+
+        Backends which can write all the changes at once with a single commit
+        should override this. By default, it falls back to ``update`` and
+        ``remove``.
+        """
+        for index, objects in updates:
+            self.update(index, objects)
+
+        for identifier in removes:
+            self.remove(identifier)
+
     def clear(self, models=[]):
         """
         Clears the backend of all documents/objects for a collection of models.
@@ -106,6 +125,16 @@ class BaseSearchBackend(object):
         specific to each one.
         """
         raise NotImplementedError("Subclasses must provide a way to fetch similar record via the 'more_like_this' method if supported by the backend.")
+    
+    def index_generation(self):
+        """
+        Returns a value which changes every time the index is committed to, or
+        ``None`` if the backend can't tell.
+        
+        Search results are only cached for backends which provide it, as it
+        is part of the cache key.
+        """
+        return None
 
 
 # Alias for easy loading within SearchQuery objects.
@@ -238,7 +267,7 @@ class BaseSearchQuery(object):
     def run(self):
         """Builds and executes the query. Returns a list of search results."""
         final_query = self.build_query()
-        results = self.backend.search(final_query, highlight=self.highlight)
+        results = self._search(final_query, highlight=self.highlight)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = results.get('facets', {})
@@ -292,6 +321,55 @@ class BaseSearchQuery(object):
         
         return self._spelling_suggestion
     
+    def _search(self, query_string, **kwargs):
+        """
+        Passes the query to the backend's ``search``, going through the result
+        cache if ``HAYSTACK_RESULT_CACHE_TIMEOUT`` is set.
+        
+        The results are cached in the Django cache for that many seconds under
+        a key made of the query, the search arguments (ordering, slice,
+        narrowing etc.) and the generation of the index, so that any commit to
+        the index makes the old entries unreachable.
+        """
+        timeout = getattr(settings, 'HAYSTACK_RESULT_CACHE_TIMEOUT', 0)
+        
+        if not timeout:
+            return self.backend.search(query_string, **kwargs)
+        
+        generation = self.backend.index_generation()
+        
+        if generation is None:
+            return self.backend.search(query_string, **kwargs)
+        
+        key = self._result_cache_key(query_string, kwargs, generation)
+        results = cache.get(key)
+        
+        if results is None:
+            results = self.backend.search(query_string, **kwargs)
+            
+            # Backends may return the results lazily. Only keep them if there
+            # are few enough to be worth reading them all in advance.
+            if len(results.get('results', [])) <= getattr(settings, 'HAYSTACK_RESULT_CACHE_MAX_RESULTS', 100):
+                results = dict(results)
+                results['results'] = list(results.get('results', []))
+                cache.set(key, results, timeout)
+        
+        return results
+    
+    def _result_cache_key(self, query_string, kwargs, generation):
+        arguments = []
+        
+        for name, value in sorted(kwargs.items()):
+            if isinstance(value, (set, frozenset)):
+                value = sorted(value)
+            elif isinstance(value, dict):
+                value = sorted(value.items())
+            
+            arguments.append((name, value))
+        
+        key = repr((self.backend.__class__.__module__, generation, smart_str(query_string), arguments))
+        return 'haystack.results.%s' % md5_constructor(key).hexdigest()
+    
     
     # Methods for backends to implement.
     
@@ -357,12 +435,21 @@ class BaseSearchQuery(object):
         self.models.add(model)
     
     def set_limits(self, low=None, high=None):
-        """Restricts the query by altering either the start, end or both offsets."""
+        """
+        Restricts the query by altering either the start, end or both offsets.
+        
+        Results fetched for other offsets are dropped, the hit count is kept.
+        """
+        limits = (self.start_offset, self.end_offset)
+        
         if low is not None:
             self.start_offset = int(low)
         
         if high is not None:
             self.end_offset = int(high)
+        
+        if (self.start_offset, self.end_offset) != limits:
+            self._results = None
     
     def clear_limits(self):
         """Clears any existing limits."""
@@ -379,7 +466,7 @@ class BaseSearchQuery(object):
         This method does not affect the internal state of the SearchQuery used
         to build queries. It does however populate the results/hit_count.
         """
-        results = self.backend.search(query_string, **kwargs)
+        results = self._search(query_string, **kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
     
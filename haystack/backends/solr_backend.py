@@ -312,7 +312,7 @@ class SearchQuery(BaseSearchQuery):
         if self.narrow_queries:
             kwargs['narrow_queries'] = self.narrow_queries
         
-        results = self.backend.search(final_query, **kwargs)
+        results = self._search(final_query, **kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = results.get('facets', {})
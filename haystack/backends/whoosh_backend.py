@@ -4,7 +4,6 @@ import re
 import warnings
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models.loading import get_model
 from django.utils.encoding import force_unicode
 from haystack.backends import BaseSearchBackend, BaseSearchQuery
 from haystack.exceptions import MissingDependency, SearchBackendError
@@ -14,8 +13,11 @@ try:
     from whoosh.analysis import StemmingAnalyzer
     from whoosh.fields import Schema, ID, STORED, TEXT, KEYWORD
     import whoosh.index as index
+    from whoosh.index import create_in, open_dir
     from whoosh.qparser import QueryParser
+    from whoosh.query import AndNot, Or, Require, Term
     from whoosh.spelling import SpellChecker
+    from whoosh.writing import NO_MERGE
 except ImportError:
     raise MissingDependency("The 'whoosh' backend requires the installation of 'Whoosh'. Please refer to the documentation.")
 
@@ -23,6 +25,52 @@ except ImportError:
 DATETIME_REGEX = re.compile('^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})T(?P<hour>\d{2}):(?P<minute>\d{2}):(?P<second>\d{2})(\.\d{3,6}Z?)?$')
 
 
+class WhooshSearchResults(object):
+    """
+    A list of search results, which reads hits from the index and converts
+    them to ``SearchResult`` objects only when they are accessed.
+    """
+    def __init__(self, backend, raw_results, start=0, stop=None, highlight=False, query_string=''):
+        self.backend = backend
+        self.raw_results = raw_results
+        self.start = min(start, raw_results.scored_length())
+        
+        if stop is None or stop > raw_results.scored_length():
+            stop = raw_results.scored_length()
+        
+        self.stop = max(stop, self.start)
+        self.highlight = highlight
+        self.query_string = query_string
+        self._cache = {}
+    
+    def __len__(self):
+        return self.stop - self.start
+    
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+    
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in xrange(*k.indices(len(self)))]
+        
+        if k < 0:
+            k += len(self)
+        
+        if not 0 <= k < len(self):
+            raise IndexError("list index out of range")
+        
+        if k not in self._cache:
+            self._cache[k] = self.backend._process_result(self.raw_results, self.start + k,
+                                                          highlight=self.highlight,
+                                                          query_string=self.query_string)
+        
+        return self._cache[k]
+    
+    def __repr__(self):
+        return repr(list(self))
+
+
 class SearchBackend(BaseSearchBackend):
     # Word reserved by Whoosh for special use.
     RESERVED_WORDS = (
@@ -57,7 +105,9 @@ class SearchBackend(BaseSearchBackend):
             os.makedirs(settings.HAYSTACK_WHOOSH_PATH)
             new_index = True
         
-        self.storage = store.FileStorage(settings.HAYSTACK_WHOOSH_PATH)
+        self.storage = store.FileStorage(settings.HAYSTACK_WHOOSH_PATH,
+                                         mapped=getattr(settings, 'HAYSTACK_WHOOSH_MAPPED', False))
+        self._spell_checker = None
         self.content_field_name, fields = self.site.build_unified_schema()
         self.schema = self.build_schema(fields)
         self.parser = QueryParser(self.content_field_name, schema=self.schema)
@@ -103,33 +153,125 @@ class SearchBackend(BaseSearchBackend):
         return Schema(**schema_fields)
 
     def update(self, index, iterable, commit=True):
+        self.update_batch([(index, iterable)], [])
+
+    def update_batch(self, updates, removes):
         if not self.setup_complete:
             self.setup()
         
+        old_segments = set([segment.name for segment in self.index.segments])
+        
+        # Use one writer for the whole batch, so it ends up in one segment
+        # and the index is locked and committed only once.
         writer = self.index.writer()
         
-        for obj in iterable:
-            doc = {}
-            doc['id'] = force_unicode(self.get_identifier(obj))
-            doc['django_ct'] = force_unicode("%s.%s" % (obj._meta.app_label, obj._meta.module_name))
-            doc['django_id'] = force_unicode(obj.pk)
-            other_data = index.prepare(obj)
-            
-            # Really make sure it's unicode, because Whoosh won't have it any
-            # other way.
-            for key in other_data:
-                other_data[key] = self._from_python(other_data[key])
-            
-            doc.update(other_data)
-            writer.update_document(**doc)
+        if removes:
+            # The writer only opens the searcher used to find the deleted
+            # documents by itself for update_document.
+            writer.searcher()
+        
+        for identifier in removes:
+            writer.delete_by_term('id', force_unicode(self.get_identifier(identifier)))
+        
+        for index, iterable in updates:
+            for obj in iterable:
+                writer.update_document(**self._prepare_document(index, obj))
         
         # For now, commit no matter what, as we run into locking issues otherwise.
         writer.commit()
-        
-        # If spelling support is desired, add to the dictionary.
+        self._update_spelling(old_segments)
+    
+    def _prepare_document(self, index, obj):
+        doc = {}
+        doc['id'] = force_unicode(self.get_identifier(obj))
+        doc['django_ct'] = force_unicode("%s.%s" % (obj._meta.app_label, obj._meta.module_name))
+        doc['django_id'] = force_unicode(obj.pk)
+        other_data = index.prepare(obj)
+        
+        # Really make sure it's unicode, because Whoosh won't have it any
+        # other way.
+        for key in other_data:
+            other_data[key] = self._from_python(other_data[key])
+        
+        doc.update(other_data)
+        return doc
+    
+    def _update_spelling(self, old_segments):
+        # If spelling support is desired, add to the dictionary. Only the
+        # segments written by the last commit can contain new words.
         if getattr(settings, 'HAYSTACK_INCLUDE_SPELLING', False) is True:
-            sp = SpellChecker(self.storage)
-            sp.add_field(self.index, self.content_field_name)
+            new_segments = [segment for segment in self.index.segments
+                            if segment.name not in old_segments]
+            self.spell_checker().add_field(self.index, self.content_field_name,
+                                           segments=new_segments)
+    
+    def write_partial_index(self, index, iterable, path):
+        """
+        Writes the documents for the given objects into a new, separate index
+        in the ``path`` directory, as a single segment. Returns the list of
+        the identifiers of the written documents.
+        
+        Used by the ``reindex`` command to index with several processes. The
+        partial indexes are then added to the main one with
+        ``merge_partial_indexes``.
+        """
+        # Workers run concurrently, so don't let them create the main index.
+        if self.setup_complete:
+            schema = self.schema
+        else:
+            schema = self.build_schema(self.site.build_unified_schema()[1])
+        
+        if not os.path.exists(path):
+            os.makedirs(path)
+        
+        partial_index = create_in(path, schema)
+        writer = partial_index.writer()
+        identifiers = []
+        
+        try:
+            for obj in iterable:
+                doc = self._prepare_document(index, obj)
+                writer.add_document(**doc)
+                identifiers.append(doc['id'])
+        except:
+            writer.cancel()
+            raise
+        
+        writer.commit(NO_MERGE)
+        partial_index.close()
+        return identifiers
+    
+    def merge_partial_indexes(self, paths, identifiers):
+        """
+        Adds the documents of the partial indexes written by
+        ``write_partial_index`` to the main index with a single commit,
+        replacing the existing documents with the given identifiers.
+        """
+        if not self.setup_complete:
+            self.setup()
+        
+        old_segments = set([segment.name for segment in self.index.segments])
+        writer = self.index.writer()
+        
+        try:
+            if self.index.doc_count_all():
+                writer.searcher()
+                
+                for identifier in identifiers:
+                    writer.delete_by_term('id', identifier)
+            
+            # The segments are added as they are, without merging their
+            # postings again.
+            for path in paths:
+                partial_index = open_dir(path)
+                writer.add_segments(partial_index)
+                partial_index.close()
+        except:
+            writer.cancel()
+            raise
+        
+        writer.commit()
+        self._update_spelling(old_segments)
 
     def remove(self, obj_or_string, commit=True):
         if not self.setup_complete:
@@ -178,6 +320,34 @@ class SearchBackend(BaseSearchBackend):
         
         self.index.optimize()
 
+    def index_generation(self):
+        """
+        Returns the latest generation of the index along with the time it was
+        written, so that an index which was deleted and created again doesn't
+        reuse the generations of the old one.
+        """
+        if self.setup_complete:
+            storage = self.storage
+        elif os.path.exists(settings.HAYSTACK_WHOOSH_PATH):
+            # Opening the index costs about as much as a search, so only
+            # look at the file names.
+            storage = store.FileStorage(settings.HAYSTACK_WHOOSH_PATH)
+        else:
+            return None
+        
+        generation = index.latest_generation(storage)
+        
+        if generation < 0:
+            return None
+        
+        try:
+            modified = storage.file_modified("_%s_%s.toc" % (index._DEF_INDEX_NAME, generation))
+        except OSError:
+            # Cleaned up by a concurrent commit; don't cache this time.
+            return None
+        
+        return (generation, modified)
+
     def search(self, query_string, sort_by=None, start_offset=0, end_offset=None,
                fields='', highlight=False, facets=None, date_facets=None, query_facets=None,
                narrow_queries=None, **kwargs):
@@ -242,20 +412,6 @@ class SearchBackend(BaseSearchBackend):
         if query_facets is not None:
             warnings.warn("Whoosh does not handle query faceting.", Warning, stacklevel=2)
         
-        narrowed_results = None
-        
-        if narrow_queries is not None:
-            # Potentially expensive? I don't see another way to do it in Whoosh...
-            narrow_searcher = self.index.searcher()
-            
-            for nq in narrow_queries:
-                recent_narrowed_results = narrow_searcher.search(self.parser.parse(nq))
-                
-                if narrowed_results:
-                    narrowed_results.filter(recent_narrowed_results)
-                else:
-                   narrowed_results = recent_narrowed_results
-        
         if self.index.doc_count:
             searcher = self.index.searcher()
             parsed_query = self.parser.parse(query_string)
@@ -267,14 +423,33 @@ class SearchBackend(BaseSearchBackend):
                     'hits': 0,
                 }
             
-            # DRL_TODO: Ignoring offsets for now, as slicing caused issues with pagination.
-            raw_results = searcher.search(parsed_query, sortedby=sort_by, reverse=reverse)
+            # Narrow and drop documents of models which aren't indexed any
+            # more inside the query itself, so the hit count is right
+            # and only the requested hits need to be scored and loaded.
+            if narrow_queries is not None:
+                for nq in narrow_queries:
+                    narrow_query = self.parser.parse(nq)
+                    
+                    if narrow_query is not None:
+                        parsed_query = Require([parsed_query, narrow_query])
+            
+            excluded_query = self._get_excluded_query(searcher)
             
-            # Handle the case where the results have been narrowed.
-            if narrowed_results:
-                raw_results.filter(narrowed_results)
+            if excluded_query is not None:
+                parsed_query = AndNot(parsed_query, excluded_query)
             
-            return self._process_results(raw_results, highlight=highlight, query_string=query_string)
+            search_kwargs = {
+                'sortedby': sort_by,
+                'reverse': reverse,
+            }
+            
+            if end_offset is not None:
+                # Whoosh keeps only the best ``limit`` hits.
+                search_kwargs['limit'] = start_offset + end_offset
+            
+            raw_results = searcher.search(parsed_query, **search_kwargs)
+            return self._process_results(raw_results, highlight=highlight, query_string=query_string,
+                                         start_offset=start_offset, end_offset=end_offset)
         else:
             if getattr(settings, 'HAYSTACK_INCLUDE_SPELLING', False):
                 spelling_suggestion = self.create_spelling_suggestion(query_string)
@@ -287,6 +462,22 @@ class SearchBackend(BaseSearchBackend):
                 'spelling_suggestion': spelling_suggestion,
             }
     
+    def _get_excluded_query(self, searcher):
+        """
+        Returns a query matching documents of models which aren't indexed by
+        the site, or ``None`` if there are no such documents.
+        """
+        from haystack import site
+        indexed = set(["%s.%s" % (model._meta.app_label, model._meta.module_name)
+                       for model in site.get_indexed_models()])
+        excluded = [Term('django_ct', django_ct) for django_ct in searcher.lexicon('django_ct')
+                    if django_ct not in indexed]
+        
+        if excluded:
+            return Or(excluded)
+        
+        return None
+    
     def more_like_this(self, model_instance):
         warnings.warn("Whoosh does not handle More Like This.", Warning, stacklevel=2)
         return {
@@ -294,69 +485,77 @@ class SearchBackend(BaseSearchBackend):
             'hits': 0,
         }
     
-    def _process_results(self, raw_results, highlight=False, query_string=''):
-        from haystack import site
-        results = []
-        hits = len(raw_results)
-        facets = {}
+    def _process_results(self, raw_results, highlight=False, query_string='', start_offset=0, end_offset=None):
+        """
+        Returns the hits from ``start_offset`` on, at most ``end_offset`` of
+        them. The hits are converted to ``SearchResult`` objects when they
+        are accessed.
+        """
         spelling_suggestion = None
-        indexed_models = site.get_indexed_models()
         
-        for doc_offset, raw_result in enumerate(raw_results):
-            raw_result = dict(raw_result)
-            app_label, model_name = raw_result['django_ct'].split('.')
-            additional_fields = {}
-            
-            for key, value in raw_result.items():
-                additional_fields[str(key)] = self._to_python(value)
-            
-            del(additional_fields['django_ct'])
-            del(additional_fields['django_id'])
-            
-            if highlight:
-                from whoosh import analysis
-                from whoosh.highlight import highlight, ContextFragmenter, UppercaseFormatter
-                sa = analysis.StemmingAnalyzer()
-                terms = [term.replace('*', '') for term in query_string.split()]
-                
-                # DRL_FIXME: Highlighting doesn't seem to work properly in testing.
-                additional_fields['highlighted'] = {
-                    self.content_field_name: [highlight(additional_fields.get(self.content_field_name), terms, sa, ContextFragmenter(terms), UppercaseFormatter())],
-                }
-            
-            # Requires Whoosh 0.1.20+.
-            if hasattr(raw_results, 'score'):
-                score = raw_results.score(doc_offset)
-            else:
-                score = None
-            
-            if score is None:
-                score = 0
-            
-            model = get_model(app_label, model_name)
-            
-            if model:
-                if model in indexed_models:
-                    result = SearchResult(app_label, model_name, raw_result['django_id'], score, **additional_fields)
-                    results.append(result)
-                else:
-                    hits -= 1
-            else:
-                hits -= 1
+        if end_offset is None:
+            stop = None
+        else:
+            stop = start_offset + end_offset
         
         if getattr(settings, 'HAYSTACK_INCLUDE_SPELLING', False) is True:
             spelling_suggestion = self.create_spelling_suggestion(query_string)
         
         return {
-            'results': results,
-            'hits': hits,
-            'facets': facets,
+            'results': WhooshSearchResults(self, raw_results, start_offset, stop,
+                                           highlight=highlight, query_string=query_string),
+            'hits': len(raw_results),
+            'facets': {},
             'spelling_suggestion': spelling_suggestion,
         }
     
+    def _process_result(self, raw_results, doc_offset, highlight=False, query_string=''):
+        """Converts the hit at ``doc_offset`` to a ``SearchResult``."""
+        raw_result = dict(raw_results[doc_offset])
+        app_label, model_name = raw_result['django_ct'].split('.')
+        additional_fields = {}
+        
+        for key, value in raw_result.items():
+            additional_fields[str(key)] = self._to_python(value)
+        
+        del(additional_fields['django_ct'])
+        del(additional_fields['django_id'])
+        
+        if highlight:
+            from whoosh import analysis
+            from whoosh.highlight import highlight, ContextFragmenter, UppercaseFormatter
+            sa = analysis.StemmingAnalyzer()
+            terms = [term.replace('*', '') for term in query_string.split()]
+            
+            # DRL_FIXME: Highlighting doesn't seem to work properly in testing.
+            additional_fields['highlighted'] = {
+                self.content_field_name: [highlight(additional_fields.get(self.content_field_name), terms, sa, ContextFragmenter(terms), UppercaseFormatter())],
+            }
+        
+        # Requires Whoosh 0.1.20+.
+        if hasattr(raw_results, 'score'):
+            score = raw_results.score(doc_offset)
+        else:
+            score = None
+        
+        if score is None:
+            score = 0
+        
+        return SearchResult(app_label, model_name, raw_result['django_id'], score, **additional_fields)
+    
+    def spell_checker(self):
+        """
+        Returns the spell checker of the index. It is kept for the life of
+        the backend, so its dictionary and searcher are opened only once.
+        """
+        if self._spell_checker is None:
+            self._spell_checker = SpellChecker(self.storage)
+        
+        return self._spell_checker
+    
     def create_spelling_suggestion(self, query_string):
         spelling_suggestion = None
-        sp = SpellChecker(self.storage)
+        sp = self.spell_checker()
         cleaned_query = query_string
         
         if not query_string:
@@ -549,7 +748,7 @@ class SearchQuery(BaseSearchQuery):
         if self.narrow_queries:
             kwargs['narrow_queries'] = self.narrow_queries
         
-        results = self.backend.search(final_query, **kwargs)
+        results = self._search(final_query, **kwargs)
         self._results = results.get('results', [])
         self._hit_count = results.get('hits', 0)
         self._facet_counts = results.get('facets', {})
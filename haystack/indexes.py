@@ -1,6 +1,7 @@
 from django.db.models import signals
 import haystack
 from haystack.fields import *
+from haystack.queue import queue, UPDATE, REMOVE
 
 
 class DeclarativeMetaclass(type):
@@ -112,17 +113,26 @@ class SearchIndex(object):
         """
         Update the index for a single object. Attached to the class's
         post-save hook.
+        
+        If ``HAYSTACK_QUEUE_PATH`` is set, the object is only queued, to be
+        indexed later by the ``process_search_queue`` command.
         """
         # Check to make sure we want to index this first.
         if self.should_update(instance):
-            self.backend.update(self, [instance])
+            if queue.enabled():
+                queue.enqueue(UPDATE, self.backend.get_identifier(instance))
+            else:
+                self.backend.update(self, [instance])
 
     def remove_object(self, instance, **kwargs):
         """
         Remove an object from the index. Attached to the class's 
         post-delete hook.
         """
-        self.backend.remove(instance)
+        if queue.enabled():
+            queue.enqueue(REMOVE, self.backend.get_identifier(instance))
+        else:
+            self.backend.remove(instance)
 
     def clear(self):
         """Clear the entire index."""
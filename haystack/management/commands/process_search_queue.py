@@ -0,0 +1,50 @@
+import time
+from optparse import make_option
+from django.conf import settings
+from django.core.management.base import NoArgsCommand, CommandError
+from django.db import reset_queries
+
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'HAYSTACK_BATCH_SIZE', 1000)
+
+
+class Command(NoArgsCommand):
+    help = "Indexes the objects queued by the save and delete signals."
+    option_list = NoArgsCommand.option_list + (
+        make_option('-b', '--batch-size', action='store', dest='batchsize',
+            default=DEFAULT_BATCH_SIZE, type='int',
+            help='Number of items to index with one commit.'
+        ),
+        make_option('-s', '--sleep', action='store', dest='sleep',
+            default=None, type='int',
+            help='Keep running, draining the queue every given number of seconds.'
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        # Cause the default site to load.
+        from haystack import handle_registrations
+        handle_registrations()
+
+        from haystack.queue import queue
+
+        if not queue.enabled():
+            raise CommandError("Set HAYSTACK_QUEUE_PATH to queue the index updates.")
+
+        verbosity = int(options.get('verbosity', 1))
+        batchsize = options.get('batchsize') or DEFAULT_BATCH_SIZE
+        sleep = options.get('sleep')
+
+        while True:
+            processed = queue.process(batch_size=batchsize)
+
+            if verbosity >= 1 and (processed or sleep is None):
+                print "Indexed %d queued objects." % processed
+
+            # Clear out the DB connections queries because it bloats up RAM.
+            reset_queries()
+
+            if sleep is None:
+                break
+
+            time.sleep(sleep)
@@ -1,13 +1,50 @@
 import datetime
+import os
+import shutil
+import tempfile
 from optparse import make_option
 from django.conf import settings
 from django.core.management.base import AppCommand, CommandError
-from django.db import reset_queries
+from django.db import connection, reset_queries
+from django.db.models import get_model
 from django.utils.encoding import smart_str
 
 
 DEFAULT_BATCH_SIZE = getattr(settings, 'HAYSTACK_BATCH_SIZE', 1000)
 DEFAULT_AGE = None
+DEFAULT_WORKERS = 1
+
+
+def iter_batches(qs, batchsize):
+    """
+    Yields the objects of the QuerySet, loading them ``batchsize`` at a time
+    so that the cache doesn't bloat up in memory.
+    """
+    total = qs.count()
+    
+    for start in range(0, total, batchsize):
+        for obj in qs.all()[start:start + batchsize]:
+            yield obj
+        
+        # Clear out the DB connections queries because it bloats up RAM.
+        reset_queries()
+
+
+def index_range(job):
+    """
+    Indexes the objects of a model with primary keys between ``first`` and
+    ``last`` into a partial index. Runs in a worker process.
+    """
+    from haystack import site
+    app_label, model_name, lookup_kwargs, first, last, batchsize, path = job
+    model = get_model(app_label, model_name)
+    index = site.get_index(model)
+    pk_name = model._meta.pk.name
+    lookup_kwargs = dict(lookup_kwargs)
+    lookup_kwargs['%s__gte' % pk_name] = first
+    lookup_kwargs['%s__lte' % pk_name] = last
+    qs = index.get_query_set().filter(**lookup_kwargs).order_by(pk_name)
+    return index.backend.write_partial_index(index, iter_batches(qs, batchsize), path)
 
 
 class Command(AppCommand):
@@ -21,6 +58,10 @@ class Command(AppCommand):
             default=DEFAULT_BATCH_SIZE, type='int',
             help='Number of items to index at once.'
         ),
+        make_option('-w', '--workers', action='store', dest='workers',
+            default=DEFAULT_WORKERS, type='int',
+            help='Number of processes to index with. The backend must support partial indexes.'
+        ),
     )
     
     # Django 1.0.X compatibility.
@@ -42,6 +83,7 @@ class Command(AppCommand):
         self.verbosity = int(options.get('verbosity', 1))
         self.batchsize = options.get('batchsize', DEFAULT_BATCH_SIZE)
         self.age = options.get('age', DEFAULT_AGE)
+        self.workers = options.get('workers', DEFAULT_WORKERS)
         
         if not apps:
             self.handle_app(None, **options)
@@ -82,6 +124,10 @@ class Command(AppCommand):
 
             if self.verbosity >= 1:
                 print "Indexing %d %s." % (total, smart_str(model._meta.verbose_name_plural))
+            
+            if self.workers > 1:
+                self.update_parallel(model, index, qs, extra_lookup_kwargs)
+                continue
 
             for start in range(0, total, self.batchsize):
                 end = min(start + self.batchsize, total)
@@ -96,3 +142,53 @@ class Command(AppCommand):
                 
                 # Clear out the DB connections queries because it bloats up RAM.
                 reset_queries()
+    
+    def update_parallel(self, model, index, qs, extra_lookup_kwargs):
+        """
+        Splits the objects into one range of primary keys per worker. Every
+        worker process writes its range into a partial index, and the partial
+        indexes are then merged into the main index with a single commit.
+        """
+        try:
+            from multiprocessing import Pool
+        except ImportError:
+            raise CommandError("Indexing with several workers requires the multiprocessing module.")
+        
+        if not hasattr(index.backend, 'merge_partial_indexes'):
+            raise CommandError("The search backend can't index with several workers.")
+        
+        pks = list(qs.values_list('pk', flat=True))
+        
+        if not pks:
+            return
+        
+        workers = min(self.workers, len(pks))
+        path = tempfile.mkdtemp(prefix='haystack-reindex-')
+        jobs = []
+        
+        for i in range(workers):
+            first = pks[len(pks) * i // workers]
+            last = pks[len(pks) * (i + 1) // workers - 1]
+            jobs.append((model._meta.app_label, model._meta.module_name, extra_lookup_kwargs,
+                         first, last, self.batchsize, os.path.join(path, str(i))))
+            
+            if self.verbosity >= 2:
+                print "  worker %d indexing pk %s to %s." % (i + 1, first, last)
+        
+        try:
+            # Every worker has to open its own database connection.
+            connection.close()
+            pool = Pool(workers)
+            
+            try:
+                identifiers = pool.map(index_range, jobs)
+            finally:
+                pool.terminate()
+            
+            if self.verbosity >= 2:
+                print "  merging the partial indexes."
+            
+            index.backend.merge_partial_indexes([job[-1] for job in jobs],
+                                                [identifier for part in identifiers for identifier in part])
+        finally:
+            shutil.rmtree(path, True)
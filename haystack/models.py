@@ -37,6 +37,14 @@ class SearchResult(object):
     def __getattr__(self, attr):
         return self.__dict__.get(attr, None)
 
+    def __getstate__(self):
+        """For pickling."""
+        return self.__dict__.copy()
+
+    def __setstate__(self, obj_dict):
+        """For unpickling."""
+        self.__dict__.update(obj_dict)
+
     def _get_object(self):
         if self._object is None:
             try:
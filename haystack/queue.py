@@ -0,0 +1,253 @@
+"""
+A persistent queue of pending index updates.
+
+When ``HAYSTACK_QUEUE_PATH`` is set, the save and delete signal handlers of
+``SearchIndex`` only append a line to the queue file instead of touching the
+search backend. The ``process_search_queue`` management command then drains
+the queue in batches, writing each batch with a single backend commit.
+
+Entries which can't be indexed are moved to the ``.rejected`` file next to the
+queue, in the same format, so they can be queued again by appending them to
+the queue file.
+"""
+import os
+import warnings
+from django.conf import settings
+from django.db.models import get_model
+from django.utils.encoding import smart_str, smart_unicode
+try:
+    import fcntl
+except ImportError:
+    # No advisory locking available. Appending is still atomic for short
+    # lines, but a concurrent drain may lose a line written at the same time.
+    fcntl = None
+
+
+UPDATE = 'update'
+REMOVE = 'remove'
+
+
+class SearchQueue(object):
+    """
+    Appends ``(action, identifier)`` entries to a file and reads them back
+    coalesced, so that an object saved many times is only indexed once.
+
+    The identifier is the one returned by ``SearchBackend.get_identifier``,
+    i.e. ``<app_label>.<model_name>.<pk>``.
+    """
+    def __init__(self, path=None):
+        self.path = path
+
+    def _get_path(self):
+        if self._path is None:
+            return getattr(settings, 'HAYSTACK_QUEUE_PATH', None)
+        return self._path
+
+    def _set_path(self, path):
+        self._path = path
+
+    path = property(_get_path, _set_path)
+
+    def enabled(self):
+        """Returns True if index updates should be queued."""
+        return bool(self.path)
+
+    def _processing_path(self):
+        return self.path + '.processing'
+
+    def _rejected_path(self):
+        return self.path + '.rejected'
+
+    def _open_locked(self):
+        """
+        Opens the queue file for appending and locks it. Makes sure the file
+        was not moved away by a drain while waiting for the lock.
+        """
+        while True:
+            f = open(self.path, 'ab')
+
+            if fcntl is None:
+                return f
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return f
+            except OSError:
+                pass
+
+            f.close()
+
+    def enqueue(self, action, identifier):
+        """Adds an entry to the end of the queue."""
+        f = self._open_locked()
+
+        try:
+            f.write("%s %s\n" % (action, smart_str(identifier)))
+        finally:
+            # Closing the file releases the lock as well.
+            f.close()
+
+    def _take(self):
+        """
+        Moves the queued entries out of the way of the signal handlers.
+
+        Entries left over from an interrupted drain are taken first, so that
+        they are not lost.
+        """
+        processing_path = self._processing_path()
+
+        if os.path.exists(processing_path) or not os.path.exists(self.path):
+            return processing_path
+
+        f = self._open_locked()
+
+        try:
+            os.rename(self.path, processing_path)
+        finally:
+            f.close()
+
+        return processing_path
+
+    def _read(self, path):
+        entries = []
+
+        if not os.path.exists(path):
+            return entries
+
+        f = open(path, 'rb')
+
+        try:
+            for line in f:
+                line = line.strip()
+
+                if line:
+                    parts = line.split(' ', 1)
+
+                    # Skip lines cut by a crash in the middle of a write.
+                    if len(parts) == 2 and parts[0] in (UPDATE, REMOVE):
+                        entries.append((parts[0], smart_unicode(parts[1])))
+        finally:
+            f.close()
+
+        return entries
+
+    def _coalesce(self, entries):
+        """
+        Keeps only the last action queued for every object, in the order of
+        those last actions.
+        """
+        last = {}
+
+        for position, (action, identifier) in enumerate(entries):
+            last[identifier] = (position, action)
+
+        result = [(position, action, identifier) for identifier, (position, action) in last.items()]
+        result.sort()
+        return [(action, identifier) for position, action, identifier in result]
+
+    def pending(self):
+        """
+        Returns the coalesced list of ``(action, identifier)`` entries which
+        are waiting for a drain.
+        """
+        return self._coalesce(self._read(self._processing_path()) + self._read(self.path))
+
+    def process(self, backend=None, site=None, batch_size=1000):
+        """
+        Drains the queue, passing up to ``batch_size`` objects at a time to
+        ``SearchBackend.update_batch``.
+
+        Objects queued for update which no longer exist are removed from the
+        index. Entries queued while the drain is running are left for the next
+        one. If a batch fails, its entries are indexed one by one and those
+        which fail again are rejected, so they can't block the queue.
+        Returns the number of processed entries.
+        """
+        if site is None:
+            from haystack import site
+
+        if backend is None:
+            from haystack import backend as backend_module
+            backend = backend_module.SearchBackend(site=site)
+
+        processing_path = self._take()
+        entries = self._coalesce(self._read(processing_path))
+
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+
+            try:
+                self._process_batch(backend, site, batch)
+            except Exception:
+                # Find the entries which can't be indexed, so that they don't
+                # block the others.
+                for entry in batch:
+                    try:
+                        self._process_batch(backend, site, [entry])
+                    except Exception, e:
+                        self._reject(entry, e)
+
+        if os.path.exists(processing_path):
+            os.remove(processing_path)
+
+        return len(entries)
+
+    def _reject(self, entry, error):
+        """Appends the entry which failed with the error to the reject file."""
+        action, identifier = entry
+        f = open(self._rejected_path(), 'ab')
+
+        try:
+            f.write("%s %s\n" % (action, smart_str(identifier)))
+        finally:
+            f.close()
+
+        warnings.warn("Failed to %s %s in the index, moved to %s: %s" % (
+            action, identifier, self._rejected_path(), error), Warning)
+
+    def _process_batch(self, backend, site, entries):
+        from haystack.exceptions import NotRegistered
+
+        # Group the objects to update by model, to load them in one query.
+        pks = {}
+        removes = []
+
+        for action, identifier in entries:
+            if action == UPDATE:
+                app_label, model_name, pk = identifier.split('.', 2)
+                pks.setdefault((app_label, model_name), []).append((pk, identifier))
+            else:
+                removes.append(identifier)
+
+        updates = []
+
+        for (app_label, model_name), model_pks in pks.items():
+            model = get_model(app_label, model_name)
+
+            try:
+                index = site.get_index(model)
+            except NotRegistered:
+                removes.extend([identifier for pk, identifier in model_pks])
+                continue
+
+            objects = dict([(smart_unicode(obj.pk), obj)
+                            for obj in model._default_manager.in_bulk([pk for pk, identifier in model_pks]).values()])
+            instances = []
+
+            for pk, identifier in model_pks:
+                obj = objects.get(pk)
+
+                if obj is not None:
+                    instances.append(obj)
+                else:
+                    removes.append(identifier)
+
+            if instances:
+                updates.append((index, instances))
+
+        backend.update_batch(updates, removes)
+
+
+queue = SearchQueue()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+from django.contrib.auth.models import User
+from django.test import TestCase
+from haystack.queue import SearchQueue, UPDATE, REMOVE
+
+
+class MockSite(object):
+    def get_index(self, model):
+        return 'index'
+
+
+class MockBackend(object):
+    """Records the identifiers of every batch, fails for the given ones."""
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.batches = []
+
+    def update_batch(self, updates, removes):
+        identifiers = list(removes)
+
+        for index, instances in updates:
+            identifiers.extend(["auth.user.%s" % obj.pk for obj in instances])
+
+        for identifier in identifiers:
+            if identifier in self.fail:
+                raise ValueError("Can't index %s." % identifier)
+
+        self.batches.append(sorted(identifiers))
+
+
+class SearchQueueTestCase(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.queue = SearchQueue(os.path.join(self.dir, 'queue'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def lines(self, path):
+        if not os.path.exists(path):
+            return []
+        return open(path).read().splitlines()
+
+    def test_coalesce(self):
+        for action, identifier in ((UPDATE, 'auth.user.1'), (UPDATE, 'auth.user.2'),
+                                   (UPDATE, 'auth.user.1'), (REMOVE, 'auth.user.2'),
+                                   (UPDATE, 'auth.user.3'), (UPDATE, 'auth.user.2')):
+            self.queue.enqueue(action, identifier)
+
+        self.assertEqual(self.queue.pending(), [
+            (UPDATE, u'auth.user.1'),
+            (UPDATE, u'auth.user.3'),
+            (UPDATE, u'auth.user.2'),
+        ])
+
+    def test_take(self):
+        self.queue.enqueue(REMOVE, 'auth.user.1')
+        processing_path = self.queue._take()
+        self.assertFalse(os.path.exists(self.queue.path))
+
+        # Entries queued during a drain go to a new file, for the next one.
+        self.queue.enqueue(REMOVE, 'auth.user.2')
+        self.assertEqual(self.lines(processing_path), ['remove auth.user.1'])
+        self.assertEqual(self.lines(self.queue.path), ['remove auth.user.2'])
+
+        backend = MockBackend()
+        self.assertEqual(self.queue.process(backend=backend, site=MockSite()), 1)
+        self.assertEqual(self.queue.process(backend=backend, site=MockSite()), 1)
+        self.assertEqual(backend.batches, [['auth.user.1'], ['auth.user.2']])
+        self.assertEqual(self.queue.pending(), [])
+
+    def test_lock_handoff(self):
+        self.queue.enqueue(REMOVE, 'auth.user.1')
+        # Hold the lock like _take does, while another writer waits for it.
+        f = self.queue._open_locked()
+        writer = threading.Thread(target=self.queue.enqueue, args=(REMOVE, 'auth.user.2'))
+        writer.start()
+        processing_path = self.queue._processing_path()
+        os.rename(self.queue.path, processing_path)
+        f.close()
+        writer.join(5)
+
+        self.assertFalse(writer.isAlive())
+        self.assertEqual(self.lines(processing_path), ['remove auth.user.1'])
+        self.assertEqual(self.lines(self.queue.path), ['remove auth.user.2'])
+
+    def test_failure(self):
+        users = [User.objects.create(username='user%d' % i) for i in range(3)]
+        bad = 'auth.user.%s' % users[1].pk
+
+        for user in users:
+            self.queue.enqueue(UPDATE, 'auth.user.%s' % user.pk)
+
+        self.queue.enqueue(REMOVE, 'auth.user.999')
+        backend = MockBackend(fail=[bad])
+        warnings.simplefilter('ignore')
+
+        try:
+            self.assertEqual(self.queue.process(backend=backend, site=MockSite(), batch_size=10), 4)
+        finally:
+            warnings.resetwarnings()
+
+        # The good entries are indexed one by one after the batch failed.
+        self.assertEqual(sorted(backend.batches), sorted([
+            ['auth.user.%s' % users[0].pk],
+            ['auth.user.%s' % users[2].pk],
+            ['auth.user.999'],
+        ]))
+        self.assertEqual(self.lines(self.queue._rejected_path()), ['update %s' % bad])
+        self.assertFalse(os.path.exists(self.queue._processing_path()))
+
+        # The rejected entry doesn't block the queue.
+        self.queue.enqueue(REMOVE, 'auth.user.1000')
+        self.assertEqual(self.queue.process(backend=backend, site=MockSite()), 1)
+        self.assertEqual(backend.batches[-1], ['auth.user.1000'])
+
+    def test_broken_line(self):
+        self.queue.enqueue(REMOVE, 'auth.user.1')
+        f = open(self.queue.path, 'ab')
+        f.write('upd')
+        f.close()
+        self.assertEqual(self.queue.pending(), [(REMOVE, u'auth.user.1')])
@@ -48,6 +48,10 @@ SECRET_KEY = 't@)am85)xqlwhb_4@se5m^1y1_n$lf!x%8-o3l$ne8gs!k6##p'
 
 # List of callables that know how to import templates from various sources.
 TEMPLATE_LOADERS = (
+    'django.template.loaders.cached.load_template_source',
+)
+
+CACHED_TEMPLATE_LOADERS = (
     'django.template.loaders.filesystem.load_template_source',
     'django.template.loaders.app_directories.load_template_source',
 #     'django.template.loaders.eggs.load_template_source',
@@ -152,6 +156,9 @@ CMS_USE_TINYMCE = True
 
 CMS_SOFTROOT = True
 
+# Postgres accepts multi-row INSERT, nothing listens to Version signals
+REVERSION_BULK_INSERT = True
+
 TINYMCE_DEFAULT_CONFIG = {'theme': "advanced"}
 
 WYM_CONTAINERS = ",\n".join([
@@ -167,3 +174,7 @@ WYM_CLASSES = ""
 HAYSTACK_SEARCH_ENGINE = 'whoosh'
 
 HAYSTACK_WHOOSH_PATH = '/home/mkeller/whoosh/itcq_index'
+# Share the index pages between the worker processes
+HAYSTACK_WHOOSH_MAPPED = True
+# Cache search results until the index changes, for at most 5 minutes
+HAYSTACK_RESULT_CACHE_TIMEOUT = 300
@@ -1,5 +1,6 @@
 from cms.utils import get_language_from_request
 from cms.utils.moderator import get_page_model, get_title_model
+from cms.utils.page import get_page_ancestors
 from django import template
 
 register = template.Library()
@@ -18,11 +19,7 @@ def ancestor_title(context, level=0, var=None):
     lang = get_language_from_request(request)
 
     if page:
-        ancestors = [page]
-        while ancestors[-1].parent:
-
-            ancestors.append(ancestors[-1].parent)
-        ancestors.reverse()
+        ancestors = get_page_ancestors(page) + [page]
         if len(ancestors) <= level:
             return {"content": ""}
         if var:
@@ -41,10 +38,7 @@ def ancestor_slug(context, level=0):
     page = request.current_page
     lang = get_language_from_request(request)
     if page:
-        ancestors = [page]
-        while ancestors[-1].parent:
-            ancestors.append(ancestors[-1].parent)
-        ancestors.reverse()
+        ancestors = get_page_ancestors(page) + [page]
         if len(ancestors) <= level:
             return {"content": ""}
         return {"content": ancestors[level].get_slug()}
@@ -1,3 +1,4 @@
+import threading
 from copy import deepcopy
 from django.db import models
 from django.db.models.base import ModelBase
@@ -6,6 +7,35 @@ from django.db.models.fields.related import RelatedField
 from django.core.exceptions import ObjectDoesNotExist
 from publisher.errors import MpttCantPublish
 
+class PublishCounter(threading.local):
+    """Counts public instances which were really written by publish. Counter
+    is reset when top level publish starts, so after publish returns it
+    says how many objects were changed, e.g.:
+    
+        page.publish()
+        print publish_counter.written
+    
+    Overridden publish methods which publish also other objects (like
+    Page.publish does with children waiting for it) call start and stop
+    around all of it, so it's counted as one top level publish.
+    """
+    # nesting of Publisher.publish calls
+    depth = 0
+    # nesting of start / stop
+    started = 0
+    written = 0
+    
+    def start(self):
+        if not self.started:
+            self.written = 0
+        self.started += 1
+    
+    def stop(self):
+        self.started -= 1
+
+publish_counter = PublishCounter()
+
+
 class Publisher(models.Model):
     """Abstract class which have to be extended for adding class to publisher.
     """
@@ -22,7 +52,21 @@ class Publisher(models.Model):
                  
         Returns: published instance
         """
-        
+        publish_counter.start()
+        publish_counter.depth += 1
+        try:
+            return self._publish(fields, exclude)
+        finally:
+            publish_counter.depth -= 1
+            publish_counter.stop()
+    
+    def _publish(self, fields, exclude):
+        """Does the publishing. Public copy is saved only if some of its fields
+        differs from current instance, and many to many relations are changed
+        only if they differ, so unchanged objects cost just reads. Related
+        objects are always visited, because they may be changed even if this
+        instance wasn't.
+        """
         assert self.pk is not None, "Can publish only saved instance, save it first."
         
         if hasattr(self, "mptt_can_publish") and not self.mptt_can_publish():
@@ -50,7 +94,11 @@ class Publisher(models.Model):
         
         if not public_copy:
             created = True
-            public_copy = self.__class__.PublicModel()    
+            public_copy = self.__class__.PublicModel()
+        changed = created
+        # fields which can be compared - model inheritance pointers have
+        # different names in public models
+        public_attnames = set([f.attname for f in public_copy._meta.fields])
         for field in fields:
             value = getattr(self, field.name)
             if isinstance(field, RelatedField):
@@ -71,9 +119,15 @@ class Publisher(models.Model):
                             value = value.public
                         except AttributeError:
                             value = value.inherited_public
+                if field.attname in public_attnames and (value and value.pk) != getattr(public_copy, field.attname):
+                    changed = True
+            elif field.attname in public_attnames and getattr(public_copy, field.attname) != value:
+                changed = True
             setattr(public_copy, field.name, value)        
-        # publish copy
-        self.publish_save(public_copy)
+        if changed:
+            # publish copy
+            self.publish_save(public_copy)
+            publish_counter.written += 1
         
         if created:
             # store data about public model
@@ -86,14 +140,12 @@ class Publisher(models.Model):
         # update many to many relations
         for field in self._meta.many_to_many:
             name = field.name
-            m2m_manager = getattr(self, name)
+            ids = set(getattr(self, name).values_list('pk', flat=True))
             public_m2m_manager = getattr(public_copy, name)
-            
-            # clear public manager first!
-            public_m2m_manager.remove()
-            
-            for obj in m2m_manager.all():
-                public_m2m_manager.add(obj.pk)
+            public_ids = set(public_m2m_manager.values_list('pk', flat=True))
+            if ids != public_ids:
+                public_m2m_manager.remove(*(public_ids - ids))
+                public_m2m_manager.add(*(ids - public_ids))
             
         # update related objects (FK) / model inheritance
         for obj in self._meta.get_all_related_objects():
@@ -113,8 +165,9 @@ class Publisher(models.Model):
                 for item in item_set:
                     item.publish(exclude=exclude + [obj.__class__])
         
-        if not created:
-            # check if there is something marked for delete in public model
+        if not created and publish_counter.depth == 1:
+            # check if there is something marked for delete in public model,
+            # this collects all sub objects, so it's enough to do it once
             public_copy.delete_marked_for_deletion()
         return public_copy
         
@@ -18,9 +18,10 @@ except ImportError:
 
 import sys
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core import serializers
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models.query import QuerySet
 from django.db.models.signals import post_save
 
@@ -28,6 +29,30 @@ from reversion.models import Revision, Version
 from reversion.storage import VersionFileStorageWrapper
 
 
+# Make sure the builtin formats are loaded before adding our own one.
+if "zjson" not in serializers.get_serializer_formats():
+    serializers.register_serializer("zjson", "reversion.zjson")
+
+# Formats which are written without any whitespace.
+COMPACT_FORMATS = ("json", "zjson",)
+
+# Maximal number of version rows written by one INSERT statement.
+INSERT_BATCH_SIZE = 100
+
+# Backends known to accept INSERT with several rows in VALUES.
+MULTIROW_INSERT_ENGINES = ("postgresql", "postgresql_psycopg2", "mysql",)
+
+
+def supports_multirow_insert():
+    """Returns True if the database backend accepts multi-row INSERT statements."""
+    if settings.DATABASE_ENGINE in MULTIROW_INSERT_ENGINES:
+        return True
+    if settings.DATABASE_ENGINE == "sqlite3":
+        from django.db.backends.sqlite3.base import Database
+        return Database.sqlite_version_info >= (3, 7, 11)
+    return False
+
+
 class RevisionManagementError(Exception):
     
     """
@@ -92,11 +117,22 @@ class RevisionManager(object):
         """
         return model_class in self._registry
         
-    def register(self, model_class, fields=None, follow=(), format="xml"):
-        """Registers a model with this revision manager."""
+    def register(self, model_class, fields=None, follow=(), format=None):
+        """
+        Registers a model with this revision manager.
+        
+        The format is any serialization format known to Django, or "zjson" for
+        compressed JSON. It defaults to the REVERSION_FORMAT setting, "xml" if
+        not set.
+        """
         # Prevent multiple registration.
         if self.is_registered(model_class):
             raise RegistrationError, "%r has already been registered with Reversion." % model_class
+        # Check the serialization format.
+        if format is None:
+            format = getattr(settings, "REVERSION_FORMAT", "xml")
+        if not format in serializers.get_serializer_formats():
+            raise RegistrationError, "%r is not a known serialization format." % format
         # Calculate serializable model fields.
         opts = model_class._meta
         local_fields = opts.local_fields + opts.local_many_to_many
@@ -256,22 +292,65 @@ class RevisionManager(object):
                     # Follow relationships.
                     revision_set = self.follow_relationships(self._state.objects)
                     # Save version models.
-                    for obj in revision_set:
-                        registration_info = self.get_registration_info(obj.__class__)
-                        object_id = unicode(obj.pk)
-                        content_type = ContentType.objects.get_for_model(obj)
-                        serialized_data = serializers.serialize(registration_info.format, [obj], fields=registration_info.fields)
-                        Version.objects.create(revision=revision,
-                                               object_id=object_id,
-                                               content_type=content_type,
-                                               format=registration_info.format,
-                                               serialized_data=serialized_data,
-                                               object_repr=unicode(obj))
+                    self.save_versions(revision, revision_set)
                     for cls, kwargs in self._state.meta:
                         cls._default_manager.create(revision=revision, **kwargs)
             finally:
                 self._state.clear()
         
+    def serialize(self, obj):
+        """Returns the format and serialized data of the given object."""
+        registration_info = self.get_registration_info(obj.__class__)
+        format = registration_info.format
+        options = {"fields": registration_info.fields}
+        if format in COMPACT_FORMATS:
+            options["separators"] = (",", ":")
+        return format, serializers.serialize(format, [obj], **options)
+        
+    def save_versions(self, revision, objects):
+        """
+        Saves versions of all the given objects in the given revision.
+        
+        If REVERSION_BULK_INSERT is set and the database supports it, the rows
+        are inserted by multi-row INSERT statements instead of one statement
+        per object. Version.save() isn't called and no save signals are sent
+        for them then.
+        """
+        if not (getattr(settings, "REVERSION_BULK_INSERT", False) and supports_multirow_insert()):
+            for obj in objects:
+                format, serialized_data = self.serialize(obj)
+                Version.objects.create(revision=revision,
+                                       object_id=unicode(obj.pk),
+                                       content_type=ContentType.objects.get_for_model(obj),
+                                       format=format,
+                                       serialized_data=serialized_data,
+                                       object_repr=unicode(obj))
+            return
+        rows = []
+        for obj in objects:
+            format, serialized_data = self.serialize(obj)
+            content_type = ContentType.objects.get_for_model(obj)
+            rows.append((revision.pk, unicode(obj.pk), content_type.pk, format,
+                         serialized_data, unicode(obj)))
+        if not rows:
+            return
+        qn = connection.ops.quote_name
+        opts = Version._meta
+        columns = [opts.get_field(name).column for name in
+                   ("revision", "object_id", "content_type", "format", "serialized_data", "object_repr")]
+        placeholders = "(%s)" % ", ".join(["%s"] * len(columns))
+        cursor = connection.cursor()
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start:start + INSERT_BATCH_SIZE]
+            sql = "INSERT INTO %s (%s) VALUES %s" % (qn(opts.db_table),
+                                                     ", ".join([qn(column) for column in columns]),
+                                                     ", ".join([placeholders] * len(batch)))
+            params = []
+            for row in batch:
+                params.extend(row)
+            cursor.execute(sql, params)
+        transaction.commit_unless_managed()
+        
     # Signal receivers.
         
     def post_save_receiver(self, instance, sender, **kwargs):
@@ -164,6 +164,66 @@ Check that field limitations work correctly:
     >>> reversion.unregister(Site)
     >>> Revision.objects.all().delete()
 
+Check that the compressed format works correctly:
+
+    >>> reversion.register(Site, format="unknown")
+    Traceback (most recent call last):
+        ...
+    RegistrationError: 'unknown' is not a known serialization format.
+    >>> reversion.register(Site, format="zjson")
+    >>> with reversion.revision:
+    ...     compressed_site = Site.objects.create(name="site_rev_1", domain="www.site-rev-1.com")
+    ...
+    >>> with reversion.revision:
+    ...     compressed_site.name = "site_rev_2"
+    ...     compressed_site.save()
+    ...
+    >>> version = Version.objects.get_for_object(compressed_site)[0]
+    >>> version.format
+    u'zjson'
+    >>> version.field_dict["name"]
+    u'site_rev_1'
+    >>> with reversion.revision:
+    ...     version.revert()
+    ...
+    >>> Site.objects.get(pk=compressed_site.pk).name
+    u'site_rev_1'
+    >>> reversion.unregister(Site)
+    >>> Revision.objects.all().delete()
+
+Check that versions are saved one by one, with signals, unless the bulk insert
+is enabled and the database supports it:
+
+    >>> saved_versions = []
+    >>> def version_saved(sender, instance, **kwargs):
+    ...     saved_versions.append(instance.object_repr)
+    ...
+    >>> post_save.connect(version_saved, sender=Version)
+    >>> bulk_insert = getattr(settings, "REVERSION_BULK_INSERT", False)
+    >>> settings.REVERSION_BULK_INSERT = False
+    >>> reversion.register(Site)
+    >>> with reversion.revision:
+    ...     bulk_site_1 = Site.objects.create(name="bulk_1", domain="www.bulk-1.com")
+    ...     bulk_site_2 = Site.objects.create(name="bulk_2", domain="www.bulk-2.com")
+    ...
+    >>> sorted(saved_versions)
+    [u'www.bulk-1.com', u'www.bulk-2.com']
+    >>> settings.REVERSION_BULK_INSERT = True
+    >>> with reversion.revision:
+    ...     bulk_site_1.name = "bulk_1_rev_2"
+    ...     bulk_site_1.save()
+    ...     bulk_site_2.name = "bulk_2_rev_2"
+    ...     bulk_site_2.save()
+    ...
+    >>> len(saved_versions) == (supports_multirow_insert() and 2 or 4)
+    True
+    >>> Version.objects.get_for_object(bulk_site_2).count()
+    2
+    >>> settings.REVERSION_BULK_INSERT = bulk_insert
+    >>> post_save.disconnect(version_saved, sender=Version)
+    >>> reversion.unregister(Site)
+    >>> Revision.objects.all().delete()
+
 Check that the follow functionality works for many-to-one relationships:
 
     >>> reversion.register(LogEntry, follow=("user",))
@@ -262,15 +322,18 @@ from __future__ import with_statement
 
 import datetime
 
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin.models import LogEntry, DELETION
 from django.contrib.auth.models import User, Group
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.db import models
+from django.db.models.signals import post_save
 
 import reversion
 from reversion.admin import VersionAdmin
 from reversion.helpers import patch_admin, generate_patch, generate_patch_html
 from reversion.models import Version, Revision
+from reversion.revisions import supports_multirow_insert
 
@@ -0,0 +1,37 @@
+"""
+Compact serializer for version data.
+
+Data are serialized to JSON without whitespace, compressed with zlib and
+base64 encoded, so they can still be stored in a text field. Available as
+the "zjson" serialization format once reversion is imported.
+"""
+
+
+import base64
+import zlib
+
+from django.core.serializers.json import Serializer as JSONSerializer
+from django.core.serializers.json import Deserializer as JSONDeserializer
+
+
+class Serializer(JSONSerializer):
+    
+    """Serializes models to compressed JSON."""
+    
+    internal_use_only = True
+    
+    def end_serialization(self):
+        """Writes JSON without any whitespace."""
+        self.options.setdefault("separators", (",", ":"))
+        JSONSerializer.end_serialization(self)
+    
+    def getvalue(self):
+        """Returns compressed and encoded JSON."""
+        return base64.b64encode(zlib.compress(JSONSerializer.getvalue(self), 9))
+
+
+def Deserializer(stream_or_string, **options):
+    """Deserializes compressed JSON."""
+    if not isinstance(stream_or_string, basestring):
+        stream_or_string = stream_or_string.read()
+    return JSONDeserializer(zlib.decompress(base64.b64decode(stream_or_string)), **options)
@@ -0,0 +1,284 @@
+#===============================================================================
+# Copyright 2009 Matt Chaput
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#===============================================================================
+
+"""
+This module contains finite automata used to expand fuzzy and wildcard
+terms against the sorted lexicon of a field.
+
+An automaton is built as an NFA and evaluated as a DFA, whose states are
+computed lazily as the lexicon is walked. Because the lexicon is sorted,
+whenever a term leads the automaton into a dead state, all the following
+terms sharing that prefix can be skipped by seeking directly to the next
+string the automaton could accept.
+"""
+
+import sys
+from bisect import bisect_right
+
+# Special transition labels
+ANY = object()
+EPSILON = object()
+
+
+class NFA(object):
+    """A nondeterministic finite automaton with unicode character labels,
+    plus the special ANY (matches any character) and EPSILON (matches
+    without consuming a character) labels.
+    """
+
+    def __init__(self, start):
+        """
+        :start: The start state. States can be any hashable objects.
+        """
+
+        self.start = start
+        self.transitions = {}
+        self.final_states = set()
+
+    def add_transition(self, src, label, dest):
+        self.transitions.setdefault(src, {}).setdefault(label, set()).add(dest)
+
+    def add_final_state(self, state):
+        self.final_states.add(state)
+
+    def closure(self, states):
+        """Returns the frozenset of the given states plus all the states
+        reachable from them by EPSILON transitions.
+        """
+
+        transitions = self.transitions
+        result = set(states)
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            for dest in transitions.get(state, {}).get(EPSILON, ()):
+                if dest not in result:
+                    result.add(dest)
+                    stack.append(dest)
+        return frozenset(result)
+
+    def to_dfa(self):
+        return DFA(self)
+
+
+class DFA(object):
+    """Deterministic view of an NFA. The states of this object are
+    frozensets of NFA states; the empty frozenset is the dead state.
+    Transitions are computed on demand and cached.
+    """
+
+    def __init__(self, nfa):
+        self.nfa = nfa
+        self.start = nfa.closure([nfa.start])
+        self._finals = {}
+        self._labels = {}
+        self._next = {}
+
+    def is_final(self, state):
+        if state not in self._finals:
+            self._finals[state] = bool(state & self.nfa.final_states)
+        return self._finals[state]
+
+    def labels(self, state):
+        """Returns a tuple of the sorted list and the set of the explicit
+        character labels leaving the given state, and a flag which is True
+        if ANY character leads out of it as well.
+        """
+
+        if state not in self._labels:
+            labels = set()
+            default = False
+            transitions = self.nfa.transitions
+            for s in state:
+                for label in transitions.get(s, ()):
+                    if label is ANY:
+                        default = True
+                    elif label is not EPSILON:
+                        labels.add(label)
+            self._labels[state] = (sorted(labels), labels, default)
+        return self._labels[state]
+
+    def next_state(self, state, char):
+        """Returns the state reached from the given state by the given
+        character.
+        """
+
+        key = (state, char)
+        if key in self._next:
+            return self._next[key]
+
+        _, labels, _ = self.labels(state)
+        if char not in labels:
+            # All characters without an explicit label lead to the same
+            # state, so cache it only once
+            dkey = (state, ANY)
+            if dkey not in self._next:
+                self._next[dkey] = self._step(state, ANY)
+            result = self._next[dkey]
+        else:
+            result = self._step(state, char)
+        self._next[key] = result
+        return result
+
+    def _step(self, state, char):
+        transitions = self.nfa.transitions
+        dests = set()
+        for s in state:
+            trans = transitions.get(s)
+            if trans:
+                if char is not ANY:
+                    dests.update(trans.get(char, ()))
+                dests.update(trans.get(ANY, ()))
+        return self.nfa.closure(dests)
+
+    def next_edge(self, state, char):
+        """Returns the smallest character greater than 'char' which leads
+        from the given state to a live state, or None.
+        """
+
+        labels, _, default = self.labels(state)
+        if default:
+            if ord(char) < sys.maxunicode:
+                return unichr(ord(char) + 1)
+            return None
+
+        i = bisect_right(labels, char)
+        if i < len(labels):
+            return labels[i]
+        return None
+
+    def accepts(self, text):
+        state = self.start
+        for char in text:
+            state = self.next_state(state, char)
+            if not state:
+                return False
+        return self.is_final(state)
+
+    def intersect(self, seek):
+        """Yields the strings from a sorted sequence which are accepted by
+        this automaton, in order.
+
+        :seek: A function taking a string and returning an iterator over
+            the strings of the sequence greater than or equal to it.
+        """
+
+        nextstates = self._next
+        it = seek(u"")
+        text = _first(it)
+        prev = u""
+        states = [self.start]
+        while text is not None:
+            # Run the automaton on the text, remembering the states so we
+            # can back up when the text leads into a dead state. Neighbouring
+            # terms usually share a prefix, so start after the states that
+            # are still valid from the previous text.
+            i = 0
+            n = min(len(prev), len(text), len(states) - 1)
+            while i < n and prev[i] == text[i]:
+                i += 1
+            del states[i + 1:]
+            state = states[i]
+            for char in text[i:]:
+                key = (state, char)
+                if key in nextstates:
+                    state = nextstates[key]
+                else:
+                    state = self.next_state(state, char)
+                if not state:
+                    break
+                states.append(state)
+            prev = text
+
+            if state:
+                # The whole text was consumed; longer texts may still be
+                # accepted, so go on with the next one
+                if self.is_final(state):
+                    yield text
+                text = _first(it)
+                continue
+
+            # No text starting with text[:i + 1] can be accepted. Find the
+            # smallest prefix after it which is still alive and skip to it.
+            i = len(states) - 1
+            target = None
+            while i >= 0:
+                char = self.next_edge(states[i], text[i])
+                if char is not None:
+                    target = text[:i] + char
+                    break
+                i -= 1
+            if target is None:
+                return
+
+            it = seek(target)
+            text = _first(it)
+
+
+def _first(it):
+    for text in it:
+        return text
+    return None
+
+
+def levenshtein_automaton(text, maxdist = 1, prefixlength = 0):
+    """Returns a DFA accepting the strings within 'maxdist' insertions,
+    deletions or substitutions of 'text'.
+
+    :text: The string to match.
+    :maxdist: The maximum edit distance.
+    :prefixlength: The number of characters at the start of 'text' which
+        must match exactly.
+    """
+
+    nfa = NFA((0, 0))
+    for i, char in enumerate(text):
+        for e in xrange(maxdist + 1):
+            # Correct character
+            nfa.add_transition((i, e), char, (i + 1, e))
+            if e < maxdist and i >= prefixlength:
+                # Deletion
+                nfa.add_transition((i, e), EPSILON, (i + 1, e + 1))
+                # Substitution
+                nfa.add_transition((i, e), ANY, (i + 1, e + 1))
+    for i in xrange(prefixlength, len(text) + 1):
+        for e in xrange(maxdist):
+            # Insertion
+            nfa.add_transition((i, e), ANY, (i, e + 1))
+    for e in xrange(maxdist + 1):
+        nfa.add_final_state((len(text), e))
+    return nfa.to_dfa()
+
+
+def wildcard_automaton(pattern):
+    """Returns a DFA accepting the strings which match a wildcard pattern,
+    where ? matches any one character and * matches any number of
+    characters.
+    """
+
+    nfa = NFA(0)
+    i = 0
+    for char in pattern:
+        if char == "*":
+            nfa.add_transition(i, ANY, i)
+            nfa.add_transition(i, EPSILON, i + 1)
+        elif char == "?":
+            nfa.add_transition(i, ANY, i + 1)
+        else:
+            nfa.add_transition(i, char, i + 1)
+        i += 1
+    nfa.add_final_state(i)
+    return nfa.to_dfa()
@@ -102,11 +102,12 @@ def create_in(dirname, schema = None, indexname = None, **kwargs):
     
     return Index(storage, schema = schema, indexname = indexname, create = True)
 
-def open_dir(dirname, indexname = None):
+def open_dir(dirname, indexname = None, mapped = False):
     """Convenience function for opening an index in a directory. Takes care of creating
     a FileStorage object for you. dirname is the filename of the directory in
     containing the index. indexname is the name of the index to create; you only need to
     specify this if you have multiple indexes within the same storage object.
+    If mapped is True, the index files are memory-mapped for reading.
     
     Returns an Index object.
     """
@@ -114,7 +115,26 @@ def open_dir(dirname, indexname = None):
     if indexname is None:
         indexname = _DEF_INDEX_NAME
     
-    return Index(store.FileStorage(dirname), indexname = indexname)
+    return Index(store.FileStorage(dirname, mapped = mapped), indexname = indexname)
+
+def latest_generation(storage, indexname = None):
+    """Returns the number of the latest generation of the index in the
+    given storage object, or -1 if there is no index in it. This only
+    lists the files, so it is much cheaper than opening the index.
+    """
+    
+    if indexname is None:
+        indexname = _DEF_INDEX_NAME
+    
+    pattern = _toc_pattern(indexname)
+    
+    max = -1
+    for filename in storage:
+        m = pattern.match(filename)
+        if m:
+            num = int(m.group(1))
+            if num > max: max = num
+    return max
 
 def exists_in(dirname, indexname = None):
     """Returns True if dirname contains a Whoosh index."""
@@ -266,15 +286,7 @@ class Index(DeletionMixin):
         index.
         """
         
-        pattern = _toc_pattern(self.indexname)
-        
-        max = -1
-        for filename in self.storage:
-            m = pattern.match(filename)
-            if m:
-                num = int(m.group(1))
-                if num > max: max = num
-        return max
+        return latest_generation(self.storage, self.indexname)
     
     def refresh(self):
         """Returns a new Index object representing the latest generation
@@ -387,16 +399,36 @@ class Index(DeletionMixin):
     
     def optimize(self):
         """Optimizes this index's segments. This will fail if the index
-        is already locked for writing.
+        is already locked for writing. A segment with tables written in
+        the old pickled block format is rewritten even if there is nothing
+        to merge, so this is also how existing indexes are migrated to the
+        binary table format.
         """
         
-        if len(self.segments) < 2 and not self.segments.has_deletions():
+        if len(self.segments) < 2 and \
+           not self.segments.has_deletions() and \
+           not self._has_pickled_tables():
             return
         
         from whoosh import writing
         w = writing.IndexWriter(self)
         w.commit(writing.OPTIMIZE)
     
+    def _has_pickled_tables(self):
+        """Returns True if any segment of this index has a term or document
+        table in the old pickled block format.
+        """
+        
+        for segment in self.segments:
+            for filename in (segment.term_filename, segment.docs_filename):
+                table = self.storage.open_table(filename)
+                try:
+                    if table.blockcount and not table.keytypes:
+                        return True
+                finally:
+                    table.close()
+        return False
+    
     def commit(self, new_segments = None):
         """Commits pending edits (such as deletions) to this index object.
         Raises OutOfDateError if this index is not the latest generation
@@ -24,14 +24,103 @@ strings.
 from __future__ import division
 from array import array
 from bisect import bisect_left, bisect_right
-from collections import defaultdict
+from itertools import islice, izip
 import fnmatch, re
 
+from whoosh.automata import levenshtein_automaton, wildcard_automaton
 from whoosh.support.bitvector import BitVector
 from whoosh.lang.morph_en import variations
 
+# Number of postings scored at once by Weighting.score_block()
+BLOCK_SIZE = 128
+
 # Utility functions
 
+class _ListCursor(object):
+    # Cursor over a list of (docnum, value) pairs sorted by docnum, for
+    # queries which can't skip in their results.
+    
+    def __init__(self, items):
+        self.items = items
+        self.docnums = [docnum for docnum, _ in items]
+        self.i = -1
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        self.i += 1
+        if self.i >= len(self.items):
+            raise StopIteration
+        return self.items[self.i]
+    
+    def skip_to(self, docnum):
+        i = self.i
+        if i >= 0 and i < len(self.items) and self.docnums[i] >= docnum:
+            return self.items[i]
+        self.i = bisect_left(self.docnums, docnum, max(i, 0))
+        if self.i >= len(self.items):
+            raise StopIteration
+        return self.items[self.i]
+
+
+class _IntersectionCursor(object):
+    # Leapfrog intersection of cursors: yields (docnum, [values]) for the
+    # documents in all of 'cursors' and none of 'negatives'. Each cursor
+    # skips to the document the previous one stopped at, so the first
+    # cursor should be the one with the fewest documents.
+    
+    def __init__(self, cursors, negatives = ()):
+        self.cursors = cursors
+        self.negatives = list(negatives)
+        self.docnum = None
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        if self.docnum is None:
+            return self.skip_to(0)
+        return self.skip_to(self.docnum + 1)
+    
+    def _excluded(self, docnum):
+        for neg in self.negatives[:]:
+            try:
+                if neg.skip_to(docnum)[0] == docnum:
+                    return True
+            except StopIteration:
+                self.negatives.remove(neg)
+        return False
+    
+    def skip_to(self, docnum):
+        if self.docnum is not None and self.docnum >= docnum:
+            return (self.docnum, self.values)
+        
+        cursors = self.cursors
+        count = len(cursors)
+        values = [None] * count
+        matched = 0
+        i = 0
+        while True:
+            d, values[i] = cursors[i].skip_to(docnum)
+            if d == docnum:
+                matched += 1
+            else:
+                docnum = d
+                matched = 1
+            
+            if matched == count:
+                if not self._excluded(docnum):
+                    break
+                docnum += 1
+                matched = 0
+            i = (i + 1) % count
+        
+        self.docnum = docnum
+        self.values = values
+        return (docnum, values)
+
+
 def _not_vector(notqueries, searcher, sourcevector):
     # Returns a BitVector where the positions are docnums
     # and True means the docnum is banned from the results.
@@ -125,6 +214,32 @@ class Query(object):
         """
         raise NotImplementedError
     
+    def cursor(self, searcher, exclude_docs = None):
+        """
+        Returns a cursor over the matching documents in increasing docnum
+        order, used by And and Phrase to intersect results. A cursor has
+        a next() method returning the next (docnum, value) pair and a
+        skip_to(docnum) method returning the first pair with a docnum
+        greater than or equal to the given one. Both raise StopIteration
+        at the end. The base method collects and sorts docs(); queries
+        which can skip should override it.
+        """
+        
+        docnums = sorted(set(self.docs(searcher, exclude_docs = exclude_docs)))
+        return _ListCursor([(docnum, None) for docnum in docnums])
+    
+    def score_cursor(self, searcher, weighting = None, exclude_docs = None):
+        """
+        Returns a (cursor, scorefn) tuple. The cursor is like the one
+        returned by cursor(), and scorefn(docnums, values) turns the values
+        of the given documents into a list of scores. The base method
+        collects and sorts doc_scores().
+        """
+        
+        items = sorted(self.doc_scores(searcher, weighting = weighting,
+                                       exclude_docs = exclude_docs))
+        return _ListCursor(items), lambda docnums, scores: scores
+    
     def normalize(self):
         """
         Returns a recursively "normalized" form of this query. The normalized
@@ -192,19 +307,11 @@ class MultifieldTerm(Query):
         return iter(vector)
     
     def doc_scores(self, searcher, weighting = None, exclude_docs = None):
-        text = self.text
-        weighting = weighting or searcher.weighting
-        
-        accumulators = defaultdict(float)
-        for fieldname in self.fieldnames:
-            fieldnum = searcher.fieldname_to_num(fieldname)
-            if (fieldnum, text) in searcher:
-                for docnum, weight in searcher.weights(fieldnum, text,
-                                                       exclude_docs = exclude_docs,
-                                                       boost = self.boost):
-                    accumulators[docnum] += weighting.score(searcher, fieldnum, text, docnum, weight)
-        
-        return accumulators.iteritems()
+        # Scores of the terms in all fields are summed
+        return Or([Term(fieldname, self.text, boost = self.boost)
+                   for fieldname in self.fieldnames]).doc_scores(searcher,
+                                                                  weighting = weighting,
+                                                                  exclude_docs = exclude_docs)
     
 
 class SimpleQuery(Query):
@@ -268,16 +375,39 @@ class Term(SimpleQuery):
             for docnum, _ in searcher.postings(fieldnum, text, exclude_docs = exclude_docs):
                 yield docnum
     
+    def cursor(self, searcher, exclude_docs = None):
+        fieldnum = searcher.fieldname_to_num(self.fieldname)
+        if (fieldnum, self.text) not in searcher:
+            return _ListCursor([])
+        return searcher.posting_cursor(fieldnum, self.text, exclude_docs = exclude_docs)
+    
+    def score_cursor(self, searcher, weighting = None, exclude_docs = None):
+        fieldnum = searcher.fieldname_to_num(self.fieldname)
+        text = self.text
+        boost = self.boost
+        weighting = weighting or searcher.weighting
+        
+        def scorefn(docnums, weights):
+            return weighting.score_block(searcher, fieldnum, text, docnums,
+                                         [weight * boost for weight in weights])
+        
+        return self.cursor(searcher, exclude_docs = exclude_docs), scorefn
+    
     def doc_scores(self, searcher, weighting = None, exclude_docs = None):
         fieldnum = searcher.fieldname_to_num(self.fieldname)
         text = self.text
         boost = self.boost
         if (fieldnum, text) in searcher:
             weighting = weighting or searcher.weighting
-            for docnum, weight in searcher.weights(fieldnum, self.text,
-                                                   exclude_docs = exclude_docs):
-                yield docnum, weighting.score(searcher, fieldnum, text, docnum,
-                                              weight * boost)
+            postings = searcher.weights(fieldnum, text, exclude_docs = exclude_docs,
+                                        boost = boost)
+            while True:
+                block = list(islice(postings, BLOCK_SIZE))
+                if not block: break
+                docnums, weights = zip(*block)
+                for item in izip(docnums, weighting.score_block(searcher, fieldnum, text,
+                                                                docnums, weights)):
+                    yield item
 
 
 class CompoundQuery(Query):
@@ -423,76 +553,60 @@ class And(CompoundQuery):
     def estimate_size(self, searcher):
         return min(q.estimate_size(searcher) for q in self.subqueries)
     
-    def docs(self, searcher, exclude_docs = None):
-        if not self.subqueries:
-            return []
-        
+    def _sorted_subqueries(self, searcher):
+        # Returns the subqueries sorted by their estimated size, smallest
+        # to largest, or None if one of them can't match anything.
         self._split_queries()
-        if self._notqueries:
-            exclude_docs = _not_vector(self._notqueries, searcher, exclude_docs)
+        if not self._subqueries:
+            return None
         
-        target = len(self.subqueries)
+        # Can't just do .sort(key = ) because I want to check the smallest
+        # value later and I don't want to call estimate_size() twice because
+        # it is potentially expensive.
+        subqs = [(q.estimate_size(searcher), q) for q in self._subqueries]
+        subqs.sort()
         
-        # Create an array representing the number of subqueries that hit each
-        # document.
-        if target <= 255:
-            type = "B"
-        else:
-            type = "i"
-        counters = array(type, (0 for _ in xrange(0, searcher.doc_count_all())))
-        for q in self._subqueries:
-            for docnum in q.docs(searcher, exclude_docs = exclude_docs):
-                counters[docnum] += 1
+        # If the smallest estimated size is 0, nothing will match.
+        if subqs[0][0] == 0:
+            return None
         
-        # Return the doc numbers where the correspoding number of "hits" in
-        # the array equal the number of subqueries.
-        return (i for i, count in enumerate(counters) if count == target)
+        # Removed the estimated sizes, leaving just the sorted subqueries.
+        return [q for _, q in subqs]
+    
+    def cursor(self, searcher, exclude_docs = None):
+        subqs = self._sorted_subqueries(searcher)
+        if subqs is None:
+            return _ListCursor([])
+        
+        return _IntersectionCursor([q.cursor(searcher, exclude_docs = exclude_docs) for q in subqs],
+                                   [nq.query.cursor(searcher) for nq in self._notqueries])
+    
+    def docs(self, searcher, exclude_docs = None):
+        # Leapfrog over the sorted docnums, starting with the rarest subquery
+        return (docnum for docnum, _ in self.cursor(searcher, exclude_docs = exclude_docs))
     
     def doc_scores(self, searcher, weighting = None, exclude_docs = None):
-        if not self.subqueries:
+        subqs = self._sorted_subqueries(searcher)
+        if subqs is None:
             return []
         
-        self._split_queries()
-        if self._notqueries:
-            exclude_docs = _not_vector(self._notqueries, searcher, exclude_docs)
-        
-        # Sort the subqueries by their estimated size, smallest to
-        # largest. Can't just do .sort(key = ) because I want to check
-        # the smallest value later and I don't want to call estimate_size()
-        # twice because it is potentially expensive.
-        subqs = [(q.estimate_size(searcher), q) for q in self._subqueries]
-        subqs.sort()
-        
-        # If the smallest estimated size is 0, nothing will match.
-        if subqs[0][0] == 0:
+        # Find the matching documents first, then score them subquery by
+        # subquery.
+        cursors, scorefns = zip(*[q.score_cursor(searcher, weighting = weighting,
+                                                 exclude_docs = exclude_docs)
+                                  for q in subqs])
+        matches = list(_IntersectionCursor(cursors,
+                                           [nq.query.cursor(searcher) for nq in self._notqueries]))
+        if not matches:
             return []
         
-        # Removed the estimated sizes, leaving just the sorted subqueries.
-        subqs = [q for _, q in subqs]
-        
-        counters = {}
-        scores = {}
-        
-        first = True
-        for q in subqs:
-            atleastone = first
-            for docnum, score in q.doc_scores(searcher, weighting = weighting, exclude_docs = exclude_docs):
-                if first:
-                    scores[docnum] = score
-                    counters[docnum] = 1
-                elif docnum in scores:
-                    scores[docnum] += score
-                    counters[docnum] += 1
-                    atleastone = True
-            
-            first = False
-                
-            if not atleastone:
-                return []
+        docnums = [docnum for docnum, _ in matches]
+        scores = array("d", [0.0]) * len(docnums)
+        for i, scorefn in enumerate(scorefns):
+            for j, score in enumerate(scorefn(docnums, [values[i] for _, values in matches])):
+                scores[j] += score
         
-        target = len(subqs)
-        return ((docnum, score) for docnum, score in scores.iteritems()
-                if counters[docnum] == target)
+        return izip(docnums, scores)
 
 
 class Or(CompoundQuery):
@@ -532,14 +646,20 @@ class Or(CompoundQuery):
         if self._notqueries:
             exclude_docs = _not_vector(self._notqueries, searcher, exclude_docs)
         
-        scores = defaultdict(float)
-        #scores = array("f", [0] * searcher.doc_count_all())
+        # Scores are summed in an array indexed by document number,
+        # 'matched' remembers which documents have a score.
+        doc_count = searcher.doc_count_all()
+        scores = array("d", [0.0]) * doc_count
+        seen = array("B", [0]) * doc_count
+        matched = []
         for query in self._subqueries:
             for docnum, weight in query.doc_scores(searcher, weighting = weighting, exclude_docs = exclude_docs):
+                if not seen[docnum]:
+                    seen[docnum] = 1
+                    matched.append(docnum)
                 scores[docnum] += weight
         
-        return scores.iteritems()
-        #return ((i, score) for i, score in enumerate(scores) if score)
+        return ((docnum, scores[docnum]) for docnum in matched)
 
 
 class Not(Query):
@@ -640,13 +760,22 @@ class AndNot(Query):
     def existing_terms(self, searcher, termset, reverse = False):
         self.positive.existing_terms(searcher, termset, reverse = reverse)
     
+    def estimate_size(self, searcher):
+        return self.positive.estimate_size(searcher)
+    
+    def cursor(self, searcher, exclude_docs = None):
+        return _IntersectionCursor([self.positive.cursor(searcher, exclude_docs = exclude_docs)],
+                                   [self.negative.cursor(searcher)])
+    
     def docs(self, searcher, exclude_docs = None):
-        excl = _not_vector([self.negative], searcher, exclude_docs)
-        return self.positive.docs(searcher, exclude_docs = excl)
+        return (docnum for docnum, _ in self.cursor(searcher, exclude_docs = exclude_docs))
     
-    def doc_scores(self, searcher, exclude_docs = None):
-        excl = _not_vector([self.negative], searcher, exclude_docs)
-        return self.positive.doc_scores(searcher, exclude_docs = excl)
+    def doc_scores(self, searcher, weighting = None, exclude_docs = None):
+        cursor, scorefn = self.positive.score_cursor(searcher, weighting = weighting,
+                                                     exclude_docs = exclude_docs)
+        matches = list(_IntersectionCursor([cursor], [self.negative.cursor(searcher)]))
+        docnums = [docnum for docnum, _ in matches]
+        return izip(docnums, scorefn(docnums, [values[0] for _, values in matches]))
 
 
 class MultiTerm(Query):
@@ -748,8 +877,9 @@ class Wildcard(ExpandingTerm):
         """
         fieldname is the field to search in. text is an expression to
         search for, which may contain ? and/or * wildcard characters.
-        Note that matching a wildcard expression that starts with a wildcard
-        is very inefficent, since the query must test every term in the field.
+        The terms are matched with an automaton which skips the parts of
+        the lexicon that can't match, but an expression that starts with
+        a * still has to test every term in the field.
         boost is a boost factor that should be applied to the raw score of
         results matched by this query.
         """
@@ -773,15 +903,18 @@ class Wildcard(ExpandingTerm):
             self.prefix = text[:min(st, qm)]
     
     def _words(self, searcher):
+        if "[" not in self.text:
+            return searcher.expand_automaton(self.fieldname,
+                                             wildcard_automaton(self.text))
+        
+        # Character sets are only supported by the regular expression
         if self.prefix:
             candidates = searcher.expand_prefix(self.fieldname, self.prefix)
         else:
             candidates = searcher.lexicon(self.fieldname)
         
         exp = self.expression
-        for text in candidates:
-            if exp.match(text):
-                yield text
+        return (text for text in candidates if exp.match(text))
                 
     def normalize(self):
         # If there are no wildcard characters in this "wildcard",
@@ -792,6 +925,42 @@ class Wildcard(ExpandingTerm):
             return self
 
 
+class Fuzzy(ExpandingTerm):
+    """
+    Matches documents that contain any terms within a given edit distance
+    (number of inserted, deleted or substituted characters) of the given text.
+    """
+    
+    def __init__(self, fieldname, text, boost = 1.0, maxdist = 1, prefixlength = 1):
+        """
+        fieldname is the field to search in. text is the term to match.
+        maxdist is the maximum edit distance of the matched terms.
+        prefixlength is the number of characters at the start of the text
+        which must match exactly; this greatly reduces the number of terms
+        the query has to look at.
+        boost is a boost factor that should be applied to the raw score of
+        results matched by this query.
+        """
+        
+        self.fieldname = fieldname
+        self.text = text
+        self.boost = boost
+        self.maxdist = maxdist
+        self.prefixlength = prefixlength
+    
+    def __repr__(self):
+        return "%s(%r, %r, maxdist=%r, prefixlength=%r)" % (self.__class__.__name__,
+                                                            self.fieldname, self.text,
+                                                            self.maxdist, self.prefixlength)
+    
+    def __unicode__(self):
+        return u"%s:%s~" % (self.fieldname, self.text)
+    
+    def _words(self, searcher):
+        automaton = levenshtein_automaton(self.text, self.maxdist, self.prefixlength)
+        return searcher.expand_automaton(self.fieldname, automaton)
+
+
 class TermRange(MultiTerm):
     """
     Matches documents containing any terms in a given range.
@@ -923,49 +1092,50 @@ class Phrase(MultiTerm):
         words = self.words
         slop = self.slop
         
-        # Get the set of documents that contain all the words
-        docs = frozenset(self._and_query().docs(searcher))
+        # Leapfrog over the documents containing all the words, starting
+        # with the rarest word, and read positions of the words only
+        # in those documents.
+        order = sorted(range(len(words)),
+                       key = lambda i: searcher.doc_frequency(fieldnum, words[i]))
+        cursors = [searcher.posting_cursor(fieldnum, words[i], astype = "positions",
+                                           exclude_docs = exclude_docs)
+                   for i in order]
         
-        # Maps docnums to lists of valid positions
-        current = {}
-        # Maps docnums to scores
-        scores = {}
-        first = True
-        for word in words:
-            #print "word=", word
-            for docnum, positions in searcher.positions(fieldnum, word, exclude_docs = exclude_docs):
-                if docnum not in docs: continue
-                #print "  docnum=", docnum
+        docnums = []
+        for docnum, values in _IntersectionCursor(cursors):
+            positions = [None] * len(words)
+            for i, poslist in izip(order, values):
+                positions[i] = poslist
+            
+            # TODO: Use position boosts if available
+            current = positions[0]
+            for poslist in positions[1:]:
+                newpositions = []
+                for newpos in poslist:
+                    start = bisect_left(current, newpos - slop)
+                    end = bisect_right(current, newpos + slop)
+                    for curpos in current[start:end]:
+                        if abs(newpos - curpos) <= slop:
+                            newpositions.append(newpos)
+                            break
                 
-                # TODO: Use position boosts if available
-                if first:
-                    current[docnum] = positions
-                    #print "    *current=", positions
-                    scores[docnum] = weighting.score(searcher, fieldnum, word, docnum, 1.0)
-                elif docnum in current:
-                    currentpositions = current[docnum]
-                    #print "    current=", currentpositions
-                    #print "    positions=", positions
-                    newpositions = []
-                    for newpos in positions:
-                        start = bisect_left(currentpositions, newpos - slop)
-                        end = bisect_right(currentpositions, newpos + slop)
-                        for curpos in currentpositions[start:end]:
-                            if abs(newpos - curpos) <= slop:
-                                newpositions.append(newpos)
-                    
-                    #print "    newpositions=", newpositions
-                    if not newpositions:
-                        del current[docnum]
-                        del scores[docnum]
-                    else:
-                        current[docnum] = newpositions
-                        scores[docnum] += weighting.score(searcher, fieldnum, word, docnum, 1.0)
+                current = newpositions
+                if not current:
+                    break
             
-            first = False
+            if current:
+                docnums.append(docnum)
+        
+        # Score the documents which contain the phrase, word by word
+        scores = array("d", [0.0]) * len(docnums)
+        weights = [1.0] * len(docnums)
+        for word in words:
+            for i, score in enumerate(weighting.score_block(searcher, fieldnum, word,
+                                                            docnums, weights)):
+                scores[i] += score
         
         #print "scores=", scores
-        return scores.iteritems()
+        return izip(docnums, scores)
     
     def _vector_impl(self, searcher, fieldnum, weighting, exclude_docs):
         dr = searcher.doc_reader
@@ -123,6 +123,20 @@ class DocReader(ClosableMixin):
         pos = self._fieldnum_to_pos[fieldid]
         return self.doclength_table.get(docnum, pos)
     
+    @protected
+    def doc_field_length_array(self, fieldid):
+        """Returns an array of the number of terms in the given field in
+        each document, indexed by document number. This lets scoring
+        algorithms look up document lengths without a read per document.
+        """
+        
+        fieldid = self.schema.to_number(fieldid)
+        if fieldid not in self._scorable_fields:
+            raise FieldConfigurationError("Field %r does not store lengths" % fieldid)
+        
+        pos = self._fieldnum_to_pos[fieldid]
+        return self.doclength_table.get_column(pos, self.segment.doc_count_all())
+    
     @protected
     def doc_field_lengths(self, docnum):
         """Returns an array corresponding to the lengths of the
@@ -241,6 +255,15 @@ class MultiDocReader(DocReader):
         segmentnum, segmentdoc = self._segment_and_docnum(docnum)
         return self.doc_readers[segmentnum].doc_field_lengths(segmentdoc)
     
+    def doc_field_length_array(self, fieldid):
+        lengths = None
+        for dr in self.doc_readers:
+            if lengths is None:
+                lengths = dr.doc_field_length_array(fieldid)
+            else:
+                lengths.extend(dr.doc_field_length_array(fieldid))
+        return lengths
+    
     def unique_count(self, docnum):
         segmentnum, segmentdoc = self._segment_and_docnum(docnum)
         return self.doc_readers[segmentnum].unique_count(segmentdoc)
@@ -366,16 +389,37 @@ class TermReader(ClosableMixin):
         for (fn, t), termcount in tt.iter_from((fieldnum, text)):
             yield (fn, t, postingcount((fn, t)), termcount)
     
+    @protected
+    def _texts_from(self, fieldnum, text):
+        # Yields the terms in the given field starting at the given text,
+        # without looking up their frequencies.
+        
+        for (fn, t), _ in self.term_table.iter_from((fieldnum, text)):
+            if fn != fieldnum:
+                return
+            yield t
+    
     def expand_prefix(self, fieldid, prefix):
         """Yields terms in the given field that start with the given prefix.
         """
         
         fieldid = self.schema.to_number(fieldid)
-        for fn, t, _, _ in self.iter_from(fieldid, prefix):
-            if fn != fieldid or not t.startswith(prefix):
+        for t in self._texts_from(fieldid, prefix):
+            if not t.startswith(prefix):
                 return
             yield t
     
+    def expand_automaton(self, fieldid, automaton):
+        """Yields terms in the given field that are accepted by the given
+        automaton (see the automata module), in lexical order. Ranges of
+        terms the automaton can't accept are skipped over, so the work
+        depends on the number of matching terms rather than on the size
+        of the field's lexicon.
+        """
+        
+        fieldnum = self.schema.to_number(fieldid)
+        return automaton.intersect(lambda text: self._texts_from(fieldnum, text))
+    
     def all_terms(self):
         """Yields (fieldname, text) tuples for every term in the index.
         """
@@ -526,6 +570,115 @@ class TermReader(ClosableMixin):
         """
         
         return self.postings_as(fieldnum, text, "positions", exclude_docs = exclude_docs)
+    
+    def _posting_readfns(self, fieldnum, astype):
+        # Returns functions reading the posting value interpreted as 'astype'
+        # (the weight if astype is None) and skipping over a posting.
+        format = self.schema.field_by_number(fieldnum).format
+        if astype is None:
+            return format.read_weight, format.read_weight
+        
+        if not format.supports(astype):
+            raise FieldConfigurationError("Field %r format does not support %r" % (self.schema.number_to_name(fieldnum),
+                                                                                   astype))
+        interp = format.interpreter(astype)
+        read_postvalue = format.read_postvalue
+        return (lambda stream: interp(read_postvalue(stream))), format.read_weight
+    
+    @protected
+    def posting_cursor(self, fieldnum, text, astype = None, exclude_docs = None):
+        """Returns a PostingCursor over the documents containing the given
+        term, in increasing document number order. The values of the
+        postings are weights, or the posting data interpreted as 'astype'
+        (for example "positions").
+        
+        :exclude_docs:
+            a set of document numbers to ignore.
+        """
+        
+        readfn, skipfn = self._posting_readfns(fieldnum, astype)
+        reader = self.term_table.posting_reader((fieldnum, text), readfn, skipfn)
+        return PostingCursor(reader, self.segment.is_deleted, exclude_docs)
+
+
+class PostingCursor(object):
+    """Iterates the (docnum, value) postings of a term in increasing document
+    number order, leaving out deleted and excluded documents. skip_to()
+    moves forward to a given document number, using the skip pointers of
+    the postings when possible.
+    """
+    
+    def __init__(self, reader, is_deleted, exclude_docs = None, offset = 0):
+        """
+        :reader: a tables.PostingReader.
+        :is_deleted: function checking if a segment document is deleted.
+        :exclude_docs: a set of document numbers to ignore.
+        :offset: number of the first segment document in the index.
+        """
+        
+        self.reader = reader
+        self.is_deleted = is_deleted
+        self.exclude_docs = exclude_docs
+        self.offset = offset
+    
+    def __iter__(self):
+        return self
+    
+    def _valid(self, docnum, value):
+        # Moves past deleted and excluded documents
+        is_deleted = self.is_deleted
+        exclude_docs = self.exclude_docs
+        offset = self.offset
+        while is_deleted(docnum)\
+              or (exclude_docs is not None and docnum + offset in exclude_docs):
+            docnum, value = self.reader.next()
+        return (docnum + offset, value)
+    
+    def next(self):
+        return self._valid(*self.reader.next())
+    
+    def skip_to(self, docnum):
+        """Moves to the first posting with a document number greater than
+        or equal to 'docnum' and returns it. Raises StopIteration if there
+        is no such posting.
+        """
+        return self._valid(*self.reader.skip_to(docnum - self.offset))
+
+
+class MultiPostingCursor(object):
+    """Iterates postings of a term in several segments as a PostingCursor.
+    """
+    
+    def __init__(self, cursors, offsets):
+        self.cursors = cursors
+        self.offsets = offsets
+        self.current = 0
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        cursors = self.cursors
+        while self.current < len(cursors):
+            try:
+                return cursors[self.current].next()
+            except StopIteration:
+                self.current += 1
+        raise StopIteration
+    
+    def skip_to(self, docnum):
+        cursors = self.cursors
+        offsets = self.offsets
+        # Go to the last segment starting at or before the document
+        while self.current < len(cursors) - 1 and offsets[self.current + 1] <= docnum:
+            self.current += 1
+        
+        while self.current < len(cursors):
+            try:
+                return cursors[self.current].skip_to(docnum)
+            except StopIteration:
+                self.current += 1
+        raise StopIteration
 
 
 class MultiTermReader(TermReader):
@@ -555,6 +708,27 @@ class MultiTermReader(TermReader):
     def iter_from(self, fieldnum, text):
         return self._merge_iters([r.iter_from(fieldnum, text) for r in self.term_readers])
     
+    def _texts_from(self, fieldnum, text):
+        current = []
+        for r in self.term_readers:
+            it = r._texts_from(fieldnum, text)
+            for t in it:
+                current.append((t, it))
+                break
+        heapify(current)
+        
+        while current:
+            text = current[0][0]
+            yield text
+            
+            # Advance all the iterators positioned at this term
+            while current and current[0][0] == text:
+                it = current[0][1]
+                try:
+                    heapreplace(current, (it.next(), it))
+                except StopIteration:
+                    heappop(current)
+    
     def close(self):
         """
         Closes the open files associated with this reader.
@@ -586,8 +760,10 @@ class MultiTermReader(TermReader):
         
         current = []
         for it in iterlist:
-            fnum, text, docfreq, termcount = it.next()
-            current.append((fnum, text, docfreq, termcount, it))
+            # Skip iterators which are empty from the start
+            for fnum, text, docfreq, termcount in it:
+                current.append((fnum, text, docfreq, termcount, it))
+                break
         heapify(current)
         
         # Number of active iterators
@@ -627,19 +803,38 @@ class MultiTermReader(TermReader):
         eliminated from consideration.
         """
         
+        # exclude_docs holds document numbers of the whole index, so they
+        # are checked here instead of in the segment readers.
+        no_exclude = exclude_docs is None
         for i, r in enumerate(self.term_readers):
             offset = self.doc_offsets[i]
             if (fieldnum, text) in r:
-                for docnum, data in r.postings(fieldnum, text, exclude_docs = exclude_docs):
-                    yield (docnum + offset, data)
+                for docnum, data in r.postings(fieldnum, text):
+                    docnum += offset
+                    if no_exclude or docnum not in exclude_docs:
+                        yield (docnum, data)
                     
     def weights(self, fieldnum, text, exclude_docs = None, boost = 1.0):
+        no_exclude = exclude_docs is None
         for i, r in enumerate(self.term_readers):
             offset = self.doc_offsets[i]
             if (fieldnum, text) in r:
-                for docnum, weight in r.weights(fieldnum, text,
-                                                exclude_docs = exclude_docs, boost = boost):
-                    yield (docnum + offset, weight)
+                for docnum, weight in r.weights(fieldnum, text, boost = boost):
+                    docnum += offset
+                    if no_exclude or docnum not in exclude_docs:
+                        yield (docnum, weight)
+    
+    def posting_cursor(self, fieldnum, text, astype = None, exclude_docs = None):
+        cursors = []
+        offsets = []
+        for i, r in enumerate(self.term_readers):
+            if (fieldnum, text) in r:
+                readfn, skipfn = r._posting_readfns(fieldnum, astype)
+                offset = self.doc_offsets[i]
+                reader = r.term_table.posting_reader((fieldnum, text), readfn, skipfn)
+                cursors.append(PostingCursor(reader, r.segment.is_deleted, exclude_docs, offset))
+                offsets.append(offset)
+        return MultiPostingCursor(cursors, offsets)
 
 
 
@@ -19,6 +19,7 @@
 
 from __future__ import division
 from array import array
+from itertools import izip
 from math import log, pi
 import weakref
 
@@ -78,6 +79,20 @@ class Weighting(object):
         :QTF: the frequency of the term in the query.
         """
         raise NotImplementedError
+    
+    def score_block(self, searcher, fieldnum, text, docnums, weights, QTF = 1):
+        """Returns a list of scores for a block of postings of the given term.
+        
+        :docnums: a sequence of document numbers.
+        :weights: a sequence of the corresponding frequency * boost values.
+        
+        The default implementation calls score() for each posting. Subclasses
+        can override it to compute the per-term factors once per block.
+        """
+        
+        score = self.score
+        return [score(searcher, fieldnum, text, docnum, weight, QTF)
+                for docnum, weight in izip(docnums, weights)]
 
 # Scoring classes
 
@@ -108,6 +123,24 @@ class BM25F(Weighting):
         
         w = weight / ((1 - B) + B * (l / avl))
         return idf * (w / (self.K1 + w))
+    
+    def score_block(self, searcher, fieldnum, text, docnums, weights, QTF = 1):
+        if not searcher.scorable(fieldnum): return list(weights)
+        
+        B = self._field_B.get(fieldnum, self.B)
+        K1 = self.K1
+        idf = self.idf(searcher, fieldnum, text)
+        lengths = searcher.doc_field_length_array(fieldnum)
+        
+        # Same as score(), with the per-term factors taken out of the loop
+        base = 1 - B
+        norm = B / self.avg_field_length(searcher, fieldnum)
+        scores = []
+        append = scores.append
+        for docnum, weight in izip(docnums, weights):
+            w = weight / (base + norm * lengths[docnum])
+            append(idf * (w / (K1 + w)))
+        return scores
         
 
 # The following scoring algorithms are translated from classes in
@@ -43,6 +43,7 @@ class Searcher(util.ClosableMixin):
         self.schema = ix.schema
         self._max_weight = ix.max_weight()
         self._doc_count_all = self.doc_reader.doc_count_all()
+        self._field_length_arrays = {}
         
         if callable(weighting):
             weighting = weighting()
@@ -69,9 +70,10 @@ class Searcher(util.ClosableMixin):
                      "vector", "vector_as", "vector_format", "vector_supports"):
             setattr(self, name, getattr(self.doc_reader, name))
             
-        for name in ("iter_field", "expand_prefix",
+        for name in ("iter_field", "expand_prefix", "expand_automaton",
                      "all_terms", "lexicon", "most_frequent_terms",
-                     "doc_frequency", "frequency", "postings", "weights", "positions"):
+                     "doc_frequency", "frequency", "postings", "weights", "positions",
+                     "posting_cursor"):
             setattr(self, name, getattr(self.term_reader, name))
             
     def doc_count_all(self):
@@ -80,6 +82,16 @@ class Searcher(util.ClosableMixin):
     def max_weight(self):
         return self._max_weight
     
+    def doc_field_length_array(self, fieldnum):
+        """Returns an array of the lengths of the given field in each
+        document, indexed by document number. The array is read once
+        and kept for the life of the searcher.
+        """
+        
+        if fieldnum not in self._field_length_arrays:
+            self._field_length_arrays[fieldnum] = self.doc_reader.doc_field_length_array(fieldnum)
+        return self._field_length_arrays[fieldnum]
+    
     def close(self):
         self.term_reader.close()
         self.doc_reader.close()
@@ -65,6 +65,8 @@ class SpellChecker(object):
         self.indexname = indexname
         
         self._index = None
+        self._searcher = None
+        self._words = None
         
         self.booststart = booststart
         self.boostend = boostend
@@ -77,12 +79,56 @@ class SpellChecker(object):
         """
         
         import index
+        if self._index and not self._index.up_to_date():
+            # Someone else has added words since
+            self._close_searcher()
+            self._index = None
+            self._words = None
+        
         if not self._index:
             create = not index.exists(self.storage, indexname = self.indexname)
             self._index = index.Index(self.storage, create = create,
                                       schema = self._schema(), indexname = self.indexname)
         return self._index
     
+    def searcher(self):
+        """Returns a searcher for the backend index. The searcher is kept
+        open between calls and reopened only when the dictionary changes.
+        """
+        
+        ix = self.index()
+        if not self._searcher:
+            self._searcher = searching.Searcher(ix)
+        return self._searcher
+    
+    def _close_searcher(self):
+        if self._searcher:
+            self._searcher.close()
+            self._searcher = None
+    
+    def close(self):
+        """Closes the searcher and the backend index of this object.
+        """
+        
+        self._close_searcher()
+        if self._index:
+            self._index.close()
+            self._index = None
+    
+    def words(self):
+        """Returns the set of words in the backend dictionary. The set is
+        read once and then kept up to date as words are added.
+        """
+        
+        ix = self.index()
+        if self._words is None:
+            dr = ix.doc_reader()
+            try:
+                self._words = set(fs["word"] for fs in dr)
+            finally:
+                dr.close()
+        return self._words
+    
     def _schema(self):
         # Creates a schema given this object's mingram and maxgram attributes.
         
@@ -128,52 +174,76 @@ class SpellChecker(object):
                 queries.append(query.Term(key, gram))
         
         q = query.Or(queries)
-        ix = self.index()
+        s = self.searcher()
+        results = s.search(q)
         
-        s = searching.Searcher(ix)
-        try:
-            results = s.search(q)
-            
-            length = len(results)
-            if len(results) > number*2:
-                length = len(results)//2
-            fieldlist = results[:length]
-            
-            suggestions = [(fs["word"], fs["score"])
-                           for fs in fieldlist
-                           if fs["word"] != text]
-            
-            if usescores:
-                def keyfn(a):
-                    return 0 - (1/distance(text, a[0])) * a[1]
-            else:
-                def keyfn(a):
-                    return distance(text, a[0])
-            
-            suggestions.sort(key = keyfn)
-        finally:
-            s.close()
+        length = len(results)
+        if len(results) > number*2:
+            length = len(results)//2
+        fieldlist = results[:length]
+        
+        suggestions = [(fs["word"], fs["score"])
+                       for fs in fieldlist
+                       if fs["word"] != text]
+        
+        if usescores:
+            def keyfn(a):
+                return 0 - (1/distance(text, a[0])) * a[1]
+        else:
+            def keyfn(a):
+                return distance(text, a[0])
+        
+        suggestions.sort(key = keyfn)
         
         return [word for word, _ in suggestions[:number]]
         
-    def add_field(self, ix, fieldname):
+    def add_field(self, ix, fieldname, segments = None):
         """Adds the terms in a field from another index to the backend dictionary.
         This method calls add_scored_words() and uses each term's frequency as the
         score. As a result, more common words will be suggested before rare words.
         If you want to calculate the scores differently, use add_scored_words()
         directly.
         
+        Terms which are already in the dictionary are skipped, so calling this
+        again after updating the index only adds the new words.
+        
         :ix: The index.Index object from which to add terms.
         :fieldname: The field name (or number) of a field in the source
             index. All the indexed terms from this field will be added to the
             dictionary.
+        :segments: An optional list of the index's segments to read the terms
+            from, e.g. the segments written by the last commit. By default
+            the terms of the whole index are read.
         """
         
-        tr = ix.term_reader()
+        from whoosh import reading
+        words = self.words()
+        
+        if segments is None:
+            readers = [ix.term_reader()]
+        else:
+            readers = [reading.TermReader(ix.storage, segment, ix.schema)
+                       for segment in segments]
+        
         try:
-            self.add_scored_words((w, freq) for w, _, freq in tr.iter_field(fieldname))
+            # A word may be in several of the segments, add it once with
+            # the frequencies summed, as the term reader of the whole index
+            # gives it
+            newwords = []
+            freqs = {}
+            for tr in readers:
+                for w, _, freq in tr.iter_field(fieldname):
+                    if w in words:
+                        continue
+                    if w not in freqs:
+                        newwords.append(w)
+                        freqs[w] = 0
+                    freqs[w] += freq
         finally:
-            tr.close()
+            for tr in readers:
+                tr.close()
+        
+        self.add_scored_words((w, freqs[w]) for w in newwords)
     
     def add_words(self, ws, score = 1):
         """Adds a list of words to the backend dictionary.
@@ -192,9 +262,11 @@ class SpellChecker(object):
         :ws: A sequence of ("word", score) tuples.
         """
         
-        writer = writing.IndexWriter(self.index())
+        writer = None
         for text, score in ws:
             if text.isalpha():
+                if writer is None:
+                    writer = writing.IndexWriter(self.index())
                 fields = {"word": text, "score": score}
                 for size in xrange(self.mingram, self.maxgram + 1):
                     nga = analysis.NgramAnalyzer(size)
@@ -204,7 +276,12 @@ class SpellChecker(object):
                         fields["end%s" % size] = gramlist[-1]
                         fields["gram%s" % size] = " ".join(gramlist)
                 writer.add_document(**fields)
-        writer.commit()
+                if self._words is not None:
+                    self._words.add(text)
+        
+        if writer is not None:
+            self._close_searcher()
+            writer.commit()
     
 if __name__ == '__main__':
     pass
@@ -75,8 +75,16 @@ class FileStorage(Storage):
     """Storage object that stores the index as files in a directory on disk.
     """
     
-    def __init__(self, path):
+    def __init__(self, path, mapped = False):
+        """
+        :path: the directory containing the index files.
+        :mapped: if True, files opened for reading are memory-mapped (see
+            StructFile). Segment files are never changed once written, so
+            all processes reading an index share the same pages.
+        """
+        
         self.folder = path
+        self.mapped = mapped
         
         if not os.path.exists(path):
             raise IOError("Directory %s does not exist" % path)
@@ -122,7 +130,7 @@ class FileStorage(Storage):
         return f
     
     def open_file(self, name, compressed = False):
-        f = StructFile(open(self._fpath(name), "rb"))
+        f = StructFile(open(self._fpath(name), "rb"), mapped = self.mapped)
         f._name = name
         return f
     
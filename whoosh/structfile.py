@@ -18,11 +18,12 @@
 encoding and compression methods such as variable-length encoded integers.
 """
 
+import mmap
 from cPickle import dump as dump_pickle
 from cPickle import load as load_pickle
 from marshal import dump as dump_marshal
 from marshal import load as load_marshal
-from struct import calcsize, pack, unpack
+from struct import calcsize, pack, unpack, Struct
 from array import array
 
 
@@ -31,6 +32,12 @@ _USHORT_SIZE = calcsize("H")
 _ULONG_SIZE = calcsize("L")
 _FLOAT_SIZE = calcsize("f")
 
+_SBYTE_STRUCT = Struct("b")
+_INT_STRUCT = Struct("i")
+_USHORT_STRUCT = Struct("H")
+_ULONG_STRUCT = Struct("L")
+_FLOAT_STRUCT = Struct("f")
+
 # Utility functions
 
 def float_to_byte(value, mantissabits = 5, zeroexp = 2):
@@ -97,15 +104,33 @@ class StructFile(object):
     access to it.
     """
     
-    def __init__(self, fileobj, name = None, onclose = None):
+    def __init__(self, fileobj, name = None, onclose = None, mapped = False):
         """
         file is the file-like object to wrap.
+        
+        If mapped is True and fileobj is a real file opened for reading, the
+        file is memory-mapped and read from the mapping, so reads don't go
+        through the file object and processes reading the same file share
+        its pages. Files that can't be mapped (e.g. empty files) are read
+        normally.
         """
         
-        self.file = fileobj
         self.onclose = onclose
         self._name = name
         
+        # The file object a mapping was made from, it is kept open (and
+        # closed with this object) so fileno() still works
+        self._source = None
+        if mapped and isinstance(fileobj, file):
+            try:
+                mapping = mmap.mmap(fileobj.fileno(), 0, access = mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError):
+                pass
+            else:
+                self._source = fileobj
+                fileobj = mapping
+        self.file = fileobj
+        
         self.tell = self.file.tell
         self.seek = self.file.seek
         if hasattr(self.file, "read"):
@@ -131,6 +156,9 @@ class StructFile(object):
             for typename in ("sbyte", "int", "ushort", "ulong", "float", "array"):
                 setattr(self, "write_"+typename, getattr(self, "_write_"+typename))
                 setattr(self, "read_"+typename, getattr(self, "_read_"+typename))
+        elif self._source is not None:
+            for typename in ("byte", "sbyte", "int", "ushort", "ulong", "float", "varint"):
+                setattr(self, "read_"+typename, getattr(self, "_mapped_read_"+typename))
                 
         self._type_writers = {"b": self.write_sbyte,
                               "B": self.write_byte,
@@ -361,6 +389,33 @@ class StructFile(object):
         arry.fromfile(self.file, length)
         return arry
     
+    # These variants are used when the file is memory-mapped. They read
+    # straight from the mapping instead of going through array objects.
+    
+    def _mapped_read_byte(self):
+        return ord(self.file.read_byte())
+    def _mapped_read_sbyte(self):
+        return _SBYTE_STRUCT.unpack(self.file.read_byte())[0]
+    def _mapped_read_int(self):
+        return _INT_STRUCT.unpack(self.file.read(_INT_SIZE))[0]
+    def _mapped_read_ushort(self):
+        return _USHORT_STRUCT.unpack(self.file.read(_USHORT_SIZE))[0]
+    def _mapped_read_ulong(self):
+        return _ULONG_STRUCT.unpack(self.file.read(_ULONG_SIZE))[0]
+    def _mapped_read_float(self):
+        return _FLOAT_STRUCT.unpack(self.file.read(_FLOAT_SIZE))[0]
+    def _mapped_read_varint(self):
+        read = self.file.read_byte
+        b = ord(read())
+        i = b & 0x7F
+        
+        shift = 7
+        while b & 0x80 != 0:
+            b = ord(read())
+            i |= (b & 0x7F) << shift
+            shift += 7
+        return i
+    
     def read_string(self):
         """Reads a string from the wrapped file.
         """
@@ -416,6 +471,14 @@ class StructFile(object):
         if hasattr(self.file, "flush"):
             self.file.flush()
     
+    def fileno(self):
+        """Returns the file descriptor of the wrapped file. Raises
+        AttributeError if the wrapped file-like object has none.
+        """
+        if self._source is not None:
+            return self._source.fileno()
+        return self.file.fileno()
+    
     def close(self):
         """Closes the wrapped file. This is a no-op
         if the wrapped file does not have a close method.
@@ -424,6 +487,8 @@ class StructFile(object):
             self.onclose(self)
         if hasattr(self.file, "close"):
             self.file.close()
+        if self._source is not None:
+            self._source.close()
         self.is_closed = True
         
 
@@ -32,16 +32,34 @@ they can be any pickle-able object. (The keys must also be hashable because
 they are used as dictionary keys. It's best to use value types for the
 keys: tuples, numbers, and/or strings.)
 
+Tables whose keys are ints, strings or tuples of them are written in a
+binary block format instead (see _BlockBuilder): keys are front-coded, that
+is stored as the length of the prefix they share with the previous key in
+the block plus the rest of their bytes, and the posting offsets, lengths and
+counts are varints. The directory starts with BINARY_MAGIC, followed by the
+marshalled options and the front-coded first keys of the blocks, so no part
+of such a table is pickled. Tables written before this format are still read.
+
+Decoded blocks are kept in the module-level block_cache, which is shared by
+all readers of the same file.
+
+For postings with numeric IDs, every SKIP_INTERVAL-th posting is recorded
+in the row as a skip pointer (ID and position in the posting data), which
+lets PostingReader.skip_to() jump over the postings in between.
+
 This module also contains simple implementations for writing and reading
 static "Record" files made up of fixed-length records based on the
 struct module.
 """
 
-import shutil, tempfile
+import os, shutil, tempfile
 from array import array
 from bisect import bisect_left, bisect_right
+from codecs import utf_8_decode
+from cStringIO import StringIO
 from marshal import loads
 from marshal import dumps
+from threading import Lock
 
 try:
     from zlib import compress, decompress
@@ -49,7 +67,16 @@ try:
 except ImportError:
     has_zlib = False
 
-from whoosh.structfile import _USHORT_SIZE, StructFile
+from whoosh.structfile import _USHORT_SIZE, StructFile, encode_varint
+
+# Number of postings between two skip pointers
+SKIP_INTERVAL = 64
+
+# Marks the directory of a table written in the binary block format
+BINARY_MAGIC = "WTB1"
+
+# Maximum number of decoded blocks kept in memory by block_cache
+BLOCK_CACHE_SIZE = 256
 
 # Utility functions
 
@@ -61,9 +88,12 @@ def copy_data(treader, inkey, twriter, outkey, postings = False, buffersize = 32
     """
     
     if postings:
-        offset, length, postcount, data = treader._get_plain(inkey)
+        row = treader._get_plain(inkey)
+        offset, length, postcount, data = row[:4]
+        # Skip pointers are relative to the start of the postings, so
+        # they can be copied as they are.
         twriter.add_row(outkey, data,
-                        postinginfo=(twriter.offset, length, postcount))
+                        postinginfo=(twriter.offset, length, postcount) + row[4:5])
         
         # Copy the raw posting data
         infile = treader.table_file
@@ -83,6 +113,338 @@ def copy_data(treader, inkey, twriter, outkey, postings = False, buffersize = 32
         twriter.add_row(outkey, treader[inkey])
 
 
+# Binary block format
+
+def _key_types(key):
+    """Returns a (typecodes, istuple) pair describing how the given key is
+    encoded in the binary block format, or (None, False) if keys of this type
+    can only be stored in pickled blocks.
+    """
+    
+    istuple = isinstance(key, tuple)
+    if not istuple:
+        key = (key, )
+    typecodes = []
+    for v in key:
+        if isinstance(v, bool):
+            return None, False
+        elif isinstance(v, (int, long)) and v >= 0:
+            typecodes.append("i")
+        elif isinstance(v, unicode):
+            typecodes.append("u")
+        elif isinstance(v, str):
+            typecodes.append("s")
+        else:
+            return None, False
+    return "".join(typecodes), istuple
+
+def _encode_key(key, typecodes, istuple):
+    if not istuple:
+        key = (key, )
+    if len(key) != len(typecodes):
+        raise ValueError("Key %r does not match the key types %r" % (key, typecodes))
+    
+    last = len(typecodes) - 1
+    parts = []
+    for i, tc in enumerate(typecodes):
+        v = key[i]
+        if tc == "i":
+            parts.append(encode_varint(v))
+        else:
+            if tc == "u":
+                v = v.encode("utf8")
+            # The last string runs to the end of the key and needs no length
+            if i < last:
+                parts.append(encode_varint(len(v)))
+            parts.append(v)
+    return "".join(parts)
+
+def _decode_key(s, typecodes, istuple):
+    last = len(typecodes) - 1
+    key = []
+    p = 0
+    for i, tc in enumerate(typecodes):
+        if tc == "i":
+            v, p = _read_varint(s, p)
+        else:
+            if i < last:
+                length, p = _read_varint(s, p)
+                v = s[p:p + length]
+                p += length
+            else:
+                v = s[p:]
+            if tc == "u":
+                v = v.decode("utf8")
+        key.append(v)
+    
+    if istuple:
+        return tuple(key)
+    return key[0]
+
+def _read_varint(s, p):
+    b = ord(s[p])
+    p += 1
+    i = b & 0x7F
+    shift = 7
+    while b & 0x80:
+        b = ord(s[p])
+        p += 1
+        i |= (b & 0x7F) << shift
+        shift += 7
+    return i, p
+
+def _decode_varints(s):
+    """Decodes a string of concatenated varints into a list of ints.
+    """
+    
+    numbers = []
+    append = numbers.append
+    i = shift = 0
+    for b in array("B", s):
+        if b & 0x80:
+            i |= (b & 0x7F) << shift
+            shift += 7
+        else:
+            append(i | (b << shift))
+            i = shift = 0
+    return numbers
+
+# Flags of a row with postings in the binary format
+_HAS_SKIPS = 4
+_EXPLICIT_OFFSET = 8
+
+def _common_prefix_length(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class _BlockBuilder(object):
+    # Collects the rows of a block in the binary format. The block is made
+    # of three parts, so each can be decoded in one go: the varints of all
+    # rows (key prefix and suffix lengths, posting info, value tags and int
+    # values), the key suffixes, and a marshalled list of the other values
+    # and of the skip pointers, which are stored as arrays.
+    # Keys made only of ints are stored in the varints as they are, front
+    # coding gains nothing for them.
+    
+    def __init__(self, typecodes, istuple):
+        self.typecodes = typecodes
+        self.istuple = istuple
+        self.intkeys = typecodes.strip("i") == ""
+        self.count = 0
+        self.numbers = []
+        self.suffixes = []
+        self.objects = []
+        self.lastkeybytes = ""
+        self.size = 0
+    
+    def add_key(self, key):
+        if not self.count:
+            self.firstkey = key
+        self.count += 1
+        if self.intkeys:
+            if self.istuple:
+                self.numbers.extend(key)
+            else:
+                self.numbers.append(key)
+            self.size += len(self.typecodes)
+            return
+        
+        keybytes = _encode_key(key, self.typecodes, self.istuple)
+        shared = _common_prefix_length(self.lastkeybytes, keybytes)
+        self.numbers.append(shared)
+        self.numbers.append(len(keybytes) - shared)
+        self.suffixes.append(keybytes[shared:])
+        self.lastkeybytes = keybytes
+        self.size += len(keybytes) - shared + 2
+    
+    def add_value(self, v, flags = 0):
+        # The type of the value is stored in the low bits of a number, the
+        # other bits are free for the flags of the row
+        numbers = self.numbers
+        if v is None:
+            numbers.append(flags)
+        elif type(v) in (int, long) and v >= 0:
+            numbers.append(flags | 1)
+            numbers.append(v)
+        else:
+            numbers.append(flags | 2)
+            self.add_object(v)
+        self.size += 2
+    
+    def add_object(self, v):
+        self.objects.append(v)
+        self.size += len(dumps(v))
+    
+    def add_numbers(self, numbers):
+        self.numbers.extend(numbers)
+        self.size += len(numbers)
+    
+    def tostring(self):
+        numbers = "".join([encode_varint(n) for n in self.numbers])
+        suffixes = "".join(self.suffixes)
+        parts = [encode_varint(self.count), encode_varint(len(numbers)),
+                 encode_varint(len(suffixes)), numbers, suffixes]
+        if self.objects:
+            parts.append(dumps(self.objects))
+        return "".join(parts)
+
+
+def _decode_block(s, typecodes, istuple, haspostings, keysonly = False):
+    """Decodes a block in the binary format. Returns a (keys, values) pair
+    of lists, or just the list of keys if keysonly is True.
+    """
+    
+    count, p = _read_varint(s, 0)
+    numlength, p = _read_varint(s, p)
+    keylength, p = _read_varint(s, p)
+    numbers = _decode_varints(s[p:p + numlength])
+    q = p + numlength
+    objects = None
+    k = 0
+    
+    termkeys = typecodes == "iu" and istuple
+    intkeys = typecodes.strip("i") == ""
+    width = len(typecodes)
+    keys = []
+    values = []
+    lastkey = ""
+    offset = 0
+    n = 0
+    for _ in xrange(count):
+        if intkeys:
+            if istuple:
+                keys.append(tuple(numbers[n:n + width]))
+            else:
+                keys.append(numbers[n])
+            n += width
+        else:
+            length = numbers[n + 1]
+            keybytes = lastkey[:numbers[n]] + s[q:q + length]
+            q += length
+            n += 2
+            lastkey = keybytes
+            
+            # Term table keys are (fieldnum, text), the common case
+            if termkeys and keybytes[0] < "\x80":
+                keys.append((ord(keybytes[0]), utf_8_decode(keybytes[1:])[0]))
+            else:
+                keys.append(_decode_key(keybytes, typecodes, istuple))
+        if keysonly:
+            continue
+        
+        tag = numbers[n]
+        n += 1
+        kind = tag & 3
+        if kind == 1:
+            value = numbers[n]
+            n += 1
+        elif kind == 0:
+            value = None
+        else:
+            if objects is None:
+                objects = loads(s[p + numlength + keylength:])
+            value = objects[k]
+            k += 1
+        
+        if haspostings:
+            if tag & _EXPLICIT_OFFSET:
+                offset = numbers[n]
+                n += 1
+            postlength = numbers[n]
+            postcount = numbers[n + 1]
+            n += 2
+            if tag & _HAS_SKIPS:
+                skipcount = numbers[n]
+                n += 1
+                if objects is None:
+                    objects = loads(s[p + numlength + keylength:])
+                skips = array("i")
+                skips.fromstring(objects[k])
+                k += 1
+                value = (offset, postlength, postcount, value,
+                         (skips[:skipcount], skips[skipcount:]))
+            else:
+                value = (offset, postlength, postcount, value)
+            offset += postlength
+        values.append(value)
+    
+    if keysonly:
+        return keys
+    return keys, values
+
+
+class BlockCache(object):
+    """Keeps the most recently used decoded table blocks in memory, so
+    random lookups (e.g. when expanding Prefix or Wildcard queries) don't
+    decode the same blocks over and over again.
+    """
+    
+    def __init__(self, size):
+        """
+        :size: the maximum number of blocks to keep.
+        """
+        
+        self.size = size
+        self._blocks = {}
+        self._clock = 0
+        self._lock = Lock()
+    
+    def __len__(self):
+        return len(self._blocks)
+    
+    def get(self, key):
+        """Returns the block stored under the given key, or None.
+        """
+        
+        item = self._blocks.get(key)
+        if item is None:
+            return None
+        self._clock += 1
+        item[0] = self._clock
+        return item[1]
+    
+    def put(self, key, block):
+        self._lock.acquire()
+        try:
+            self._clock += 1
+            blocks = self._blocks
+            blocks[key] = [self._clock, block]
+            if len(blocks) > self.size:
+                # Drop the least recently used quarter at once, so the
+                # sorting is amortized over many insertions
+                items = sorted(blocks.iteritems(), key=lambda item: item[1][0])
+                for k, _ in items[:len(blocks) - self.size * 3 // 4]:
+                    del blocks[k]
+        finally:
+            self._lock.release()
+    
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._blocks.clear()
+        finally:
+            self._lock.release()
+
+
+block_cache = BlockCache(BLOCK_CACHE_SIZE)
+
+
+def _file_key(table_file):
+    """Returns a key identifying the contents of the file wrapped by the
+    given StructFile, or None if the file can't be identified.
+    """
+    
+    try:
+        st = os.fstat(table_file.fileno())
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime)
+
+
 # Table writer classes
 
 class TableWriter(object):
@@ -105,11 +467,19 @@ class TableWriter(object):
             self.lastpostid = None
             self.stringids = stringids
             self.posting_file = StructFile(tempfile.TemporaryFile())
+            self.skipids = []
+            self.skippositions = []
         
         self.rowbuffer = []
         self.lastkey = None
         self.blockfilled = 0
         
+        # The binary format is chosen by the type of the first key
+        self.keytypes = None
+        self.tuplekeys = False
+        self.builder = None
+        self.lastrowend = 0
+        
         self.keys = []
         self.pointers = array("L")
         
@@ -123,11 +493,12 @@ class TableWriter(object):
         self.options = {"haspostings": postings,
                         "compressed": compressed,
                         "prefixcoding": prefixcoding,
-                        "stringids": stringids}
+                        "stringids": stringids,
+                        "skipinterval": SKIP_INTERVAL}
     
     def close(self):
         # If there is still a block waiting to be written, flush it out
-        if self.rowbuffer:
+        if self.rowbuffer or self.builder:
             self._write_block()
         
         tf = self.table_file
@@ -136,9 +507,20 @@ class TableWriter(object):
         # Remember where we started writing the directory
         dirpos = tf.tell()
         # Write the directory
-        tf.write_pickle(self.keys)
+        if self.keytypes:
+            options = dict(self.options, keytypes=self.keytypes,
+                           tuplekeys=self.tuplekeys)
+            tf.write(BINARY_MAGIC)
+            tf.write_string(dumps(options))
+            builder = _BlockBuilder(self.keytypes, self.tuplekeys)
+            for key in self.keys:
+                builder.add_key(key)
+            tf.write_string(builder.tostring())
+        else:
+            tf.write_pickle(self.keys)
         tf.write_array(self.pointers)
-        tf.write_pickle(self.options)
+        if not self.keytypes:
+            tf.write_pickle(self.options)
         
         if haspostings:
             # Remember where we started the postings
@@ -162,9 +544,21 @@ class TableWriter(object):
     
     def _write_block(self):
         buf = self.rowbuffer
-        key = buf[0][0]
         compressed = self.compressed
         
+        if self.keytypes:
+            self.keys.append(self.builder.firstkey)
+            self.pointers.append(self.table_file.tell())
+            data = self.builder.tostring()
+            if compressed:
+                data = compress(data, compressed)
+            self.table_file.write_string(data)
+            
+            self.builder = None
+            self.blockfilled = 0
+            return
+        
+        key = buf[0][0]
         self.keys.append(key)
         self.pointers.append(self.table_file.tell())
         if compressed:
@@ -191,7 +585,11 @@ class TableWriter(object):
         self.lastpostid = id
         self.postcount += 1
         
-        return writefn(pf, data)
+        result = writefn(pf, data)
+        if not self.stringids and self.postcount % SKIP_INTERVAL == 0:
+            self.skipids.append(id)
+            self.skippositions.append(pf.tell() - self.offset)
+        return result
     
     def add_row(self, key, data, postinginfo=None):
         # Note: call this AFTER you add any postings!
@@ -199,13 +597,8 @@ class TableWriter(object):
         if key <= self.lastkey:
             raise IndexError("Keys must increase: %r..%r" % (self.lastkey, key))
         
-        rb = self.rowbuffer
-        
-        if isinstance(data, array):
-            self.blockfilled += len(data) * data.itemsize
-        else:
-            # Ugh! We're pickling twice! At least it's fast.
-            self.blockfilled += len(dumps(data))
+        if self.lastkey is None:
+            self.keytypes, self.tuplekeys = _key_types(key)
         self.lastkey = key
         
         if self.haspostings:
@@ -216,24 +609,72 @@ class TableWriter(object):
             # The postinginfo keyword argument allows us to copy
             # information about postings from another table.
             if postinginfo:
-                offset, length, postcount = postinginfo
+                offset, length, postcount = postinginfo[:3]
+                skips = postinginfo[3:4]
             else:
                 offset = self.offset
                 length = endoffset - self.offset
                 postcount = self.postcount
-            rb.append((key, (offset, length, postcount, data)))
+                skips = ()
+                if self.skipids:
+                    skips = ((tuple(self.skipids), tuple(self.skippositions)), )
+            value = (offset, length, postcount, data) + skips
             
             # Reset the posting variables
             self.offset = endoffset
             self.postcount = 0
             self.lastpostid = None
+            self.skipids = []
+            self.skippositions = []
+        else:
+            value = data
+        
+        if self.keytypes:
+            self._add_binary_row(key, value)
         else:
-            rb.append((key, data))
+            if isinstance(data, array):
+                self.blockfilled += len(data) * data.itemsize
+            else:
+                # Ugh! We're pickling twice! At least it's fast.
+                self.blockfilled += len(dumps(data))
+            self.rowbuffer.append((key, value))
         
         # If this row filled up a block, flush it out
         if self.blockfilled >= self.blocksize:
-            #print len(rb)
             self._write_block()
+    
+    def _add_binary_row(self, key, value):
+        builder = self.builder
+        if builder is None:
+            # Keys and offsets are coded relative to the previous row in
+            # the block, so each block can be decoded on its own
+            builder = self.builder = _BlockBuilder(self.keytypes, self.tuplekeys)
+            self.lastrowend = 0
+        
+        builder.add_key(key)
+        if self.haspostings:
+            offset, length, postcount, data = value[:4]
+            # The offset is only stored if the postings don't directly
+            # follow the postings of the previous row
+            flags = 0
+            if offset != self.lastrowend:
+                flags |= _EXPLICIT_OFFSET
+            if len(value) > 4:
+                flags |= _HAS_SKIPS
+            builder.add_value(data, flags)
+            
+            if flags & _EXPLICIT_OFFSET:
+                builder.add_numbers((offset, ))
+            builder.add_numbers((length, postcount))
+            if flags & _HAS_SKIPS:
+                skipids, skippositions = value[4]
+                builder.add_numbers((len(skipids), ))
+                builder.add_object(array("i", tuple(skipids) + tuple(skippositions)).tostring())
+            self.lastrowend = offset + length
+        else:
+            builder.add_value(value)
+        
+        self.blockfilled = builder.size
 
 
 # Table reader classes
@@ -247,21 +688,40 @@ class TableReader(object):
         # Read the pointer to the postings (0 if there are no postings)
         self.postpos = table_file.read_ulong()
         
+        # Tables written before skip pointers have no interval
+        self.skipinterval = None
+        # Tables in the pickled format have no key types
+        self.keytypes = None
+        self.tuplekeys = False
+        
         # Seek to where the directory begins and read it
         table_file.seek(dirpos)
-        self.blockindex = table_file.read_pickle()
-        self.blockcount = len(self.blockindex)
-        self.blockpositions = table_file.read_array("L", self.blockcount)
-        options = table_file.read_pickle()
-        self.__dict__.update(options)
+        if table_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            self.__dict__.update(loads(table_file.read_string()))
+            self.blockindex = _decode_block(table_file.read_string(),
+                                            self.keytypes, self.tuplekeys,
+                                            False, keysonly = True)
+            self.blockcount = len(self.blockindex)
+            self.blockpositions = table_file.read_array("L", self.blockcount)
+        else:
+            table_file.seek(dirpos)
+            self.blockindex = table_file.read_pickle()
+            self.blockcount = len(self.blockindex)
+            self.blockpositions = table_file.read_array("L", self.blockcount)
+            self.__dict__.update(table_file.read_pickle())
         
         if self.compressed > 0 and not has_zlib:
             raise Exception("zlib is not available: cannot decompress table")
         
-        # Initialize cached block
+        # Decoded blocks are shared through block_cache by all readers of
+        # the same file. If the file can't be identified, the blocks are
+        # cached under a key private to this reader.
+        self._cachekey = _file_key(table_file) or object()
+        
+        # Initialize current block
         self.currentblock = None
-        self.itemlist = None
-        self.itemdict = None
+        self.blockkeys = None
+        self.blockvalues = None
         
         if self.haspostings:
             if self.stringids:
@@ -273,29 +733,35 @@ class TableReader(object):
             self.get = self._get_plain
     
     def __contains__(self, key):
-        if key < self.blockindex[0]:
+        if not self.blockcount or key < self.blockindex[0]:
             return False
         self._load_block(key)
-        return key in self.itemdict
+        keys = self.blockkeys
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
     
     def _get_ignore_postinfo(self, key):
-        self._load_block(key)
-        return self.itemdict[key][3]
+        return self._get_plain(key)[3]
     
     def _get_plain(self, key):
-        self._load_block(key)
-        return self.itemdict[key]
+        if self.blockcount:
+            self._load_block(key)
+            keys = self.blockkeys
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return self.blockvalues[i]
+        raise KeyError(key)
     
     def __iter__(self):
         if self.haspostings:
             for i in xrange(0, self.blockcount):
                 self._load_block_num(i)
-                for key, value in self.itemlist:
+                for key, value in zip(self.blockkeys, self.blockvalues):
                     yield (key, value[3])
         else:
             for i in xrange(0, self.blockcount):
                 self._load_block_num(i)
-                for key, value in self.itemlist:
+                for key, value in zip(self.blockkeys, self.blockvalues):
                     yield (key, value)
     
     def _read_id_varint(self, lastid):
@@ -307,32 +773,33 @@ class TableReader(object):
     def iter_from(self, key):
         postings = self.haspostings
         
-        self._load_block(key)
         blockcount = self.blockcount
-        itemlist = self.itemlist
+        if not blockcount:
+            return
+        self._load_block(key)
+        keys, values = self.blockkeys, self.blockvalues
         
-        p = bisect_left(itemlist, (key, None))
-        if p >= len(itemlist):
+        p = bisect_left(keys, key)
+        if p >= len(keys):
             if self.currentblock >= blockcount - 1:
                 return
             self._load_block_num(self.currentblock + 1)
-            itemlist = self.itemlist
+            keys, values = self.blockkeys, self.blockvalues
             p = 0
         
         # Yield the rest of the rows
         while True:
-            kv = itemlist[p]
             if postings:
-                yield (kv[0], kv[1][3])
+                yield (keys[p], values[p][3])
             else:
-                yield kv
+                yield (keys[p], values[p])
             
             p += 1
-            if p >= len(itemlist):
+            if p >= len(keys):
                 if self.currentblock >= blockcount - 1:
                     return
                 self._load_block_num(self.currentblock + 1)
-                itemlist = self.itemlist
+                keys, values = self.blockkeys, self.blockvalues
                 p = 0
     
     def close(self):
@@ -356,26 +823,56 @@ class TableReader(object):
             id = _read_id(id)
             yield (id, readfn(postfile))
     
+    def posting_reader(self, key, readfn, skipfn = None):
+        """Returns a PostingReader for the postings of the given key.
+        """
+        
+        if self.stringids: raise Exception("Can't skip in postings with string IDs")
+        row = self._get_plain(key)
+        offset, length, count = row[:3]
+        if len(row) > 4 and self.skipinterval:
+            skips = row[4]
+        else:
+            skips = ((), ())
+        
+        tf = self.table_file
+        tf.seek(self.postpos + offset)
+        return PostingReader(tf.read(length), count, skips, self.skipinterval,
+                             readfn, skipfn or readfn)
+    
     def _load_block_num(self, bn):
         blockcount = len(self.blockindex)
         if bn < 0 or bn >= blockcount:
             raise ValueError("Block number %s/%s" % (bn, blockcount))
         
-        pos = self.blockpositions[bn]
-        self.table_file.seek(pos)
+        cachekey = (self._cachekey, bn)
+        block = block_cache.get(cachekey)
+        if block is None:
+            block = self._read_block(bn)
+            block_cache.put(cachekey, block)
+        
+        self.blockkeys, self.blockvalues = block
+        self.currentblock = bn
+        self.minkey = self.blockkeys[0]
+        self.maxkey = self.blockkeys[-1]
+    
+    def _read_block(self, bn):
+        # Reads and decodes a block, returns a (keys, values) pair of lists
+        self.table_file.seek(self.blockpositions[bn])
+        
+        if self.keytypes:
+            data = self.table_file.read_string()
+            if self.compressed:
+                data = decompress(data)
+            return _decode_block(data, self.keytypes, self.tuplekeys,
+                                 self.haspostings)
         
-        # Sooooooo sloooooow...
         if self.compressed:
             pck = self.table_file.read_string()
             itemlist = loads(decompress(pck))
         else:
             itemlist = self.table_file.read_pickle()
-        
-        self.itemlist = itemlist
-        self.itemdict = dict(itemlist)
-        self.currentblock = bn
-        self.minkey = itemlist[0][0]
-        self.maxkey = itemlist[-1][0]
+        return ([key for key, _ in itemlist], [value for _, value in itemlist])
     
     def _load_block(self, key):
         if self.currentblock is None or key < self.minkey or key > self.maxkey:
@@ -388,6 +885,77 @@ class TableReader(object):
         return count
 
 
+class PostingReader(object):
+    """Reads the postings of one key in increasing ID order. The reader has
+    its own copy of the posting data, so several readers of the same table
+    can be used at the same time.
+    
+    Postings are (id, value) tuples, where the value is read by 'readfn'.
+    Postings passed over by skip_to() are read by 'skipfn' instead, which
+    only has to move past the posting data.
+    """
+    
+    def __init__(self, data, count, skips, skipinterval, readfn, skipfn):
+        self.postfile = StructFile(StringIO(data))
+        self.count = count
+        self.skipids, self.skippositions = skips
+        self.skipinterval = skipinterval
+        self.readfn = readfn
+        self.skipfn = skipfn
+        
+        # Number of postings read so far and the current posting
+        self.readcount = 0
+        self.id = None
+        self.value = None
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        if self.readcount >= self.count:
+            raise StopIteration
+        pf = self.postfile
+        self.id = (self.id or 0) + pf.read_varint()
+        self.value = self.readfn(pf)
+        self.readcount += 1
+        return (self.id, self.value)
+    
+    def skip_to(self, id):
+        """Moves to the first posting with an ID greater than or equal to
+        'id' and returns it. Raises StopIteration if there is no such posting.
+        """
+        
+        if self.id is not None and self.id >= id:
+            return (self.id, self.value)
+        if self.readcount >= self.count:
+            raise StopIteration
+        
+        # Jump to the last skip pointer before the ID, if it is ahead
+        i = bisect_left(self.skipids, id) - 1
+        if i >= 0 and (i + 1) * self.skipinterval > self.readcount:
+            self.postfile.seek(self.skippositions[i])
+            self.id = self.skipids[i]
+            self.readcount = (i + 1) * self.skipinterval
+        
+        pf = self.postfile
+        read_varint = pf.read_varint
+        skipfn = self.skipfn
+        count = self.count
+        current = self.id or 0
+        while self.readcount < count:
+            current += read_varint()
+            self.readcount += 1
+            if current >= id:
+                self.id = current
+                self.value = self.readfn(pf)
+                return (current, self.value)
+            skipfn(pf)
+        
+        # The last postings were passed over, there is no current posting
+        self.id = None
+        raise StopIteration
+
+
 # An array table only stores numeric arrays and does not support postings.
 
 class ArrayWriter(object):
@@ -534,6 +1102,15 @@ class RecordReader(object):
         tf = self.table_file
         tf.seek(1 + _USHORT_SIZE + recordnum * self.recordsize)
         return tf.read_array(self.typecode, self.length)
+    
+    def get_column(self, itemnum, count):
+        """Returns an array of the items at position 'itemnum' in the first
+        'count' records.
+        """
+        assert itemnum < self.length
+        tf = self.table_file
+        tf.seek(1 + _USHORT_SIZE)
+        return tf.read_array(self.typecode, count * self.length)[itemnum::self.length]
 
 
 class StringListWriter(object):
@@ -0,0 +1,49 @@
+import unittest
+
+from whoosh import fields, index, writing
+from whoosh.spelling import SpellChecker
+from whoosh.store import RamStorage
+
+
+class TestSpelling(unittest.TestCase):
+    def make_index(self, *docs):
+        """Creates an index with every document in its own segment."""
+        schema = fields.Schema(text = fields.TEXT)
+        ix = index.Index(RamStorage(), schema = schema, create = True)
+        for doc in docs:
+            w = writing.IndexWriter(ix)
+            w.add_document(text = doc)
+            w.commit(writing.NO_MERGE)
+        return ix
+
+    def dictionary(self, sp):
+        dr = sp.index().doc_reader()
+        try:
+            return sorted((fs["word"], fs["score"]) for fs in dr)
+        finally:
+            dr.close()
+
+    def test_add_field_segments(self):
+        ix = self.make_index(u"hello world", u"hello world", u"hello there")
+        self.assertEqual(len(ix.segments), 3)
+
+        sp = SpellChecker(RamStorage())
+        sp.add_field(ix, "text", segments = ix.segments.segments)
+        self.assertEqual(self.dictionary(sp),
+                         [(u"hello", 3), (u"there", 1), (u"world", 2)])
+
+        # Words which are already in the dictionary are skipped
+        sp.add_field(ix, "text", segments = ix.segments.segments[1:])
+        self.assertEqual(len(self.dictionary(sp)), 3)
+
+    def test_add_field_whole_index(self):
+        ix = self.make_index(u"hello world", u"hello there")
+        sp = SpellChecker(RamStorage())
+        sp.add_field(ix, "text")
+        sp.add_field(ix, "text")
+        self.assertEqual(self.dictionary(sp),
+                         [(u"hello", 2), (u"there", 1), (u"world", 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
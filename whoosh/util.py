@@ -120,18 +120,21 @@ class TopDocs(object):
         docs = self.docs
         capacity = self.capacity
         
+        # Documents with equal scores are ranked by document number, so the
+        # first N hits don't depend on N.
         subtotal = 0
         for docnum, score in sequence:
             docs.set(docnum)
             subtotal += 1
             
+            item = (score, -docnum)
             if len(heap) >= capacity:
-                if score <= heap[0][0]:
+                if item <= heap[0]:
                     continue
                 else:
-                    heapreplace(heap, (score, docnum))
+                    heapreplace(heap, item)
             else:
-                heappush(heap, (score, docnum))
+                heappush(heap, item)
         
         self._total += subtotal
 
@@ -146,8 +149,7 @@ class TopDocs(object):
         multiple times.
         """
         
-        # Throw away the score and just return a list of items
-        return [(item, score) for score, item in reversed(sorted(self.heap))]
+        return [(-negdocnum, score) for score, negdocnum in reversed(sorted(self.heap))]
     
 
 # Mix-in for objects with a close() method that allows them to be
@@ -212,6 +212,29 @@ class IndexWriter(index.DeletionMixin):
         # Add the given fields
         self.add_document(**fields)
     
+    def add_segments(self, other_ix):
+        """Adds the segments of another index to this index as they are, by
+        copying their files. Unlike SegmentWriter.add_index(), this doesn't
+        merge the documents into a new segment, so it takes time proportional
+        to the size of the files rather than to the number of postings. The
+        other index must have the same schema as this one.
+        
+        :other_ix: The index.Index object whose segments to add.
+        """
+        
+        storage = self.index.storage
+        for segment in other_ix.segments:
+            name = self.index._next_segment_name()
+            newsegment = index.Segment(name, segment.max_doc, segment.max_weight,
+                                       segment.field_length_totals, segment.deleted)
+            for attr in ("doclen_filename", "docs_filename",
+                         "term_filename", "vector_filename"):
+                filename = getattr(segment, attr)
+                if other_ix.storage.file_exists(filename):
+                    _copy_file(other_ix.storage, filename,
+                               storage, getattr(newsegment, attr))
+            self.segments.append(newsegment)
+    
     def commit(self, mergetype = MERGE_SMALL):
         """Finishes writing and unlocks the index.
         
@@ -239,6 +262,22 @@ class IndexWriter(index.DeletionMixin):
         self.segments = new_segments
 
 
+def _copy_file(storage, name, outstorage, outname, chunksize = 1024 * 1024):
+    infile = storage.open_file(name)
+    try:
+        outfile = outstorage.create_file(outname)
+        try:
+            while True:
+                data = infile.read(chunksize)
+                if not data:
+                    break
+                outfile.write(data)
+        finally:
+            outfile.close()
+    finally:
+        infile.close()
+
+
 class SegmentWriter(object):
     """
     Do not instantiate this object directly; it is created by the IndexWriter object.